@@ -5,21 +5,129 @@ import json
 import time
 import shlex
 import shutil
+import glob
+import errno
 import socket
 import sqlite3
 import hashlib
 import logging
-import mimetypes
 import platform
-import webbrowser
 import subprocess
 import re
-import requests
-import psutil
+import uuid
+import types
+import inspect
+import builtins
+import functools
+import importlib
+import threading
+import struct
+import ipaddress
+from array import array
 from pathlib import Path
+from urllib.parse import urlsplit
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional,Tuple
-from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional,Tuple
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# ВІДКЛАДЕНІ ІМПОРТИ ТА ПРОФІЛЬ ЗАПУСКУ
+# ============================================================================
+
+class StartupProfile:
+    """--startup-profile: час імпортів верхнього рівня та етапів до першого запиту"""
+    
+    FLAG = "--startup-profile"
+    
+    def __init__(self):
+        self.enabled = self.FLAG in sys.argv
+        self.started = time.perf_counter()
+        self.imports: Dict[str, float] = defaultdict(float)
+        self.phases: List[Tuple[str, float]] = []
+        self._depth = 0
+        self._original_import = builtins.__import__
+        if self.enabled:
+            builtins.__import__ = self._timed_import
+    
+    def _timed_import(self, name, *args, **kwargs):
+        # Вкладені імпорти входять у час модуля, який їх викликав
+        if not self._depth and name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.imports[name] += (time.perf_counter() - start) * 1000
+    
+    def record(self, name: str, seconds: float):
+        if self.enabled:
+            self.imports[name] += seconds * 1000
+    
+    def mark(self, phase: str):
+        if self.enabled:
+            self.phases.append((phase, (time.perf_counter() - self.started) * 1000))
+    
+    def report(self, limit: int = 15) -> str:
+        """Звіт; після нього імпорти більше не відстежуються"""
+        builtins.__import__ = self._original_import
+        total = (time.perf_counter() - self.started) * 1000
+        lines = [
+            f"⏱️ Профіль запуску: {total:.1f} мс від імпорту ai_agent до першого запиту "
+            f"(CPU процесу з моменту старту інтерпретатора: {time.process_time() * 1000:.0f} мс)",
+            "  Етапи:"
+        ]
+        lines += [f"    {name:<36}{at:8.1f} мс" for name, at in self.phases]
+        slowest = [(name, ms) for name, ms in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+                   if ms >= 0.5][:limit]
+        if slowest:
+            lines.append("  Імпорти:")
+            lines += [f"    {name:<36}{ms:8.1f} мс" for name, ms in slowest]
+        self.enabled = False
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
+
+
+class LazyModule(types.ModuleType):
+    """Модуль, який імпортується при першому зверненні до його атрибута"""
+    
+    def __getattr__(self, attr: str):
+        start = time.perf_counter()
+        module = importlib.import_module(self.__name__)
+        startup_profile.record(f"{self.__name__} (відкладено)", time.perf_counter() - start)
+        # Далі атрибути знаходяться напряму, без __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+_optional_modules: Dict[str, Any] = {}
+
+
+def optional_module(name: str) -> Optional[types.ModuleType]:
+    """Необов'язкова залежність: імпорт при першому запиті, None - якщо не встановлена"""
+    if name not in _optional_modules:
+        start = time.perf_counter()
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+        startup_profile.record(f"{name} (відкладено)", time.perf_counter() - start)
+    return _optional_modules[name]
+
+
+# Важкі модулі потрібні лише окремим командам - не платимо за них до першого запиту
+requests = LazyModule("requests")
+psutil = LazyModule("psutil")
+asyncio = LazyModule("asyncio")
+ssl = LazyModule("ssl")
+mimetypes = LazyModule("mimetypes")
+webbrowser = LazyModule("webbrowser")
 
 # ============================================================================
 # РОЗШИРЕНА КОНФІГУРАЦІЯ
@@ -62,8 +170,28 @@ class Config:
     MAX_HISTORY_MESSAGES = 50
     
     # Автоматизація
-    SCHEDULE_CHECK_INTERVAL = 60  # секунд
+    SCHEDULE_CHECK_INTERVAL = 60  # секунд (макс. сон планувальника між звіркою з БД)
+    SCHEDULER_WORKERS = 2  # одночасних запусків завдань
+    SCHEDULER_MISFIRE_POLICY = "run_once"  # run_once - один наздоганяючий запуск, skip - пропустити
+    SCHEDULER_MISFIRE_GRACE = 300  # секунд запізнення, яке ще не вважається пропуском
     AUTO_CLEANUP_DAYS = 30
+    
+    # Пакетні файлові операції (copy_files/move_files/delete_files)
+    FILE_BATCH_WORKERS = 8  # паралельних операцій
+    FILE_BATCH_CONFLICT = "skip"  # skip | overwrite | rename - якщо ціль уже існує
+    LARGE_COPY_THRESHOLD = 256 * 1024 * 1024  # з цього розміру copy_file копіює шматками з прогресом і докопіюванням
+    LARGE_COPY_CHUNK = 64 * 1024 * 1024
+    
+    # Плагіни команд: модулі з класами CommandPlugin (start_agent додає extended_features)
+    PLUGIN_MODULES = []
+    
+    # Системні показники (спільний семплер)
+    SYSTEM_SAMPLE_INTERVAL = 1.0  # секунд (роздільність сирого рівня історії)
+    
+    # Трасування продуктивності
+    PERF_TRACING_ENABLED = True
+    PERF_MAX_SPANS_PER_TRACE = 500
+    PERF_REPORT_HOURS = 24
 
 # ============================================================================
 # НАЛАШТУВАННЯ ЛОГУВАННЯ
@@ -100,16 +228,352 @@ def setup_logging():
     # Ротація логів (видалення старих)
     cleanup_old_logs(Config.LOGS_DIR, days=30)
 
+# ============================================================================
+# ТРАСУВАННЯ ПРОДУКТИВНОСТІ
+# ============================================================================
+
+class Span:
+    """Один проміжок виконання: команда, метод менеджера, запит до БД чи LLM"""
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "started_at",
+                 "wall_start", "cpu_start", "wall_ms", "cpu_ms", "success", "attrs")
+    
+    def __init__(self, trace_id: str, span_id: int, parent_id: Optional[int], name: str, kind: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.started_at = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.success = True
+        self.attrs: Dict[str, Any] = {}
+    
+    def set(self, **attrs):
+        """Додати атрибути (токени LLM тощо)"""
+        self.attrs.update(attrs)
+    
+    def elapsed_ms(self) -> float:
+        """Скільки мілісекунд минуло від початку span-а"""
+        return (time.perf_counter() - self.wall_start) * 1000
+    
+    def finish(self):
+        """Зафіксувати wall/CPU час та швидкість генерації токенів"""
+        self.wall_ms = self.elapsed_ms()
+        self.cpu_ms = (time.thread_time() - self.cpu_start) * 1000
+        completion = self.attrs.get("completion_tokens")
+        if completion and self.wall_ms > 0:
+            self.attrs["tokens_per_sec"] = completion / (self.wall_ms / 1000)
+
+
+class _NullSpan:
+    """Заглушка, коли трасування неактивне (виклик поза командою)"""
+    
+    @property
+    def name(self) -> Optional[str]:
+        return None
+    
+    @name.setter
+    def name(self, value: str):
+        pass
+    
+    @property
+    def success(self) -> bool:
+        return True
+    
+    @success.setter
+    def success(self, value: bool):
+        pass
+    
+    def set(self, **attrs):
+        pass
+    
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+
+NULL_SPAN = _NullSpan()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль (0-100) з лінійною інтерполяцією по відсортованому списку"""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def summarize_timings(rows: List[Tuple[str, float, float]]) -> List[Dict[str, Any]]:
+    """Групування (назва, wall_ms, cpu_ms) у p50/p95/p99 по кожній назві"""
+    grouped: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    for name, wall_ms, cpu_ms in rows:
+        grouped[name].append((wall_ms or 0.0, cpu_ms or 0.0))
+    
+    summary = []
+    for name, values in grouped.items():
+        walls = sorted(v[0] for v in values)
+        summary.append({
+            "name": name,
+            "count": len(values),
+            "p50_ms": round(percentile(walls, 50), 2),
+            "p95_ms": round(percentile(walls, 95), 2),
+            "p99_ms": round(percentile(walls, 99), 2),
+            "max_ms": round(walls[-1], 2),
+            "avg_cpu_ms": round(sum(v[1] for v in values) / len(values), 2)
+        })
+    summary.sort(key=lambda x: x["p95_ms"], reverse=True)
+    return summary
+
+
+class PerformanceTracer:
+    """Трасувальник: вкладені span-и з wall/CPU часом, запис у БД пакетом після команди"""
+    
+    def __init__(self):
+        self.enabled = Config.PERF_TRACING_ENABLED
+        self.db = None
+        self._local = threading.local()
+        # Завершені span-и, що чекають запису в БД (deque - потокобезпечний append/popleft)
+        self._pending: deque = deque(maxlen=10000)
+        self._listeners: List[Callable[[List[Span]], None]] = []
+    
+    def attach(self, db):
+        """Підключити базу даних для збереження span-ів"""
+        self.db = db
+    
+    def add_listener(self, callback: Callable[[List[Span]], None]):
+        """Підписка на завершені трасування (наприклад, для експорту метрик)"""
+        self._listeners.append(callback)
+    
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def current(self):
+        """Поточний активний span цього потоку"""
+        stack = self._stack()
+        return stack[-1] if stack else NULL_SPAN
+    
+    def pending_count(self) -> int:
+        """Кількість span-ів у черзі на запис"""
+        return len(self._pending)
+    
+    @contextmanager
+    def trace(self, name: str, kind: str = "command"):
+        """Кореневий span: одна команда користувача або API-запит"""
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        
+        stack = self._stack()
+        if stack:
+            # Вкладений виклик (LLM викликає команду) - це звичайний span
+            with self.span(name, kind) as span:
+                yield span
+            return
+        
+        root = Span(uuid.uuid4().hex[:16], 0, None, name, kind)
+        self._local.spans = [root]
+        self._local.next_id = 1
+        stack.append(root)
+        try:
+            yield root
+        except BaseException:
+            root.success = False
+            raise
+        finally:
+            stack.pop()
+            root.finish()
+            spans = self._local.spans
+            self._local.spans = []
+            for callback in self._listeners:
+                try:
+                    callback(spans)
+                except Exception as e:
+                    logging.error(f"Помилка обробника трасування: {str(e)}")
+            self._pending.extend(spans)
+            self.flush()
+    
+    @contextmanager
+    def span(self, name: str, kind: str):
+        """Дочірній span; поза командою нічого не записує"""
+        stack = self._stack()
+        if not self.enabled or not stack:
+            yield NULL_SPAN
+            return
+        
+        spans = self._local.spans
+        parent = stack[-1]
+        span = Span(parent.trace_id, self._local.next_id, parent.span_id, name, kind)
+        self._local.next_id += 1
+        stack.append(span)
+        try:
+            yield span
+        except BaseException:
+            span.success = False
+            raise
+        finally:
+            stack.pop()
+            span.finish()
+            if len(spans) < Config.PERF_MAX_SPANS_PER_TRACE:
+                spans.append(span)
+    
+    def flush(self):
+        """Записати накопичені span-и в БД однією транзакцією"""
+        if self.db is None or not self._pending:
+            return
+        batch = []
+        while self._pending:
+            try:
+                batch.append(self._pending.popleft())
+            except IndexError:
+                break
+        try:
+            self.db.record_spans(batch)
+        except Exception as e:
+            logging.error(f"Помилка запису метрик продуктивності: {str(e)}")
+    
+    def report(self, command: str = None, hours: int = None) -> Dict[str, Any]:
+        """p50/p95/p99 по командах (або по span-ах однієї команди) та статистика LLM"""
+        if self.db is None:
+            return {"success": False, "error": "❌ База даних недоступна"}
+        hours = hours or Config.PERF_REPORT_HOURS
+        since = time.time() - hours * 3600
+        try:
+            if command:
+                rows = self.db.get_span_timings(since, root_name=command)
+            else:
+                rows = self.db.get_span_timings(since, kind="command")
+            return {
+                "success": True,
+                "hours": hours,
+                "command": command,
+                "spans": summarize_timings(rows),
+                "llm": self.db.get_llm_throughput(since)
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+
+tracer = PerformanceTracer()
+
+
+def _traced(func: Callable, name: str, kind: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name, kind) as span:
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and result.get("success") is False:
+                span.success = False
+            return result
+    return wrapper
+
+
+def traced_methods(kind: str, exclude: Tuple[str, ...] = ()):
+    """Декоратор класу: кожен публічний метод виконується у власному span-і"""
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or attr in exclude:
+                continue
+            name = f"{cls.__name__}.{attr}"
+            if isinstance(value, staticmethod):
+                setattr(cls, attr, staticmethod(_traced(value.__func__, name, kind)))
+            elif inspect.isfunction(value):
+                setattr(cls, attr, _traced(value, name, kind))
+        return cls
+    return decorate
+
+
+def command_name(user_input: str) -> str:
+    """Назва команди для метрик (перше слово вводу)"""
+    parts = user_input.split(maxsplit=1)
+    return parts[0].lower() if parts else ""
+
+
+def is_error_result(result: Optional[str]) -> bool:
+    """Результат команди вважається помилкою, якщо починається з ❌"""
+    return not result or result.lstrip().startswith("❌")
+
+
+# Порядок важливий: спершу довгі шаблони, числа - в кінці
+MESSAGE_MASKS = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?\b"), "<ts>"),
+    (re.compile(r"(?:[A-Za-z]:\\|/)(?:[^\s'\"\\/:]+[\\/])*[^\s'\":,)]*"), "<path>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<hex>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"-?\b\d+(?:\.\d+)?\b"), "<n>"),
+]
+
+
+def message_template(message: str) -> str:
+    """Шаблон повідомлення: числа, шляхи, hex, uuid, IP і час замінено заповнювачами"""
+    for pattern, placeholder in MESSAGE_MASKS:
+        message = pattern.sub(placeholder, message)
+    return message[:300]
+
+
+def error_signature(result: Optional[str]) -> str:
+    """Клас помилки команди: шаблон першого рядка результату"""
+    lines = (result or "").strip().splitlines()
+    return message_template(lines[0].lstrip("❌ ").strip()) if lines else "<порожній результат>"
+
+# ============================================================================
+# ШИНА ПОДІЙ
+# ============================================================================
+
+class EventBus:
+    """Публікація подій фоновими задачами; підписники викликаються в потоці видавця"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable[[str, Dict[str, Any]], None]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable[[str, Dict[str, Any]], None]) -> Callable[[], None]:
+        """Підписатися на тему ('*' - усі теми); повертає функцію відписки"""
+        with self._lock:
+            self._subscribers[topic].append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers.get(topic, []):
+                    self._subscribers[topic].remove(callback)
+        return unsubscribe
+
+    def publish(self, topic: str, payload: Dict[str, Any]):
+        """Розіслати подію; помилка одного підписника не зупиняє інших"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(topic, ())) + list(self._subscribers.get("*", ()))
+        for callback in callbacks:
+            try:
+                callback(topic, payload)
+            except Exception as e:
+                logging.error(f"Помилка обробника події {topic}: {e}")
+
+
+event_bus = EventBus()
+
 # ============================================================================
 # БАЗА ДАНИХ ДЛЯ ПАМ'ЯТІ АГЕНТА
 # ============================================================================
 
+@traced_methods("db", exclude=("create_tables", "record_spans", "get_span_timings", "get_llm_throughput"))
 class AgentDatabase:
     """База даних для збереження пам'яті та контексту агента"""
     
     def __init__(self):
         Config.KNOWLEDGE_BASE_DIR.mkdir(exist_ok=True)
         self.conn = sqlite3.connect(Config.DB_PATH, check_same_thread=False)
+        # Пакетні записи з фонових потоків (семплер, трасування) не мають перемежовуватися
+        self.lock = threading.RLock()
+        # Для перенесення старої історії у зведення тими ж правилами, що й log_command
+        self.conn.create_function("command_name", 1, command_name, deterministic=True)
+        self.conn.create_function("error_signature", 1, error_signature, deterministic=True)
         self.create_tables()
     
     def create_tables(self):
@@ -178,42 +642,309 @@ class AgentDatabase:
             )
         ''')
         
+        # Таблиця метрик продуктивності (span-и трасування)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS performance_spans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                trace_id TEXT NOT NULL,
+                span_id INTEGER NOT NULL,
+                parent_id INTEGER,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                wall_ms REAL,
+                cpu_ms REAL,
+                success BOOLEAN,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                tokens_per_sec REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_spans_kind_time ON performance_spans (kind, started_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_spans_trace ON performance_spans (trace_id)')
+        
+        # Таблиця моніторингу (сирі зрізи, 1 с)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS system_monitoring (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                cpu_percent REAL,
+                memory_percent REAL,
+                disk_percent REAL,
+                network_sent INTEGER,
+                network_received INTEGER
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoring_time ON system_monitoring (timestamp)')
+        
+        # Агреговані рівні моніторингу (1 хв, 1 год)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS system_monitoring_rollup (
+                tier TEXT NOT NULL,
+                bucket_start REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                cpu_avg REAL,
+                cpu_max REAL,
+                memory_avg REAL,
+                memory_max REAL,
+                disk_avg REAL,
+                net_sent_rate REAL,
+                net_recv_rate REAL,
+                PRIMARY KEY (tier, bucket_start)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Журнал масових дій над процесами (рядок на кожен PID)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS process_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                operation_id TEXT NOT NULL,
+                action TEXT NOT NULL,
+                selector TEXT,
+                pid INTEGER NOT NULL,
+                name TEXT,
+                outcome TEXT NOT NULL,
+                signal TEXT,
+                returncode INTEGER,
+                error TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_process_actions_op ON process_actions (operation_id)')
+        
+        # Історія запусків запланованих завдань
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS task_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL,
+                scheduled_for DATETIME,
+                started_at DATETIME,
+                finished_at DATETIME,
+                duration REAL,
+                status TEXT NOT NULL,
+                result TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_runs_task ON task_runs (task_id, id)')
+        
+        # Денні зведення по командах: оновлюються в log_command, статистика не читає історію
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_stats_daily (
+                day TEXT NOT NULL,
+                command TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                total_time REAL NOT NULL,
+                max_time REAL NOT NULL,
+                PRIMARY KEY (day, command)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_errors (
+                command TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                last_seen DATETIME,
+                sample TEXT,
+                PRIMARY KEY (command, signature)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_command_history_failed ON command_history (id) WHERE success = 0')
+        
+        # Історію, записану до появи зведень, переносимо один раз
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM command_stats_daily)')
+        if not cursor.fetchone()[0]:
+            cursor.execute('''
+                INSERT INTO command_stats_daily (day, command, count, failures, total_time, max_time)
+                SELECT date(timestamp), command_name(command), COUNT(*),
+                       SUM(CASE WHEN success THEN 0 ELSE 1 END),
+                       SUM(COALESCE(execution_time, 0)), MAX(COALESCE(execution_time, 0))
+                FROM command_history GROUP BY 1, 2
+            ''')
+            cursor.execute('DELETE FROM command_errors')
+            # Єдиний агрегат MAX(timestamp): SQLite бере result саме з останнього рядка групи
+            cursor.execute('''
+                INSERT INTO command_errors (command, signature, count, last_seen, sample)
+                SELECT command_name(command), error_signature(result), COUNT(*), MAX(timestamp), result
+                FROM command_history WHERE success = 0 GROUP BY 1, 2
+            ''')
+        
         self.conn.commit()
     
     def log_command(self, command: str, result: str, success: bool, execution_time: float):
-        """Логування виконаної команди"""
+        """Логування виконаної команди (в тій же транзакції оновлюються денні зведення)"""
+        name = command_name(command)
+        elapsed = execution_time or 0.0
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO command_history (command, result, success, execution_time) VALUES (?, ?, ?, ?)',
+                (command, result, success, execution_time)
+            )
+            cursor.execute('''
+                INSERT INTO command_stats_daily (day, command, count, failures, total_time, max_time)
+                VALUES (date('now'), ?, 1, ?, ?, ?)
+                ON CONFLICT (day, command) DO UPDATE SET
+                    count = count + 1,
+                    failures = failures + excluded.failures,
+                    total_time = total_time + excluded.total_time,
+                    max_time = MAX(max_time, excluded.max_time)
+            ''', (name, 0 if success else 1, elapsed, elapsed))
+            if not success:
+                cursor.execute('''
+                    INSERT INTO command_errors (command, signature, count, last_seen, sample)
+                    VALUES (?, ?, 1, CURRENT_TIMESTAMP, ?)
+                    ON CONFLICT (command, signature) DO UPDATE SET
+                        count = count + 1,
+                        last_seen = excluded.last_seen,
+                        sample = excluded.sample
+                ''', (name, error_signature(result), result))
+            self.conn.commit()
+    
+    def get_command_stats(self, days: int = None) -> Dict[str, Any]:
+        """Зведення по командах за весь час (або за останні days днів) - O(команд × днів), не O(історії)"""
+        where, params = ("WHERE day >= date('now', ?)", (f"-{days - 1} days",)) if days else ("", ())
         cursor = self.conn.cursor()
         cursor.execute(
-            'INSERT INTO command_history (command, result, success, execution_time) VALUES (?, ?, ?, ?)',
-            (command, result, success, execution_time)
+            'SELECT command, SUM(count), SUM(failures), SUM(total_time), MAX(max_time) '
+            f'FROM command_stats_daily {where} GROUP BY command ORDER BY 2 DESC, 1',
+            params
         )
-        self.conn.commit()
+        commands = [
+            {
+                "command": row[0],
+                "count": row[1],
+                "failures": row[2],
+                "total_time": row[3],
+                "max_time": row[4]
+            }
+            for row in cursor.fetchall()
+        ]
+        cursor.execute(f'SELECT MIN(day), MAX(day), COUNT(DISTINCT day) FROM command_stats_daily {where}', params)
+        first_day, last_day, active_days = cursor.fetchone()
+        return {"commands": commands, "first_day": first_day, "last_day": last_day, "active_days": active_days}
+    
+    def get_daily_command_stats(self, days: int = 30) -> List[Dict]:
+        """Підсумки по днях (кількість, помилки, сумарний час)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT day, SUM(count), SUM(failures), SUM(total_time) FROM command_stats_daily "
+            "WHERE day >= date('now', ?) GROUP BY day ORDER BY day",
+            (f"-{days - 1} days",)
+        )
+        return [
+            {"day": row[0], "count": row[1], "failures": row[2], "total_time": row[3]}
+            for row in cursor.fetchall()
+        ]
+    
+    def get_error_stats(self, limit: int = 20) -> List[Dict]:
+        """Класи помилок (команда + шаблон повідомлення) за частотою"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT command, signature, count, last_seen, sample FROM command_errors '
+            'ORDER BY count DESC, last_seen DESC LIMIT ?',
+            (limit,)
+        )
+        return [
+            {"command": row[0], "signature": row[1], "count": row[2], "last_seen": row[3], "sample": row[4]}
+            for row in cursor.fetchall()
+        ]
+    
+    def get_recent_errors(self, limit: int = 10) -> List[Dict]:
+        """Останні невдалі команди разом з результатом"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT timestamp, command, result, execution_time FROM command_history '
+            'WHERE success = 0 ORDER BY id DESC LIMIT ?',
+            (limit,)
+        )
+        return [
+            {"timestamp": row[0], "command": row[1], "result": row[2], "execution_time": row[3]}
+            for row in cursor.fetchall()
+        ]
     
     def get_command_history(self, limit: int = 20) -> List[Dict]:
         """Отримання історії команд"""
         cursor = self.conn.cursor()
         cursor.execute(
-            'SELECT timestamp, command, success FROM command_history ORDER BY timestamp DESC LIMIT ?',
+            'SELECT timestamp, command, success, execution_time FROM command_history ORDER BY timestamp DESC LIMIT ?',
             (limit,)
         )
-        return [{"timestamp": row[0], "command": row[1], "success": bool(row[2])} for row in cursor.fetchall()]
+        return [
+            {"timestamp": row[0], "command": row[1], "success": bool(row[2]), "execution_time": row[3]}
+            for row in cursor.fetchall()
+        ]
     
-    def add_to_file_index(self, filepath: str, metadata: Dict):
-        """Додавання файлу до індексу"""
+    def record_spans(self, spans: List[Span]):
+        """Пакетний запис span-ів трасування"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+                INSERT INTO performance_spans (trace_id, span_id, parent_id, name, kind, started_at,
+                                               wall_ms, cpu_ms, success, prompt_tokens, completion_tokens, tokens_per_sec)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    s.trace_id, s.span_id, s.parent_id, s.name, s.kind, s.started_at,
+                    s.wall_ms, s.cpu_ms, s.success,
+                    s.attrs.get("prompt_tokens"), s.attrs.get("completion_tokens"), s.attrs.get("tokens_per_sec")
+                )
+                for s in spans
+            ])
+            self.conn.commit()
+    
+    def get_span_timings(self, since: float, kind: str = None, root_name: str = None) -> List[Tuple[str, float, float]]:
+        """Тривалості span-ів: за типом або всі span-и всередині команд з назвою root_name"""
+        cursor = self.conn.cursor()
+        if root_name:
+            cursor.execute('''
+                SELECT s.name, s.wall_ms, s.cpu_ms
+                FROM performance_spans s
+                JOIN performance_spans r ON r.trace_id = s.trace_id AND r.parent_id IS NULL
+                WHERE r.name = ? AND r.started_at >= ?
+            ''', (root_name, since))
+        else:
+            query = 'SELECT name, wall_ms, cpu_ms FROM performance_spans WHERE kind = ? AND started_at >= ?'
+            if kind == "command":
+                # Вкладені команди (виклик із відповіді LLM) окремо не рахуємо
+                query += ' AND parent_id IS NULL'
+            cursor.execute(query, (kind, since))
+        return cursor.fetchall()
+    
+    def get_llm_throughput(self, since: float) -> Dict[str, Any]:
+        """Сумарна статистика токенів LLM"""
         cursor = self.conn.cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO file_index (filepath, filename, extension, size, modified_date, hash, tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            filepath,
-            metadata.get('filename'),
-            metadata.get('extension'),
-            metadata.get('size'),
-            metadata.get('modified_date'),
-            metadata.get('hash'),
-            metadata.get('tags')
-        ))
-        self.conn.commit()
+            SELECT COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), AVG(tokens_per_sec), SUM(wall_ms)
+            FROM performance_spans
+            WHERE kind = 'llm' AND completion_tokens IS NOT NULL AND started_at >= ?
+        ''', (since,))
+        requests_count, prompt, completion, avg_tps, total_ms = cursor.fetchone()
+        return {
+            "requests": requests_count or 0,
+            "prompt_tokens": prompt or 0,
+            "completion_tokens": completion or 0,
+            "avg_tokens_per_sec": round(avg_tps or 0.0, 2),
+            "total_generation_sec": round((total_ms or 0.0) / 1000, 2)
+        }
+    
+    def add_to_file_index(self, filepath: str, metadata: Dict):
+        """Додавання файлу до індексу"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO file_index (filepath, filename, extension, size, modified_date, hash, tags)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                filepath,
+                metadata.get('filename'),
+                metadata.get('extension'),
+                metadata.get('size'),
+                metadata.get('modified_date'),
+                metadata.get('hash'),
+                metadata.get('tags')
+            ))
+            self.conn.commit()
     
     def search_file_index(self, query: str) -> List[Dict]:
         """Пошук у файловому індексі"""
@@ -237,14 +968,115 @@ class AgentDatabase:
             for row in cursor.fetchall()
         ]
     
-    def save_preference(self, key: str, value: str):
-        """Збереження налаштування користувача (пам'ять)"""
+    def update_file_index(self, upserts: Dict[str, Dict], removed: List[str]):
+        """Пакетне оновлення індексу: нові/змінені файли та видалені шляхи (з усім вмістом) однією транзакцією"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            for path in removed:
+                prefix = path.rstrip(os.sep) + os.sep
+                cursor.execute(
+                    'DELETE FROM file_index WHERE filepath = ? OR substr(filepath, 1, ?) = ?',
+                    (path, len(prefix), prefix)
+                )
+            cursor.executemany('''
+                INSERT OR REPLACE INTO file_index (filepath, filename, extension, size, modified_date, hash, tags)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (path, m.get('filename'), m.get('extension'), m.get('size'),
+                 m.get('modified_date'), m.get('hash'), m.get('tags'))
+                for path, m in upserts.items()
+            ])
+            self.conn.commit()
+    
+    def add_scheduled_task(self, task_name: str, command: str, schedule_time: str, schedule_type: str) -> int:
+        """Додавання запланованого завдання; повертає його id"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO scheduled_tasks (task_name, command, schedule_time, schedule_type, created_date) '
+                'VALUES (?, ?, ?, ?, ?)',
+                # Місцевий час: від нього рахуються 'once HH:MM' та інтервали
+                (task_name, command, schedule_time, schedule_type, datetime.now().isoformat(sep=" ", timespec="seconds"))
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+    
+    def get_scheduled_tasks(self, enabled_only: bool = True) -> List[Dict]:
+        """Заплановані завдання (за замовчуванням лише активні)"""
         cursor = self.conn.cursor()
         cursor.execute(
-            'INSERT OR REPLACE INTO user_preferences (key, value) VALUES (?, ?)',
-            (key, value)
+            'SELECT id, task_name, command, schedule_time, schedule_type, enabled, last_run, created_date '
+            'FROM scheduled_tasks' + (' WHERE enabled = 1' if enabled_only else '') + ' ORDER BY id'
         )
-        self.conn.commit()
+        return [
+            {
+                "id": row[0],
+                "task_name": row[1],
+                "command": row[2],
+                "schedule_time": row[3],
+                "schedule_type": row[4],
+                "enabled": bool(row[5]),
+                "last_run": row[6],
+                "created_date": row[7]
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    def set_task_enabled(self, task_id: int, enabled: bool) -> bool:
+        """Увімкнути/вимкнути завдання; False - якщо такого немає"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('UPDATE scheduled_tasks SET enabled = ? WHERE id = ?', (int(enabled), task_id))
+            self.conn.commit()
+            return cursor.rowcount > 0
+    
+    def log_task_run(self, task_id: int, scheduled_for: str, started_at: str, finished_at: str,
+                     duration: float, status: str, result: str, disable: bool = False):
+        """Запис запуску в історію й оновлення last_run - однією транзакцією"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO task_runs (task_id, scheduled_for, started_at, finished_at, duration, status, result) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (task_id, scheduled_for, started_at, finished_at, duration, status, result)
+            )
+            if status in ("success", "failed"):
+                cursor.execute('UPDATE scheduled_tasks SET last_run = ? WHERE id = ?', (started_at, task_id))
+            if disable:
+                cursor.execute('UPDATE scheduled_tasks SET enabled = 0 WHERE id = ?', (task_id,))
+            self.conn.commit()
+    
+    def get_task_runs(self, task_id: int = None, limit: int = 20) -> List[Dict]:
+        """Останні запуски (усіх завдань або одного)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT r.task_id, t.task_name, r.scheduled_for, r.started_at, r.duration, r.status, r.result '
+            'FROM task_runs r LEFT JOIN scheduled_tasks t ON t.id = r.task_id '
+            + ('WHERE r.task_id = ? ' if task_id is not None else '') + 'ORDER BY r.id DESC LIMIT ?',
+            ((task_id, limit) if task_id is not None else (limit,))
+        )
+        return [
+            {
+                "task_id": row[0],
+                "task_name": row[1],
+                "scheduled_for": row[2],
+                "started_at": row[3],
+                "duration": row[4],
+                "status": row[5],
+                "result": row[6]
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    def save_preference(self, key: str, value: str):
+        """Збереження налаштування користувача (пам'ять)"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT OR REPLACE INTO user_preferences (key, value) VALUES (?, ?)',
+                (key, value)
+            )
+            self.conn.commit()
     
     def get_preference(self, key: str) -> Optional[str]:
         """Отримання налаштування"""
@@ -255,9 +1087,10 @@ class AgentDatabase:
     
     def delete_preference(self, key: str):
         """Видалення налаштування"""
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM user_preferences WHERE key = ?', (key,))
-        self.conn.commit()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('DELETE FROM user_preferences WHERE key = ?', (key,))
+            self.conn.commit()
     
     def get_all_preferences(self) -> Dict[str, str]:
         """Отримати всі налаштування (пам'ять)"""
@@ -267,12 +1100,104 @@ class AgentDatabase:
     
     def add_context_memory(self, context_type: str, content: str, metadata: Dict = None, importance: int = 5):
         """Додавання до контекстної пам'яті"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO context_memory (context_type, content, metadata, importance) VALUES (?, ?, ?, ?)',
+                (context_type, content, json.dumps(metadata) if metadata else None, importance)
+            )
+            self.conn.commit()
+    
+    def log_process_actions(self, operation_id: str, action: str, selector: str,
+                            outcomes: List[Dict[str, Any]], summary: str, importance: int = 8):
+        """Звіт масової операції над процесами та запис у контекстну пам'ять - однією транзакцією"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+                INSERT INTO process_actions (operation_id, action, selector, pid, name, outcome, signal, returncode, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (operation_id, action, selector, o["pid"], o["name"], o["outcome"], o["signal"], o["returncode"], o["error"])
+                for o in outcomes
+            ])
+            cursor.execute(
+                'INSERT INTO context_memory (context_type, content, metadata, importance) VALUES (?, ?, ?, ?)',
+                (action, summary, json.dumps({"operation_id": operation_id}), importance)
+            )
+            self.conn.commit()
+    
+    def log_system_monitoring(self, cpu: float, memory: float, disk: float, net_sent: int, net_recv: int):
+        """Логування системного моніторингу"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO system_monitoring (cpu_percent, memory_percent, disk_percent, network_sent, network_received) VALUES (?, ?, ?, ?, ?)',
+                (cpu, memory, disk, net_sent, net_recv)
+            )
+            self.conn.commit()
+    
+    def log_system_monitoring_batch(self, rows: List[Tuple[float, float, float, float, int, int]]):
+        """Пакетний запис сирих зрізів: (ts, cpu, memory, disk, net_sent, net_recv)"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "INSERT INTO system_monitoring (timestamp, cpu_percent, memory_percent, disk_percent, network_sent, network_received) "
+                "VALUES (datetime(?, 'unixepoch'), ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+    
+    def save_monitoring_rollups(self, tier: str, rows: List[Tuple]):
+        """Запис агрегатів: (bucket_start, samples, cpu_avg, cpu_max, memory_avg, memory_max, disk_avg, sent, recv)"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            # Якщо bucket вже є (перезапуск посеред інтервалу) - зливаємо зважено за кількістю зрізів
+            cursor.executemany('''
+                INSERT INTO system_monitoring_rollup (tier, bucket_start, samples, cpu_avg, cpu_max, memory_avg,
+                                                      memory_max, disk_avg, net_sent_rate, net_recv_rate)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (tier, bucket_start) DO UPDATE SET
+                    cpu_avg = (cpu_avg * samples + excluded.cpu_avg * excluded.samples) / (samples + excluded.samples),
+                    memory_avg = (memory_avg * samples + excluded.memory_avg * excluded.samples) / (samples + excluded.samples),
+                    disk_avg = (disk_avg * samples + excluded.disk_avg * excluded.samples) / (samples + excluded.samples),
+                    net_sent_rate = (net_sent_rate * samples + excluded.net_sent_rate * excluded.samples) / (samples + excluded.samples),
+                    net_recv_rate = (net_recv_rate * samples + excluded.net_recv_rate * excluded.samples) / (samples + excluded.samples),
+                    cpu_max = MAX(cpu_max, excluded.cpu_max),
+                    memory_max = MAX(memory_max, excluded.memory_max),
+                    samples = samples + excluded.samples
+            ''', [(tier,) + tuple(row) for row in rows])
+            self.conn.commit()
+    
+    def get_monitoring_raw(self, since: float) -> List[Tuple]:
+        """Сирі зрізи з моменту since: (ts, cpu, memory, disk)"""
         cursor = self.conn.cursor()
-        cursor.execute(
-            'INSERT INTO context_memory (context_type, content, metadata, importance) VALUES (?, ?, ?, ?)',
-            (context_type, content, json.dumps(metadata) if metadata else None, importance)
-        )
-        self.conn.commit()
+        cursor.execute('''
+            SELECT CAST(strftime('%s', timestamp) AS REAL), cpu_percent, memory_percent, disk_percent
+            FROM system_monitoring
+            WHERE timestamp >= datetime(?, 'unixepoch')
+            ORDER BY timestamp
+        ''', (since,))
+        return cursor.fetchall()
+    
+    def get_monitoring_rollups(self, tier: str, since: float) -> List[Tuple]:
+        """Агрегати рівня tier з моменту since"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT bucket_start, cpu_avg, memory_avg, disk_avg, cpu_max, memory_max, net_sent_rate, net_recv_rate
+            FROM system_monitoring_rollup
+            WHERE tier = ? AND bucket_start >= ?
+            ORDER BY bucket_start
+        ''', (tier, since))
+        return cursor.fetchall()
+    
+    def prune_monitoring(self, raw_before: float, rollup_before: Dict[str, float]):
+        """Видалення даних, старших за термін зберігання кожного рівня"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM system_monitoring WHERE timestamp < datetime(?, 'unixepoch')", (raw_before,))
+            for tier, before in rollup_before.items():
+                cursor.execute('DELETE FROM system_monitoring_rollup WHERE tier = ? AND bucket_start < ?', (tier, before))
+            self.conn.commit()
     
     def get_relevant_context(self, context_type: str = None, limit: int = 10) -> List[Dict]:
         """Отримання релевантного контексту"""
@@ -307,6 +1232,7 @@ class AgentDatabase:
 # РОЗШИРЕНИЙ КЛІЄНТ LM STUDIO
 # ============================================================================
 
+@traced_methods("llm", exclude=("build_system_context", "clear_history"))
 class LMStudioClient:
     """Розширений клієнт для роботи з LM Studio"""
     
@@ -331,6 +1257,10 @@ class LMStudioClient:
 - copy_file <джерело> <призначення> - копіювати файл
 - move_file <джерело> <призначення> - перемістити файл
 - delete_file <шлях> - видалити файл (з підтвердженням)
+- copy_files / move_files <джерела або шаблони...> <куди> [--conflict=skip|overwrite|rename] [--dry-run] - пакетно
+- delete_files <шляхи або шаблони...> [--dry-run] - пакетне видалення
+- copy_large <джерело> <призначення> [sha256[:хеш]] [--limit=MB/s] [--wait] - велике копіювання у фоні з докопіюванням
+- copy_jobs / copy_cancel <id> - стан / зупинка фонових копіювань
 - create_folder <шлях> - створити папку
 - list_directory <шлях> - показати вміст директорії
 - file_info <шлях> - детальна інформація про файл
@@ -347,7 +1277,10 @@ class LMStudioClient:
 - close_program <назва процесу> - закрити програму
 - list_processes [cpu|memory] [limit] - показати процеси
 - process_info <pid або назва> - інформація про процес
-- kill_process <pid> - примусово завершити процес
+- process_tree <pid або назва> - дерево процесів
+- app_usage [cpu|memory] [limit] - ресурси за програмами
+- kill_process <pid> [tree] - примусово завершити процес (з нащадками)
+- kill_processes <назва|re:шаблон|user:ім'я> [tree] - масово завершити процеси
 
 🖥️ СИСТЕМНИЙ МОНІТОРИНГ:
 - system_info - повна інформація про систему
@@ -360,9 +1293,10 @@ class LMStudioClient:
 
 🌐 ІНТЕРНЕТ ТА МЕРЕЖА:
 - check_internet - перевірити з'єднання
-- download_file <url> <шлях> - завантажити файл
+- download_file <url> <шлях> [sha256:хеш] - завантажити файл (паралельно, з докачуванням)
 - open_webpage <url> - відкрити сайт
 - ping <хост> [count] - перевірити доступність хосту
+- check_hosts <цілі...|@файл> - паралельна перевірка багатьох хостів/URL (TCP, HTTP, ICMP)
 - get_ip_info - інформація про IP-адресу
 - list_network_connections - активні з'єднання
 
@@ -379,6 +1313,7 @@ class LMStudioClient:
 - generate_password [довжина] - генерація пароля
 - hash_text <текст> [алгоритм] - хешування тексту
 - current_time - поточний час
+- perf_report [команда] - метрики продуктивності (p50/p95/p99)
 
 🧠 АНАЛІЗ ТА ДОПОМОГА:
 - analyze_code <код> - аналіз програмного коду
@@ -411,6 +1346,9 @@ to=functions.<команда> <|message|>{{JSON_аргументи}}
 
 Завжди використовуй цей формат для виконання дій!
 """
+        tools = plugin_registry.tools_context()
+        if tools:
+            context += "\n🧩 ДОДАТКОВІ КОМАНДИ (у дужках - імена JSON-аргументів):" + tools + "\n"
         return context
     
     def send_message(self, user_message: str, include_context: bool = True) -> str:
@@ -432,20 +1370,29 @@ to=functions.<команда> <|message|>{{JSON_аргументи}}
             messages.extend(self.conversation_history[-Config.MAX_HISTORY_MESSAGES:])
             messages.append({"role": "user", "content": user_message})
             
-            response = requests.post(
-                self.api_url,
-                json={
-                    "model": Config.MODEL_NAME,
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 3000,
-                    "stream": False
-                },
-                timeout=90
-            )
+            with tracer.span("LMStudioClient.http", "llm") as span:
+                response = requests.post(
+                    self.api_url,
+                    json={
+                        "model": Config.MODEL_NAME,
+                        "messages": messages,
+                        "temperature": 0.7,
+                        "max_tokens": 3000,
+                        "stream": False
+                    },
+                    timeout=90
+                )
+                if response.status_code == 200:
+                    result = response.json()
+                    usage = result.get("usage") or {}
+                    span.set(
+                        prompt_tokens=usage.get("prompt_tokens"),
+                        completion_tokens=usage.get("completion_tokens")
+                    )
+                else:
+                    span.success = False
             
             if response.status_code == 200:
-                result = response.json()
                 ai_response = result['choices'][0]['message']['content']
                 
                 # Зберігаємо в історію
@@ -466,19 +1413,270 @@ to=functions.<команда> <|message|>{{JSON_аргументи}}
             logging.error(f"Помилка LM Studio: {str(e)}")
             return f"❌ Помилка: {str(e)}"
     
-    def clear_history(self):
-        """Очищення історії"""
-        self.conversation_history = []
+    def clear_history(self):
+        """Очищення історії"""
+        self.conversation_history = []
+
+# ============================================================================
+# РОЗШИРЕНИЙ МЕНЕДЖЕР ФАЙЛОВОЇ СИСТЕМИ
+# ============================================================================
+
+# Помилки, з якими ядро відмовляє у копіюванні без буфера - тоді пробуємо наступний спосіб
+_ZERO_COPY_FALLBACK = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP), getattr(errno, "ENOTSOCK", errno.EBADF)
+}
+
+
+def zero_copy_file(source: str, destination: str, chunk_size: int = 64 * 1024 * 1024) -> str:
+    """Копіювання вмісту в ядрі: copy_file_range -> sendfile -> звичайний буфер; повертає використаний спосіб"""
+    with open(source, 'rb') as fsrc, open(destination, 'wb') as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(infd).st_size
+        for method in ("copy_file_range", "sendfile"):
+            call = getattr(os, method, None)
+            if call is None:
+                continue
+            copied = 0
+            try:
+                while True:
+                    if method == "copy_file_range":
+                        sent = call(infd, outfd, chunk_size)
+                    else:
+                        sent = call(outfd, infd, None, chunk_size)
+                    if not sent:
+                        if copied and copied >= size:
+                            return method
+                        # 0 до кінця файлу (procfs, FUSE) - решту копіює наступний спосіб
+                        break
+                    copied += sent
+            except OSError as e:
+                # Відступаємо лише якщо ще нічого не записано
+                if copied or e.errno not in _ZERO_COPY_FALLBACK:
+                    raise
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        return "buffer"
+
+
+class LargeFileCopier:
+    """Копіювання великого файлу: reflink, copy_file_range шматками, хеш під час копіювання, докопіювання"""
+    
+    STATE_INTERVAL = 2.0
+    PROGRESS_INTERVAL = 0.5
+    HASH_BUFFER = 8 * 1024 * 1024
+    FICLONE = 0x40049409  # ioctl Linux: клон усього файлу (btrfs, XFS, bcachefs)
+    
+    def __init__(self, chunk_size: int = None, limit_mbps: float = None, cancel: threading.Event = None,
+                 job_id: str = None):
+        self.chunk_size = chunk_size or Config.LARGE_COPY_CHUNK
+        self.limit = limit_mbps * 1024 * 1024 if limit_mbps else None
+        if self.limit:
+            # Дрібніші шматки - рівномірніше обмеження швидкості
+            self.chunk_size = min(self.chunk_size, max(1024 * 1024, int(self.limit / 4)))
+        self.cancel = cancel or threading.Event()
+        self.job_id = job_id
+    
+    @staticmethod
+    def parse_hash(checksum: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """'sha256' - лише порахувати, 'sha256:abc...' або hex - порахувати і звірити"""
+        if not checksum:
+            return None, None
+        if checksum.lower() in hashlib.algorithms_available:
+            return checksum.lower(), None
+        return RangeDownloader.parse_checksum(checksum)
+    
+    @staticmethod
+    def _identity(st: os.stat_result) -> Dict[str, int]:
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    
+    def _load_state(self, state_path: Path, part_path: Path, source: str, st: os.stat_result) -> int:
+        """Позиція попереднього запуску - лише якщо джерело не змінилося і .part не коротший"""
+        try:
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return 0
+        if state.get("source") != source or any(state.get(k) != v for k, v in self._identity(st).items()):
+            return 0
+        pos = state.get("pos", 0)
+        return pos if 0 < pos <= part_path.stat().st_size else 0
+    
+    @staticmethod
+    def _save_state(state_path: Path, state: Dict[str, Any]):
+        tmp = state_path.with_suffix(state_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(state), encoding='utf-8')
+        os.replace(tmp, state_path)
+    
+    def _reflink(self, infd: int, outfd: int) -> bool:
+        fcntl = optional_module("fcntl")
+        if fcntl is None:
+            return False
+        try:
+            fcntl.ioctl(outfd, self.FICLONE, infd)
+            return True
+        except OSError:
+            return False
+    
+    def _copy_chunk(self, infd: int, outfd: int, pos: int, count: int, method: str) -> Tuple[int, str]:
+        """Один шматок за явним зсувом; при відмові ядра - наступний спосіб"""
+        if method == "copy_file_range":
+            try:
+                copied = os.copy_file_range(infd, outfd, count, pos, pos)
+                if copied:
+                    return copied, method
+                # Частина ФС (procfs, FUSE, мережеві) повертає 0 до кінця файлу - копіюємо через буфер
+                method = "buffer"
+            except OSError as e:
+                if e.errno not in _ZERO_COPY_FALLBACK:
+                    raise
+                method = "sendfile" if hasattr(os, "sendfile") else "buffer"
+        if method == "sendfile":
+            try:
+                os.lseek(outfd, pos, os.SEEK_SET)
+                copied = os.sendfile(outfd, infd, pos, count)
+                if copied:
+                    return copied, method
+                method = "buffer"
+            except OSError as e:
+                if e.errno not in _ZERO_COPY_FALLBACK:
+                    raise
+                method = "buffer"
+        data = os.pread(infd, count, pos) if hasattr(os, "pread") else self._read_at(infd, pos, count)
+        return self._write_at(outfd, pos, data), method
+    
+    @staticmethod
+    def _read_at(fd: int, pos: int, count: int) -> bytes:
+        os.lseek(fd, pos, os.SEEK_SET)
+        return os.read(fd, count)
+    
+    @staticmethod
+    def _write_at(fd: int, pos: int, data) -> int:
+        os.lseek(fd, pos, os.SEEK_SET)
+        view, written = memoryview(data), 0
+        while written < len(view):
+            written += os.write(fd, view[written:])
+        return written
+    
+    def copy(self, source: str, destination: str, checksum: str = None) -> Dict[str, Any]:
+        """Скопіювати файл; прогрес публікується подіями copy.progress"""
+        started = time.perf_counter()
+        algorithm, expected = self.parse_hash(checksum)
+        source = os.path.abspath(source)
+        target = Path(destination)
+        if target.is_dir():
+            target = target / os.path.basename(source)
+        part_path = target.with_name(target.name + ".part")
+        state_path = target.with_name(target.name + ".part.json")
+        
+        st = os.stat(source)
+        size = st.st_size
+        pos = self._load_state(state_path, part_path, source, st) if part_path.exists() else 0
+        resumed = pos
+        state = dict(self._identity(st), source=source, pos=pos)
+        event = {"job_id": self.job_id, "source": source, "path": str(target), "size": size}
+        event_bus.publish("copy.started", dict(event, resumed_bytes=resumed))
+        
+        hasher = hashlib.new(algorithm) if algorithm else None
+        method = "copy_file_range" if hasattr(os, "copy_file_range") else \
+            "sendfile" if hasattr(os, "sendfile") else "buffer"
+        last_event = last_state = 0.0
+        
+        def report():
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            event_bus.publish("copy.progress", dict(
+                event, copied=pos, percent=round(pos / size * 100, 1) if size else 100.0,
+                speed_mbps=round((pos - resumed) / elapsed / 1024**2, 2), method=method
+            ))
+        
+        try:
+            with open(source, 'rb') as fsrc, open(part_path, 'r+b' if pos else 'wb') as fdst:
+                infd, outfd = fsrc.fileno(), fdst.fileno()
+                fdst.truncate(pos)
+                if hasher and pos:
+                    # Хеш уже скопійованої частини - одне читання лише при докопіюванні
+                    fdst.seek(0)
+                    for block in iter(lambda: fdst.read(self.HASH_BUFFER), b""):
+                        hasher.update(block)
+                if not pos and not hasher and size and self._reflink(infd, outfd):
+                    pos, method = size, "reflink"
+                buffer = bytearray(self.HASH_BUFFER) if hasher else None
+                while pos < size:
+                    if self.cancel.is_set():
+                        raise InterruptedError("Копіювання скасовано")
+                    count = min(self.chunk_size, size - pos)
+                    if hasher:
+                        # Байти проходять через пам'ять один раз: читаємо, хешуємо, пишемо
+                        method = "hash"
+                        view = memoryview(buffer)[:min(count, self.HASH_BUFFER)]
+                        if hasattr(os, "preadv"):
+                            n = os.preadv(infd, [view], pos)
+                        else:
+                            fsrc.seek(pos)
+                            n = fsrc.readinto(view)
+                        if n:
+                            hasher.update(view[:n])
+                            self._write_at(outfd, pos, view[:n])
+                    else:
+                        n, method = self._copy_chunk(infd, outfd, pos, count, method)
+                    if not n:
+                        raise IOError(f"Джерело скоротилося: {pos} з {size} байт")
+                    pos += n
+                    if self.limit:
+                        ahead = (pos - resumed) / self.limit - (time.perf_counter() - started)
+                        if ahead > 0:
+                            self.cancel.wait(ahead)
+                    now = time.time()
+                    if now - last_state >= self.STATE_INTERVAL:
+                        # Спершу дані на диск, потім позиція у файлі стану
+                        os.fsync(outfd)
+                        state["pos"] = pos
+                        self._save_state(state_path, state)
+                        last_state = now
+                    if now - last_event >= self.PROGRESS_INTERVAL:
+                        report()
+                        last_event = now
+                os.fsync(outfd)
+            report()
+        except Exception as e:
+            if pos and part_path.exists():
+                state["pos"] = min(pos, part_path.stat().st_size)
+                self._save_state(state_path, state)
+            cancelled = isinstance(e, InterruptedError)
+            event_bus.publish("copy.cancelled" if cancelled else "copy.failed",
+                              dict(event, copied=pos, error=str(e)))
+            raise
+        
+        digest = hasher.hexdigest() if hasher else None
+        if expected and digest != expected:
+            part_path.unlink()
+            state_path.unlink(missing_ok=True)
+            raise ValueError(f"Контрольна сума {algorithm} не збігається: {digest}")
+        
+        shutil.copystat(source, part_path)
+        os.replace(part_path, target)
+        state_path.unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+        result = {
+            "source": source,
+            "path": str(target),
+            "size": size,
+            "method": method,
+            "resumed_bytes": resumed,
+            "elapsed": round(elapsed, 2),
+            "speed_mbps": round((size - resumed) / max(elapsed, 1e-6) / 1024**2, 2),
+            "checksum": f"{algorithm}:{digest}" if digest else None,
+            "verified": bool(expected)
+        }
+        event_bus.publish("copy.finished", dict(result, job_id=self.job_id))
+        return result
 
-# ============================================================================
-# РОЗШИРЕНИЙ МЕНЕДЖЕР ФАЙЛОВОЇ СИСТЕМИ
-# ============================================================================
 
+@traced_methods("fs", exclude=("is_safe_path",))
 class AdvancedFileSystemManager:
     """Розширене керування файловою системою"""
     
     def __init__(self, db: AgentDatabase):
         self.db = db
+        self.copy_jobs: Dict[str, Dict[str, Any]] = {}
     
     @staticmethod
     def is_safe_path(path: str) -> bool:
@@ -577,6 +1775,10 @@ class AdvancedFileSystemManager:
             if not self.is_safe_path(source) or not self.is_safe_path(destination):
                 return {"success": False, "error": "❌ Доступ заборонено"}
             
+            if os.path.isfile(source) and os.path.getsize(source) >= Config.LARGE_COPY_THRESHOLD:
+                # Великий файл - фоновим завданням, щоб не блокувати консоль (стан: copy_jobs)
+                return self.copy_large_file(source, destination, background=True)
+            
             shutil.copy2(source, destination)
             self.db.add_context_memory("file_operation", f"Скопійовано: {source} -> {destination}")
             return {"success": True, "message": f"✅ Файл скопійовано: {destination}"}
@@ -616,6 +1818,312 @@ class AdvancedFileSystemManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def copy_large_file(self, source: str, destination: str, checksum: str = None, limit_mbps: float = None,
+                        background: bool = False) -> Dict[str, Any]:
+        """Копіювання великого файлу з прогресом, докопіюванням і перевіркою; background - окремим завданням"""
+        if not self.is_safe_path(source) or not self.is_safe_path(destination):
+            return {"success": False, "error": "❌ Доступ заборонено"}
+        if not os.path.isfile(source):
+            return {"success": False, "error": "❌ Файл не існує"}
+        try:
+            LargeFileCopier.parse_hash(checksum)
+        except ValueError as e:
+            return {"success": False, "error": f"❌ {e}"}
+        
+        job_id = uuid.uuid4().hex[:8]
+        cancel = threading.Event()
+        copier = LargeFileCopier(limit_mbps=limit_mbps, cancel=cancel, job_id=job_id if background else None)
+        job = self.copy_jobs[job_id] = {
+            "job_id": job_id, "source": source, "destination": destination, "status": "running",
+            "started": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "cancel": cancel, "result": None
+        }
+        
+        def run() -> Dict[str, Any]:
+            try:
+                res = copier.copy(source, destination, checksum)
+            except InterruptedError as e:
+                job["status"] = "cancelled"
+                job["result"] = {"success": False, "error": f"❌ {e} (повторний запуск продовжить з місця зупинки)"}
+                return job["result"]
+            except Exception as e:
+                job["status"] = "failed"
+                job["result"] = {"success": False, "error": f"❌ Помилка копіювання: {e}"}
+                return job["result"]
+            self.db.add_context_memory("file_operation", f"Скопійовано: {source} -> {res['path']}",
+                                       {"size": res["size"], "method": res["method"], "checksum": res["checksum"]})
+            message = f"✅ Файл скопійовано: {res['path']}"
+            if res["resumed_bytes"]:
+                message += f" (докопійовано з {res['resumed_bytes'] / 1024 / 1024:.2f} MB)"
+            if res["checksum"]:
+                message += f"\n🔐 {'Контрольна сума збігається' if res['verified'] else 'Контрольна сума'}: {res['checksum']}"
+            job["status"] = "finished"
+            job["result"] = dict(res, success=True, message=message)
+            return job["result"]
+        
+        if not background:
+            try:
+                return run()
+            finally:
+                self.copy_jobs.pop(job_id, None)
+        threading.Thread(target=run, name=f"copy-{job_id}", daemon=True).start()
+        return {"success": True, "job_id": job_id,
+                "message": f"⏳ Копіювання {job_id} запущено у фоні: {source} → {destination}\n"
+                           f"💡 copy_jobs - стан, copy_cancel {job_id} - зупинити"}
+    
+    def copy_jobs_status(self) -> Dict[str, Any]:
+        """Фонові копіювання; завершені прибираються після показу"""
+        jobs = [{k: v for k, v in job.items() if k != "cancel"} for job in self.copy_jobs.values()]
+        for job_id in [j["job_id"] for j in jobs if j["status"] != "running"]:
+            self.copy_jobs.pop(job_id, None)
+        return {"success": True, "jobs": jobs}
+    
+    def cancel_copy(self, job_id: str) -> Dict[str, Any]:
+        """Зупинити фонове копіювання; стан зберігається для докопіювання"""
+        job = self.copy_jobs.get(job_id)
+        if job is None or job["status"] != "running":
+            return {"success": False, "error": f"❌ Активне копіювання {job_id} не знайдено"}
+        job["cancel"].set()
+        return {"success": True, "message": f"⏹️ Копіювання {job_id} зупиняється"}
+    
+    BATCH_ACTIONS = {"copy": "Скопійовано", "move": "Переміщено", "delete": "Видалено"}
+    PROGRESS_INTERVAL = 0.5  # секунд між подіями fileop.progress
+    
+    @staticmethod
+    def expand_paths(patterns: List[str]) -> Tuple[List[str], List[str]]:
+        """Абсолютні шляхи за списком або glob-шаблонами (** - рекурсивно); другий список - шаблони без збігів"""
+        paths, missing, seen = [], [], set()
+        for pattern in patterns:
+            pattern = os.path.expanduser(pattern)
+            if any(ch in pattern for ch in "*?["):
+                matches = sorted(glob.glob(pattern, recursive=True))
+            else:
+                matches = [pattern] if os.path.lexists(pattern) else []
+            if not matches:
+                missing.append(pattern)
+            for match in matches:
+                path = os.path.abspath(match)
+                if path not in seen:
+                    seen.add(path)
+                    paths.append(path)
+        # dir і dir/** - одна операція над dir
+        return [p for p in paths if not any(str(parent) in seen for parent in Path(p).parents)], missing
+    
+    @staticmethod
+    def _free_name(target: str, claimed: set) -> str:
+        """Вільне ім'я у стилі 'файл (2).txt'"""
+        stem, ext = os.path.splitext(target)
+        n = 2
+        while os.path.lexists(f"{stem} ({n}){ext}") or f"{stem} ({n}){ext}" in claimed:
+            n += 1
+        return f"{stem} ({n}){ext}"
+    
+    def plan_file_batch(self, action: str, patterns: List[str], destination: str = None,
+                        conflict: str = None) -> Dict[str, Any]:
+        """План пакетної операції: усі конфлікти та заборонені шляхи з'ясовуються до першої зміни на диску"""
+        conflict = conflict or Config.FILE_BATCH_CONFLICT
+        sources, missing = self.expand_paths(patterns)
+        plan = {"ops": [], "dirs": [], "cleanup": [], "skipped": [],
+                "errors": [{"path": p, "error": "не знайдено"} for p in missing]}
+        claimed = set()
+        
+        if action == "delete":
+            for src in sources:
+                if not self.is_safe_path(src):
+                    plan["errors"].append({"path": src, "error": "доступ заборонено"})
+                else:
+                    size = os.lstat(src).st_size if not os.path.isdir(src) or os.path.islink(src) else 0
+                    plan["ops"].append({"action": "delete", "src": src, "dst": None, "size": size})
+            return plan
+        
+        dest = os.path.abspath(os.path.expanduser(destination))
+        into_dir = (os.path.isdir(dest) or len(patterns) > 1 or destination.endswith(("/", "\\"))
+                    or any(ch in p for p in patterns for ch in "*?["))
+        if not self.is_safe_path(dest):
+            plan["errors"].append({"path": dest, "error": "доступ заборонено"})
+            return plan
+        dest_dev = os.stat(next(p for p in [dest, *map(str, Path(dest).parents)] if os.path.exists(p))).st_dev
+        
+        def add_file(src: str, target: str, st: os.stat_result, kind: str):
+            if os.path.lexists(target) or target in claimed:
+                if conflict == "skip":
+                    plan["skipped"].append({"path": src, "target": target, "reason": "ціль існує"})
+                    return
+                if conflict == "rename":
+                    target = self._free_name(target, claimed)
+                elif target in claimed:
+                    plan["errors"].append({"path": src, "error": f"ще одне джерело має ту ж ціль {target}"})
+                    return
+                elif os.path.isdir(target) and not os.path.islink(target):
+                    plan["errors"].append({"path": src, "error": f"ціль є папкою: {target}"})
+                    return
+            claimed.add(target)
+            plan["ops"].append({"action": kind, "src": src, "dst": target, "size": st.st_size})
+        
+        for src in sources:
+            target = os.path.join(dest, os.path.basename(src)) if into_dir else dest
+            if not self.is_safe_path(src):
+                plan["errors"].append({"path": src, "error": "доступ заборонено"})
+                continue
+            if target == src or target.startswith(src.rstrip(os.sep) + os.sep):
+                plan["errors"].append({"path": src, "error": "ціль всередині джерела"})
+                continue
+            st = os.lstat(src)
+            same_device = action == "move" and st.st_dev == dest_dev
+            kind = "rename" if same_device else action
+            if not os.path.isdir(src) or os.path.islink(src):
+                add_file(src, target, st, kind)
+                continue
+            if same_device and not os.path.lexists(target) and target not in claimed:
+                # Уся папка - одне перейменування
+                claimed.add(target)
+                plan["ops"].append({"action": "rename", "src": src, "dst": target, "size": 0})
+                continue
+            # Інакше папка розгортається у файли, щоб конфлікти перевірялись і виконувались по одному
+            for root, dirnames, filenames in os.walk(src):
+                target_root = os.path.join(target, os.path.relpath(root, src))
+                plan["dirs"].append(os.path.normpath(target_root))
+                links = [d for d in dirnames if os.path.islink(os.path.join(root, d))]
+                for name in filenames + links:
+                    path = os.path.join(root, name)
+                    add_file(path, os.path.normpath(os.path.join(target_root, name)), os.lstat(path), kind)
+            if action == "move":
+                plan["cleanup"].append(src)
+        return plan
+    
+    @staticmethod
+    def _apply_file_op(op: Dict[str, Any]) -> str:
+        """Одна операція з плану; повертає спосіб виконання"""
+        src, dst = op["src"], op["dst"]
+        if op["action"] == "delete":
+            if os.path.isdir(src) and not os.path.islink(src):
+                shutil.rmtree(src)
+            else:
+                os.remove(src)
+            return "delete"
+        if op["action"] == "rename":
+            os.replace(src, dst)
+            return "rename"
+        if os.path.islink(src):
+            if os.path.lexists(dst):
+                os.remove(dst)
+            os.symlink(os.readlink(src), dst)
+            method = "symlink"
+        else:
+            method = zero_copy_file(src, dst)
+            shutil.copystat(src, dst)
+        if op["action"] == "move":
+            os.remove(src)
+        return method
+    
+    def batch_file_operation(self, action: str, patterns: List[str], destination: str = None,
+                             conflict: str = None, dry_run: bool = False, workers: int = None) -> Dict[str, Any]:
+        """Пакетне copy/move/delete за списком або glob-шаблонами: план, пул потоків, один запис у пам'ять"""
+        try:
+            if action not in self.BATCH_ACTIONS:
+                return {"success": False, "error": f"❌ Невідома дія: {action}"}
+            if action != "delete" and not destination:
+                return {"success": False, "error": "❌ Вкажіть призначення"}
+            if (conflict or Config.FILE_BATCH_CONFLICT) not in ("skip", "overwrite", "rename"):
+                return {"success": False, "error": "❌ Конфлікти: skip, overwrite або rename"}
+            
+            started = time.perf_counter()
+            plan = self.plan_file_batch(action, patterns, destination, conflict)
+            ops = plan["ops"]
+            operation_id = uuid.uuid4().hex[:12]
+            total_bytes = sum(op["size"] for op in ops)
+            result = {
+                "success": not plan["errors"],
+                "operation_id": operation_id,
+                "action": action,
+                "dry_run": dry_run,
+                "planned": len(ops),
+                "done": 0,
+                "bytes": total_bytes,
+                "skipped": plan["skipped"],
+                "errors": plan["errors"],
+                "methods": {}
+            }
+            if dry_run or not ops:
+                result["operations"] = ops
+                if not ops and not (plan["skipped"] and not plan["errors"]):
+                    result["error"] = "❌ Немає що виконувати" + (f" (помилок: {len(plan['errors'])})" if plan["errors"] else "")
+                return result
+            
+            for directory in plan["dirs"]:
+                os.makedirs(directory, exist_ok=True)
+            if action != "delete":
+                for parent in {os.path.dirname(op["dst"]) for op in ops}:
+                    os.makedirs(parent, exist_ok=True)
+            
+            lock = threading.Lock()
+            progress = {"done": 0, "bytes": 0, "last_event": 0.0}
+            methods = defaultdict(int)
+            event_bus.publish("fileop.started", {"operation_id": operation_id, "action": action,
+                                                 "total": len(ops), "total_bytes": total_bytes})
+            
+            def run(op: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                try:
+                    method, failure = self._apply_file_op(op), None
+                except Exception as e:
+                    method, failure = None, {"path": op["src"], "error": str(e)}
+                with lock:
+                    progress["done"] += 1
+                    progress["bytes"] += op["size"]
+                    if method:
+                        methods[method] += 1
+                    now = time.time()
+                    if now - progress["last_event"] < self.PROGRESS_INTERVAL and progress["done"] < len(ops):
+                        return failure
+                    progress["last_event"] = now
+                    done, copied = progress["done"], progress["bytes"]
+                elapsed = max(time.perf_counter() - started, 1e-6)
+                event_bus.publish("fileop.progress", {
+                    "operation_id": operation_id,
+                    "action": action,
+                    "done": done,
+                    "total": len(ops),
+                    "percent": round(done / len(ops) * 100, 1),
+                    "bytes": copied,
+                    "speed_mbps": round(copied / elapsed / 1024**2, 2)
+                })
+                return failure
+            
+            workers = max(1, min(workers or Config.FILE_BATCH_WORKERS, len(ops)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fileop") as pool:
+                failures = [f for f in pool.map(run, ops) if f]
+            
+            # Папки, розгорнуті при переміщенні, прибираємо знизу вгору - лише порожні
+            for src in plan["cleanup"]:
+                for root, _, _ in sorted(os.walk(src), key=lambda entry: -len(entry[0])):
+                    try:
+                        os.rmdir(root)
+                    except OSError:
+                        pass
+            
+            elapsed = time.perf_counter() - started
+            result["errors"] = plan["errors"] + failures
+            result.update(
+                success=not result["errors"],
+                done=len(ops) - len(failures),
+                methods=dict(methods),
+                workers=workers,
+                elapsed=round(elapsed, 2),
+                speed_mbps=round(total_bytes / max(elapsed, 1e-6) / 1024**2, 2)
+            )
+            summary = (f"{self.BATCH_ACTIONS[action]} {result['done']}/{len(ops)} "
+                       f"({' '.join(patterns)}{' -> ' + destination if destination else ''}); "
+                       f"пропущено {len(plan['skipped'])}, помилок {len(result['errors'])}")
+            self.db.add_context_memory("file_operation", summary, {
+                "operation_id": operation_id, "action": action, "bytes": total_bytes, "methods": dict(methods)
+            }, importance=7 if action == "delete" else 5)
+            event_bus.publish("fileop.finished", {k: v for k, v in result.items() if k != "skipped"})
+            if result["errors"]:
+                result["error"] = f"❌ Помилок: {len(result['errors'])}"
+            return result
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def create_folder(self, path: str) -> Dict[str, Any]:
         """Створення папки"""
         try:
@@ -917,6 +2425,7 @@ class AdvancedFileSystemManager:
 # РОЗШИРЕНИЙ МЕНЕДЖЕР ПРОГРАМ
 # ============================================================================
 
+@traced_methods("apps")
 class AdvancedApplicationManager:
     """Розширене керування програмами"""
     
@@ -972,56 +2481,188 @@ class AdvancedApplicationManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def close_program(self, process_name: str) -> Dict[str, Any]:
-        """Закриття програми за назвою процесу"""
+    def close_program(self, process_name: str, tree: bool = False) -> Dict[str, Any]:
+        """Закриття програми за назвою процесу (усі збіги, з ескалацією до kill)"""
+        res = self.terminate_processes(process_name, tree=tree, action="program_close")
+        if res.get("success"):
+            res["terminated"] = [
+                f"{o['name']} (PID: {o['pid']})" for o in res["processes"] if o["outcome"] in ("terminated", "killed")
+            ]
+        return res
+    
+    def select_processes(self, selector: str, tree: bool = False) -> List[Dict[str, Any]]:
+        """Вибір процесів: PID, частина назви, 're:шаблон' або 'user:ім'я'; tree - разом з нащадками"""
+        snapshot = process_snapshots.get(max_age=0.5)
+        if selector.isdigit():
+            matches = [r for r in (snapshot.find(int(selector)),) if r]
+            if not matches:
+                # Знімок буває старим до ~0.5 с - щойно запущений PID шукаємо напряму
+                return self._select_live(int(selector), tree, snapshot)
+        elif selector.startswith("re:"):
+            pattern = re.compile(selector[3:], re.IGNORECASE)
+            matches = [r for name, records in snapshot.by_name.items() if pattern.search(name) for r in records]
+        elif selector.startswith("user:"):
+            user = selector[5:].lower()
+            # На Windows ім'я має вигляд DOMAIN\user
+            matches = [
+                r for r in snapshot.records
+                if r['username'] and user in (r['username'].lower(), r['username'].lower().rsplit('\\', 1)[-1])
+            ]
+        else:
+            matches = snapshot.find_by_name(selector)
+        
+        pids: List[int] = []
+        seen = set()
+        for record in matches:
+            for pid in [record['pid']] + (snapshot.descendants(record['pid']) if tree else []):
+                if pid not in seen:
+                    seen.add(pid)
+                    pids.append(pid)
+        
+        # Ніколи не чіпаємо себе, свій ланцюжок батьків і системні PID
+        protected = {os.getpid(), *snapshot.ancestors(os.getpid())}
+        # Нащадки йдуть після батьків - завершуємо у зворотному порядку, щоб батьки не перезапускали дітей
+        return [snapshot.by_pid[pid] for pid in reversed(pids) if pid not in protected and pid > 4]
+    
+    @staticmethod
+    def _select_live(pid: int, tree: bool, snapshot: "ProcessSnapshot") -> List[Dict[str, Any]]:
+        """Процес (і нащадки), якого ще немає у знімку - напряму через psutil"""
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + (root.children(recursive=True) if tree else [])
+        except psutil.NoSuchProcess:
+            return []
+        protected = {os.getpid(), *snapshot.ancestors(os.getpid())}
+        records = []
+        for proc in reversed(procs):
+            if proc.pid in protected or proc.pid <= 4:
+                continue
+            try:
+                info = proc.as_dict(attrs=['name', 'status'], ad_value=None)
+            except psutil.NoSuchProcess:
+                continue
+            records.append({"pid": proc.pid, "name": info['name'] or "", "status": info['status']})
+        return records
+    
+    def terminate_processes(self, selector: str, tree: bool = False, force: bool = False,
+                            timeout: float = 3.0, action: str = "process_terminate") -> Dict[str, Any]:
+        """Масове завершення: сигнал усім одразу, спільне wait_procs, потім kill для тих, хто вижив"""
         try:
-            terminated = []
-            for proc in psutil.process_iter(['name', 'pid']):
-                name = proc.info['name'] or ""
-                if process_name.lower() in name.lower():
-                    try:
+            started = time.perf_counter()
+            records = self.select_processes(selector, tree)
+            if not records:
+                return {"success": False, "error": "❌ Процес не знайдено"}
+            
+            outcomes: Dict[int, Dict[str, Any]] = {}
+            pending: List[psutil.Process] = []
+            for record in records:
+                entry = outcomes[record['pid']] = {
+                    "pid": record['pid'], "name": record['name'], "outcome": None,
+                    "signal": None, "returncode": None, "error": None
+                }
+                if record['status'] == psutil.STATUS_ZOMBIE:
+                    # Зомбі вже завершився - його має забрати батьківський процес
+                    entry["outcome"] = "zombie"
+                    continue
+                try:
+                    proc = process_snapshots.process(record['pid'])
+                    if force:
+                        proc.kill()
+                    else:
                         proc.terminate()
-                        terminated.append(f"{name} (PID: {proc.info['pid']})")
-                    except Exception:
-                        pass
+                        if record['status'] == psutil.STATUS_STOPPED:
+                            # Зупинений процес не обробить SIGTERM, доки його не продовжити
+                            proc.resume()
+                    entry["signal"] = "kill" if force else "terminate"
+                    pending.append(proc)
+                except psutil.NoSuchProcess:
+                    entry["outcome"] = "already_gone"
+                except psutil.AccessDenied as e:
+                    entry.update(outcome="access_denied", error=str(e) or "AccessDenied")
             
-            if terminated:
-                self.db.add_context_memory("program_close", f"Закрито: {', '.join(terminated)}", importance=7)
-                return {"success": True, "terminated": terminated, "count": len(terminated)}
-            else:
-                return {"success": False, "error": "❌ Процес не знайдено"}
-                
+            gone, alive = psutil.wait_procs(pending, timeout=timeout)
+            for proc in gone:
+                outcomes[proc.pid].update(outcome="killed" if force else "terminated", returncode=proc.returncode)
+            
+            if alive and not force:
+                escalated = []
+                for proc in alive:
+                    try:
+                        proc.kill()
+                        outcomes[proc.pid]["signal"] = "kill"
+                        escalated.append(proc)
+                    except psutil.NoSuchProcess:
+                        outcomes[proc.pid]["outcome"] = "terminated"
+                    except psutil.AccessDenied as e:
+                        outcomes[proc.pid].update(outcome="access_denied", error=str(e) or "AccessDenied")
+                gone, alive = psutil.wait_procs(escalated, timeout=timeout)
+                for proc in gone:
+                    outcomes[proc.pid].update(outcome="killed", returncode=proc.returncode)
+            for proc in alive:
+                outcomes[proc.pid].update(outcome="alive", error="Процес не завершився")
+            
+            report = list(outcomes.values())
+            counts = defaultdict(int)
+            for entry in report:
+                counts[entry["outcome"]] += 1
+            operation_id = uuid.uuid4().hex[:12]
+            
+            summary = f"{action} '{selector}': " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+            self.db.log_process_actions(operation_id, action, selector, report, summary)
+            
+            done = sum(counts.get(k, 0) for k in ("terminated", "killed", "already_gone"))
+            result = {
+                "success": done > 0,
+                "operation_id": operation_id,
+                "selector": selector,
+                "matched": len(report),
+                "counts": dict(counts),
+                "elapsed": round(time.perf_counter() - started, 2),
+                "processes": report
+            }
+            if not result["success"]:
+                result["error"] = f"❌ Не вдалося завершити жоден процес ({summary})"
+            return result
+            
+        except re.error as e:
+            return {"success": False, "error": f"❌ Некоректний шаблон: {e}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def process_info(self, identifier: str) -> Dict[str, Any]:
         """Інформація про процес (за PID або назвою)"""
         try:
-            proc = None
+            snapshot = process_snapshots.get()
             try:
-                pid = int(identifier)
-                proc = psutil.Process(pid)
+                record = snapshot.find(int(identifier))
             except ValueError:
-                for p in psutil.process_iter(['name', 'pid']):
-                    name = p.info['name'] or ""
-                    if identifier.lower() in name.lower():
-                        proc = psutil.Process(p.info['pid'])
-                        break
+                matches = snapshot.find_by_name(identifier)
+                record = matches[0] if matches else None
             
-            if proc is None:
+            if record is None:
                 return {"success": False, "error": "❌ Процес не знайдено"}
             
+            proc = process_snapshots.process(record['pid'])
             info = {
-                "name": proc.name(),
-                "pid": proc.pid,
-                "status": proc.status(),
-                "cpu_percent": f"{proc.cpu_percent(interval=0.1)}%",
-                "memory_mb": f"{proc.memory_info().rss / 1024 / 1024:.2f} MB",
-                "memory_percent": f"{proc.memory_percent():.2f}%",
-                "num_threads": proc.num_threads(),
-                "create_time": datetime.fromtimestamp(proc.create_time()).strftime('%Y-%m-%d %H:%M:%S')
+                "name": record['name'],
+                "pid": record['pid'],
+                "status": record['status'],
+                "cpu_percent": f"{record['cpu'] or 0.0}%",
+                "memory_mb": f"{record['rss'] / 1024 / 1024:.2f} MB",
+                "memory_percent": f"{record['memory'] or 0.0:.2f}%",
+                "num_threads": record['threads'],
+                "create_time": datetime.fromtimestamp(record['create_time']).strftime('%Y-%m-%d %H:%M:%S') if record['create_time'] else None
             }
             
+            parent = snapshot.find(record['ppid']) if record['ppid'] else None
+            if parent:
+                info["parent"] = f"{parent['name']} (PID: {parent['pid']})"
+            info["children"] = len(snapshot.children.get(record['pid'], ()))
+            # Історія з трекера (якщо процес уже спостерігався) - без додаткових пауз
+            history = process_tracker.summary(record['pid'])
+            if history:
+                info["history"] = history
+            
             try:
                 info["exe"] = proc.exe()
                 info["cwd"] = proc.cwd()
@@ -1033,69 +2674,807 @@ class AdvancedApplicationManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def kill_process(self, pid: int) -> Dict[str, Any]:
-        """Примусове завершення процесу за PID"""
+    def process_tree(self, identifier: str) -> Dict[str, Any]:
+        """Дерево процесу (за PID або назвою) з сумарним CPU/RAM піддерева"""
         try:
-            proc = psutil.Process(pid)
-            name = proc.name()
-            proc.kill()
-            self.db.add_context_memory("process_kill", f"Вбито процес: {name} (PID: {pid})", importance=8)
-            return {"success": True, "message": f"✅ Процес {name} (PID: {pid}) примусово завершено"}
+            snapshot = process_snapshots.get()
+            try:
+                roots = [int(identifier)]
+            except ValueError:
+                matches = snapshot.find_by_name(identifier)
+                names = {r['pid'] for r in matches}
+                # Лише верхні процеси групи: дочірні й так увійдуть у дерево
+                roots = [r['pid'] for r in matches if r['ppid'] not in names]
+            
+            trees = [tree for tree in (snapshot.tree(pid) for pid in roots) if tree]
+            if not trees:
+                return {"success": False, "error": "❌ Процес не знайдено"}
+            return {"success": True, "trees": trees}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    def kill_process(self, pid: int, tree: bool = False) -> Dict[str, Any]:
+        """Примусове завершення процесу за PID (tree - разом з усіма нащадками)"""
+        res = self.terminate_processes(str(pid), tree=tree, force=True, action="process_kill")
+        if res.get("success"):
+            root = next((o for o in res["processes"] if o["pid"] == pid), None)
+            name = root["name"] if root else pid
+            extra = f" і {res['matched'] - 1} дочірніх" if res["matched"] > 1 else ""
+            res["message"] = f"✅ Процес {name} (PID: {pid}){extra} примусово завершено"
+        return res
 
 # ============================================================================
-# РОЗШИРЕНИЙ СИСТЕМНИЙ МОНІТОР
+# СПІЛЬНИЙ ЗБІР СИСТЕМНИХ ПОКАЗНИКІВ
 # ============================================================================
 
-class AdvancedSystemMonitor:
-    """Розширений моніторинг системи"""
+class SystemSampler:
+    """Неблокуючий збір CPU/RAM/диску/мережі: CPU рахується як дельта між викликами"""
     
-    def get_system_info(self) -> Dict[str, Any]:
-        """Повна системна інформація"""
-        try:
-            cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
+    def __init__(self, disk_path: str = None):
+        self.disk_path = disk_path or ('C:\\' if platform.system() == "Windows" else '/')
+        self.latest: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._primed = False
+        self._last_net = None
+    
+    def sample(self) -> Dict[str, Any]:
+        """Зняти новий зріз (мікросекунди, крім першого виклику)"""
+        with self._lock:
+            if self._primed:
+                per_cpu = psutil.cpu_percent(interval=None, percpu=True)
+            else:
+                # Перший виклик cpu_percent(None) завжди 0.0 - один раз міряємо з коротким інтервалом
+                per_cpu = psutil.cpu_percent(interval=0.1, percpu=True)
+                self._primed = True
+            
+            now = time.time()
             memory = psutil.virtual_memory()
             swap = psutil.swap_memory()
-            disk = psutil.disk_usage('/')
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
+            disk = psutil.disk_usage(self.disk_path)
+            net = psutil.net_io_counters()
             
-            info = {
-                "system": {
-                    "platform": platform.system(),
-                    "release": platform.release(),
-                    "version": platform.version(),
-                    "machine": platform.machine(),
-                    "processor": platform.processor(),
-                    "boot_time": boot_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    "uptime": str(datetime.now() - boot_time).split('.')[0]
-                },
-                "cpu": {
-                    "physical_cores": psutil.cpu_count(logical=False),
-                    "total_cores": psutil.cpu_count(logical=True),
-                    "max_frequency": f"{psutil.cpu_freq().max:.2f} MHz" if psutil.cpu_freq() else "N/A",
-                    "current_frequency": f"{psutil.cpu_freq().current:.2f} MHz" if psutil.cpu_freq() else "N/A",
-                    "cpu_usage_per_core": [f"{x}%" for x in cpu_percent],
-                    "total_cpu_usage": f"{sum(cpu_percent) / len(cpu_percent):.2f}%"
-                },
-                "memory": {
-                    "total": f"{memory.total / 1024**3:.2f} GB",
-                    "available": f"{memory.available / 1024**3:.2f} GB",
-                    "used": f"{memory.used / 1024**3:.2f} GB",
-                    "percentage": f"{memory.percent}%",
-                    "swap_total": f"{swap.total / 1024**3:.2f} GB",
-                    "swap_used": f"{swap.used / 1024**3:.2f} GB",
-                    "swap_percentage": f"{swap.percent}%"
-                },
-                "disk": {
-                    "total": f"{disk.total / 1024**3:.2f} GB",
-                    "used": f"{disk.used / 1024**3:.2f} GB",
-                    "free": f"{disk.free / 1024**3:.2f} GB",
-                    "percentage": f"{disk.percent}%"
-                }
+            sent_rate = recv_rate = 0.0
+            if self._last_net is not None:
+                last_time, last_sent, last_recv = self._last_net
+                elapsed = max(now - last_time, 1e-6)
+                sent_rate = max(net.bytes_sent - last_sent, 0) / elapsed
+                recv_rate = max(net.bytes_recv - last_recv, 0) / elapsed
+            self._last_net = (now, net.bytes_sent, net.bytes_recv)
+            
+            snapshot = {
+                "ts": now,
+                "timestamp": datetime.fromtimestamp(now).isoformat(),
+                "cpu": round(sum(per_cpu) / len(per_cpu), 1) if per_cpu else 0.0,
+                "per_cpu": per_cpu,
+                "memory": memory.percent,
+                "memory_total": memory.total,
+                "memory_used": memory.used,
+                "memory_available": memory.available,
+                "swap": swap.percent,
+                "swap_total": swap.total,
+                "swap_used": swap.used,
+                "disk": disk.percent,
+                "disk_total": disk.total,
+                "disk_used": disk.used,
+                "disk_free": disk.free,
+                "net_sent": net.bytes_sent,
+                "net_recv": net.bytes_recv,
+                "net_sent_rate": sent_rate,
+                "net_recv_rate": recv_rate
+            }
+            self.latest = snapshot
+            return snapshot
+    
+    def get_latest(self, max_age: float = None) -> Dict[str, Any]:
+        """Останній зріз, або новий, якщо він старший за max_age секунд"""
+        max_age = Config.SYSTEM_SAMPLE_INTERVAL if max_age is None else max_age
+        latest = self.latest
+        if latest is None or time.time() - latest["ts"] > max_age:
+            return self.sample()
+        return latest
+
+
+system_sampler = SystemSampler()
+
+
+def _format_gb(value: float) -> str:
+    return f"{value / 1024**3:.2f} GB"
+
+
+def _format_percent(value: float) -> str:
+    return f"{value}%"
+
+
+class SystemInventory:
+    """Статичний інвентар системи (рахується один раз) + динамічні лічильники зі спільного семплера"""
+
+    FREQ_TTL = 5.0
+    _MISSING = object()
+
+    def __init__(self, sampler: SystemSampler):
+        self.sampler = sampler
+        self._static: Optional[Dict[str, Any]] = None
+        self._freq: Optional[float] = None
+        self._freq_at = 0.0
+        # Кеш відформатованих розділів і сирих значень, з яких їх отримано
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        self._raw: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def static(self) -> Dict[str, Any]:
+        """Платформа, ядра, межі частоти, час завантаження - не змінюються до перезапуску"""
+        if self._static is None:
+            freq = psutil.cpu_freq()
+            self._static = {
+                "platform": platform.system(),
+                "release": platform.release(),
+                "version": platform.version(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "hostname": platform.node(),
+                "boot_time": psutil.boot_time(),
+                "physical_cores": psutil.cpu_count(logical=False),
+                "total_cores": psutil.cpu_count(logical=True),
+                "min_frequency": freq.min if freq else None,
+                "max_frequency": freq.max if freq else None
             }
+            self._freq = freq.current if freq else None
+            self._freq_at = time.time()
+        return self._static
+
+    def cpu_frequency(self) -> Optional[float]:
+        """Поточна частота CPU (кешується на FREQ_TTL секунд - читання частоти не безкоштовне)"""
+        static = self.static
+        if static["max_frequency"] is not None and time.time() - self._freq_at > self.FREQ_TTL:
+            freq = psutil.cpu_freq()
+            self._freq = freq.current if freq else None
+            self._freq_at = time.time()
+        return self._freq
+
+    def section(self, name: str) -> Dict[str, Any]:
+        """Розділ system/cpu/memory/disk; переформатовуються лише поля, що змінилися"""
+        fields = getattr(self, f"_{name}_fields")(self.static, self.sampler.get_latest())
+        with self._lock:
+            cached = self._sections.setdefault(name, {})
+            last = self._raw.setdefault(name, {})
+            for field, (value, formatter) in fields.items():
+                if last.get(field, self._MISSING) != value:
+                    last[field] = value
+                    cached[field] = formatter(value) if formatter else value
+            return dict(cached)
+
+    def _system_fields(self, static: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, tuple]:
+        boot = static["boot_time"]
+        return {
+            "platform": (static["platform"], None),
+            "release": (static["release"], None),
+            "version": (static["version"], None),
+            "machine": (static["machine"], None),
+            "processor": (static["processor"], None),
+            "boot_time": (boot, lambda v: datetime.fromtimestamp(v).strftime('%Y-%m-%d %H:%M:%S')),
+            "uptime": (int(stats["ts"] - boot), lambda v: str(timedelta(seconds=v)))
+        }
+
+    def _cpu_fields(self, static: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, tuple]:
+        return {
+            "physical_cores": (static["physical_cores"], None),
+            "total_cores": (static["total_cores"], None),
+            "max_frequency": (static["max_frequency"], lambda v: f"{v:.2f} MHz" if v else "N/A"),
+            "current_frequency": (self.cpu_frequency(), lambda v: f"{v:.2f} MHz" if v else "N/A"),
+            "cpu_usage_per_core": (tuple(stats["per_cpu"]), lambda v: [f"{x}%" for x in v]),
+            "total_cpu_usage": (stats["cpu"], lambda v: f"{v:.2f}%")
+        }
+
+    def _memory_fields(self, static: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, tuple]:
+        return {
+            "total": (stats["memory_total"], _format_gb),
+            "available": (stats["memory_available"], _format_gb),
+            "used": (stats["memory_used"], _format_gb),
+            "percentage": (stats["memory"], _format_percent),
+            "swap_total": (stats["swap_total"], _format_gb),
+            "swap_used": (stats["swap_used"], _format_gb),
+            "swap_percentage": (stats["swap"], _format_percent)
+        }
+
+    def _disk_fields(self, static: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, tuple]:
+        return {
+            "total": (stats["disk_total"], _format_gb),
+            "used": (stats["disk_used"], _format_gb),
+            "free": (stats["disk_free"], _format_gb),
+            "percentage": (stats["disk"], _format_percent)
+        }
+
+
+system_inventory = SystemInventory(system_sampler)
+
+
+class ProcessSnapshot:
+    """Незмінний знімок таблиці процесів з індексами за PID та назвою"""
+
+    def __init__(self, records: List[Dict[str, Any]], taken_at: float):
+        self.records = records
+        self.taken_at = taken_at
+        self.by_pid: Dict[int, Dict[str, Any]] = {}
+        self.by_name: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._children: Optional[Dict[int, List[int]]] = None
+        for record in records:
+            self.by_pid[record["pid"]] = record
+            self.by_name[(record["name"] or "").lower()].append(record)
+
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    def find(self, pid: int) -> Optional[Dict[str, Any]]:
+        return self.by_pid.get(pid)
+
+    def find_by_name(self, name: str, exact: bool = False) -> List[Dict[str, Any]]:
+        """Пошук за назвою: точний - O(1), підрядок - лише по унікальних назвах"""
+        needle = name.lower()
+        if exact or needle in self.by_name:
+            matches = list(self.by_name.get(needle, ()))
+            if exact:
+                return matches
+        else:
+            matches = []
+        for key, records in self.by_name.items():
+            if key != needle and needle in key:
+                matches.extend(records)
+        return matches
+
+    def top(self, sort_by: str = "cpu", limit: int = 20) -> List[Dict[str, Any]]:
+        key = sort_by if sort_by in ("cpu", "memory", "rss", "threads") else "cpu"
+        return sorted(self.records, key=lambda r: r[key] or 0, reverse=True)[:limit]
+
+    @property
+    def children(self) -> Dict[int, List[int]]:
+        """Індекс PPID -> дочірні PID (будується при першому зверненні)"""
+        if self._children is None:
+            children = defaultdict(list)
+            for record in self.records:
+                if record["ppid"] is not None and record["ppid"] != record["pid"]:
+                    children[record["ppid"]].append(record["pid"])
+            self._children = children
+        return self._children
+
+    def descendants(self, pid: int) -> List[int]:
+        """Усі нащадки процесу (в ширину, без самого pid)"""
+        result, queue, seen = [], deque(self.children.get(pid, ())), {pid}
+        while queue:
+            child = queue.popleft()
+            if child in seen:
+                continue
+            seen.add(child)
+            result.append(child)
+            queue.extend(self.children.get(child, ()))
+        return result
+
+    def ancestors(self, pid: int) -> List[int]:
+        """Ланцюжок батьківських процесів від найближчого"""
+        result, seen = [], {pid}
+        record = self.by_pid.get(pid)
+        while record is not None and record["ppid"] not in seen and record["ppid"] in self.by_pid:
+            seen.add(record["ppid"])
+            result.append(record["ppid"])
+            record = self.by_pid[record["ppid"]]
+        return result
+
+    def tree(self, pid: int, max_depth: int = 10) -> Optional[Dict[str, Any]]:
+        """Дерево процесу з сумарними CPU/RSS піддерева"""
+        record = self.by_pid.get(pid)
+        if record is None:
+            return None
+        children = [
+            self.tree(child, max_depth - 1) for child in self.children.get(pid, ())
+        ] if max_depth > 0 else []
+        children = [child for child in children if child is not None]
+        return {
+            "pid": pid,
+            "name": record["name"],
+            "status": record["status"],
+            "cpu": record["cpu"] or 0.0,
+            "rss": record["rss"],
+            "total_cpu": round((record["cpu"] or 0.0) + sum(c["total_cpu"] for c in children), 1),
+            "total_rss": record["rss"] + sum(c["total_rss"] for c in children),
+            "children": children
+        }
+
+    def by_application(self, sort_by: str = "cpu", limit: int = 20) -> List[Dict[str, Any]]:
+        """Сумарне споживання за назвою програми (усі її процеси разом)"""
+        apps = []
+        for name, records in self.by_name.items():
+            apps.append({
+                "name": records[0]["name"],
+                "processes": len(records),
+                "cpu": round(sum(r["cpu"] or 0.0 for r in records), 1),
+                "memory": round(sum(r["memory"] or 0.0 for r in records), 2),
+                "rss": sum(r["rss"] for r in records),
+                "threads": sum(r["threads"] or 0 for r in records)
+            })
+        key = sort_by if sort_by in ("cpu", "memory", "rss", "threads", "processes") else "cpu"
+        return sorted(apps, key=lambda app: app[key], reverse=True)[:limit]
+
+
+class ProcessSnapshotService:
+    """Спільна таблиця процесів: постійні об'єкти Process між оновленнями дають реальні дельти CPU"""
+
+    ATTRS = ['ppid', 'name', 'status', 'num_threads', 'memory_info', 'memory_percent', 'create_time',
+             'username', 'io_counters']
+
+    def __init__(self, min_interval: float = 1.0, prime_interval: float = 0.1):
+        self.min_interval = min_interval
+        self.prime_interval = prime_interval
+        self._procs: Dict[int, psutil.Process] = {}
+        self._created: Dict[int, float] = {}
+        self._snapshot: Optional[ProcessSnapshot] = None
+        self._listeners: List[Callable[[ProcessSnapshot], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[ProcessSnapshot], None]):
+        """Викликається з кожним новим знімком (наприклад, для історії процесів)"""
+        self._listeners.append(callback)
+
+    def get(self, max_age: float = None) -> ProcessSnapshot:
+        """Знімок не старший за max_age (за замовчуванням min_interval) секунд"""
+        max_age = self.min_interval if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age() <= max_age:
+            return snapshot
+        with self._lock:
+            # Поки ми чекали на блокування, інший потік міг уже оновити знімок
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age() <= max_age:
+                return snapshot
+            return self._refresh()
+
+    def refresh(self) -> ProcessSnapshot:
+        """Примусове оновлення"""
+        with self._lock:
+            return self._refresh()
+
+    def process(self, pid: int) -> "psutil.Process":
+        """Постійний об'єкт Process для дій (terminate/kill/деталі)"""
+        proc = self._procs.get(pid)
+        if proc is None or not proc.is_running():
+            proc = psutil.Process(pid)
+        return proc
+
+    def _refresh(self) -> ProcessSnapshot:
+        pids = set(psutil.pids())
+        for pid in list(self._procs):
+            if pid not in pids:
+                del self._procs[pid]
+                self._created.pop(pid, None)
+
+        first_run = not self._procs
+        for pid in pids:
+            if pid not in self._procs:
+                self._track(pid)
+        if first_run:
+            # Перший виклик cpu_percent(None) для кожного процесу - 0.0; один раз чекаємо коротку дельту
+            time.sleep(self.prime_interval)
+
+        records = []
+        for pid, proc in list(self._procs.items()):
+            try:
+                with proc.oneshot():
+                    info = proc.as_dict(attrs=self.ATTRS, ad_value=None)
+                    created = self._created.get(pid)
+                    if created is not None and info['create_time'] not in (None, created):
+                        # PID перевикористано іншим процесом - починаємо відлік заново
+                        if not self._track(pid):
+                            continue
+                        proc = self._procs[pid]
+                        info = proc.as_dict(attrs=self.ATTRS, ad_value=None)
+                    cpu = proc.cpu_percent(interval=None)
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                cpu = None
+            except psutil.NoSuchProcess:
+                self._procs.pop(pid, None)
+                self._created.pop(pid, None)
+                continue
+
+            memory_info = info['memory_info']
+            io = info['io_counters']
+            records.append({
+                "pid": pid,
+                "ppid": info['ppid'],
+                "name": info['name'] or "",
+                "status": info['status'],
+                "cpu": cpu,
+                "memory": round(info['memory_percent'], 2) if info['memory_percent'] is not None else 0.0,
+                "rss": memory_info.rss if memory_info else 0,
+                "threads": info['num_threads'],
+                "username": info['username'],
+                "create_time": info['create_time'],
+                "read_bytes": io.read_bytes if io else 0,
+                "write_bytes": io.write_bytes if io else 0
+            })
+
+        self._snapshot = ProcessSnapshot(records, time.time())
+        for callback in self._listeners:
+            try:
+                callback(self._snapshot)
+            except Exception as e:
+                logging.error(f"Помилка обробника знімка процесів: {e}")
+        return self._snapshot
+
+    def _track(self, pid: int) -> bool:
+        self._procs.pop(pid, None)
+        self._created.pop(pid, None)
+        try:
+            proc = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return False
+        try:
+            self._created[pid] = proc.create_time()
+            proc.cpu_percent(interval=None)
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+        except psutil.NoSuchProcess:
+            return False
+        self._procs[pid] = proc
+        return True
+
+
+process_snapshots = ProcessSnapshotService()
+
+
+class ProcessTracker:
+    """Ковзна історія ресурсів кожного PID у компактних масивах (наповнюється зі знімків)"""
+
+    COLUMNS = ("ts", "cpu", "rss", "read_bytes", "write_bytes", "threads", "state")
+    TYPECODES = ("d", "f", "Q", "Q", "Q", "I", "B")
+    STATES = ("unknown", "running", "sleeping", "disk-sleep", "stopped", "tracing-stop", "zombie",
+              "dead", "wake-kill", "waking", "idle", "locked", "waiting", "suspended", "parked")
+    # Стани, у яких нульовий CPU - норма, а не зависання
+    IDLE_STATES = ("sleeping", "disk-sleep", "idle", "waiting", "parked")
+
+    def __init__(self, service: ProcessSnapshotService, capacity: int = 120):
+        self.service = service
+        self.capacity = capacity
+        self.histories: Dict[int, MetricRingBuffer] = {}
+        self._created: Dict[int, float] = {}
+        self._state_codes = {state: code for code, state in enumerate(self.STATES)}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        service.add_listener(self._on_snapshot)
+
+    def _on_snapshot(self, snapshot: ProcessSnapshot):
+        with self._lock:
+            for record in snapshot.records:
+                pid = record["pid"]
+                history = self.histories.get(pid)
+                if history is None or self._created.get(pid) != record["create_time"]:
+                    history = self.histories[pid] = MetricRingBuffer(self.capacity, self.COLUMNS, self.TYPECODES)
+                    self._created[pid] = record["create_time"]
+                history.append((
+                    snapshot.taken_at,
+                    record["cpu"] or 0.0,
+                    record["rss"],
+                    record["read_bytes"],
+                    record["write_bytes"],
+                    record["threads"] or 0,
+                    self._state_codes.get(record["status"], 0)
+                ))
+            for pid in [pid for pid in self.histories if pid not in snapshot.by_pid]:
+                del self.histories[pid]
+                self._created.pop(pid, None)
+
+    # ------------------------------------------------------------------
+    # Фоновий збір
+    # ------------------------------------------------------------------
+
+    def start(self, interval: float = 1.0):
+        """Оновлювати знімок у фоні, щоб історія була готова до запиту"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="process-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, interval: float):
+        while not self._stop_event.is_set():
+            try:
+                self.service.get(max_age=interval / 2)
+            except Exception as e:
+                logging.error(f"Помилка оновлення історії процесів: {e}")
+            self._stop_event.wait(interval)
+
+    def ensure_window(self, window: float, interval: float = 0.5) -> float:
+        """Якщо історії ще замало - один спільний добір для всіх процесів (не більше window сек)"""
+        snapshot = self.service.get(max_age=interval)
+        started = self._oldest_common_ts(snapshot)
+        deadline = time.time() + window
+        while time.time() - started < window and time.time() < deadline:
+            time.sleep(interval)
+            snapshot = self.service.refresh()
+        return time.time() - started
+
+    def _oldest_common_ts(self, snapshot: ProcessSnapshot) -> float:
+        """Найпізніший початок історії серед живих процесів (щоб вікно покривало всіх)"""
+        with self._lock:
+            starts = [
+                history.last(history.size)[0][0]
+                for pid, history in self.histories.items()
+                if pid in snapshot.by_pid and history.size
+            ]
+        # Нові процеси, що з'явилися щойно, не повинні змушувати чекати інших
+        starts.sort()
+        return starts[len(starts) * 9 // 10] if starts else time.time()
+
+    # ------------------------------------------------------------------
+    # Аналіз історії
+    # ------------------------------------------------------------------
+
+    def rows(self, pid: int, window: float = None) -> List[Tuple[float, ...]]:
+        with self._lock:
+            history = self.histories.get(pid)
+            if history is None:
+                return []
+            return history.since(time.time() - window) if window else history.last(history.size)
+
+    def summary(self, pid: int, window: float = 60) -> Optional[Dict[str, Any]]:
+        """Середнє/максимум CPU, тренд пам'яті, швидкість IO та стани за вікно"""
+        rows = self.rows(pid, window)
+        if not rows:
+            return None
+        first, last = rows[0], rows[-1]
+        span = last[0] - first[0]
+        cpu = [row[1] for row in rows]
+        states = defaultdict(int)
+        for row in rows:
+            states[self.STATES[row[6]]] += 1
+        return {
+            "samples": len(rows),
+            "window_seconds": round(span, 1),
+            "cpu_avg": round(sum(cpu) / len(cpu), 1),
+            "cpu_max": round(max(cpu), 1),
+            "rss_mb": round(last[2] / 1024**2, 2),
+            "rss_change_mb": round((last[2] - first[2]) / 1024**2, 2),
+            "read_kbps": round((last[3] - first[3]) / 1024 / span, 1) if span > 0 else 0.0,
+            "write_kbps": round((last[4] - first[4]) / 1024 / span, 1) if span > 0 else 0.0,
+            "threads": last[5],
+            "states": dict(states)
+        }
+
+    def frozen(self, window: float = 10, cpu_threshold: float = 0.1, min_samples: int = 3) -> List[Dict[str, Any]]:
+        """Процеси, що весь час вікна не сплять, але й не витрачають CPU та не роблять IO"""
+        snapshot = self.service.get()
+        own = {os.getpid(), *snapshot.ancestors(os.getpid())}
+        candidates = []
+        for record in snapshot.records:
+            pid = record["pid"]
+            if pid in own or pid <= 4:
+                continue
+            rows = self.rows(pid, window)
+            if len(rows) < min_samples:
+                continue
+            states = {self.STATES[row[6]] for row in rows}
+            if states & set(self.IDLE_STATES) or states & {"zombie", "dead"}:
+                continue
+            if rows[-1][0] - rows[0][0] < window / 2:
+                continue
+            if any(row[1] >= cpu_threshold for row in rows):
+                continue
+            if rows[-1][3] != rows[0][3] or rows[-1][4] != rows[0][4]:
+                continue
+            candidates.append(record)
+        return candidates
+
+
+process_tracker = ProcessTracker(process_snapshots)
+
+
+class MetricRingBuffer:
+    """Кільцевий буфер фіксованого розміру: окремий array на кожну колонку (за замовчуванням 'd')"""
+    
+    def __init__(self, capacity: int, columns: Tuple[str, ...], typecodes: Tuple[str, ...] = None):
+        self.capacity = capacity
+        self.columns = columns
+        typecodes = typecodes or ('d',) * len(columns)
+        self._data = {name: array(code, [0]) * capacity for name, code in zip(columns, typecodes)}
+        self._next = 0
+        self.size = 0
+    
+    def append(self, values: Tuple[float, ...]):
+        """Додати рядок (значення в порядку колонок), перезаписуючи найстаріший"""
+        index = self._next
+        for name, value in zip(self.columns, values):
+            self._data[name][index] = value
+        self._next = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    def last(self, count: int) -> List[Tuple[float, ...]]:
+        """Останні count рядків від найстарішого до найновішого"""
+        count = min(count, self.size)
+        start = (self._next - count) % self.capacity
+        columns = [self._data[name] for name in self.columns]
+        return [tuple(col[(start + i) % self.capacity] for col in columns) for i in range(count)]
+    
+    def since(self, ts: float) -> List[Tuple[float, ...]]:
+        """Рядки з першою колонкою (час) >= ts"""
+        return [row for row in self.last(self.size) if row[0] >= ts]
+
+
+class _RollupBucket:
+    """Поточний незавершений інтервал агрегації"""
+    __slots__ = ("start", "samples", "cpu_sum", "cpu_max", "memory_sum", "memory_max",
+                 "disk_sum", "sent_sum", "recv_sum")
+    
+    def __init__(self, start: float):
+        self.start = start
+        self.samples = 0
+        self.cpu_sum = self.cpu_max = 0.0
+        self.memory_sum = self.memory_max = 0.0
+        self.disk_sum = self.sent_sum = self.recv_sum = 0.0
+    
+    def add(self, cpu: float, memory: float, disk: float, sent_rate: float, recv_rate: float):
+        self.samples += 1
+        self.cpu_sum += cpu
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.memory_sum += memory
+        self.memory_max = max(self.memory_max, memory)
+        self.disk_sum += disk
+        self.sent_sum += sent_rate
+        self.recv_sum += recv_rate
+    
+    def row(self) -> Tuple:
+        n = self.samples or 1
+        return (self.start, self.samples, self.cpu_sum / n, self.cpu_max, self.memory_sum / n,
+                self.memory_max, self.disk_sum / n, self.sent_sum / n, self.recv_sum / n)
+
+
+def parse_duration(text: str) -> Optional[float]:
+    """'15m', '24h', '7d', '1y' -> секунди"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdwy]?)\s*', text or "")
+    if not match:
+        return None
+    units = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "y": 365 * 86400}
+    return float(match.group(1)) * units[match.group(2)]
+
+
+class MetricsRecorder:
+    """Часовий ряд системних показників: сирі 1 с (1 год), 1 хв (7 днів), 1 год (1 рік)"""
+    
+    RAW_RETENTION = 3600  # сирі 1 с точки: 1 година (і в кільцевому буфері, і в БД)
+    # рівень: (роздільність, зберігання) - 1 хв точки 7 днів, 1 год точки 1 рік
+    TIERS = {"1m": (60, 7 * 86400), "1h": (3600, 365 * 86400)}
+    RAW_COLUMNS = ("ts", "cpu", "memory", "disk", "net_sent", "net_recv")
+    
+    def __init__(self, db: AgentDatabase, flush_every: int = 30):
+        self.db = db
+        self.flush_every = flush_every
+        self.raw = MetricRingBuffer(self.RAW_RETENTION, self.RAW_COLUMNS)
+        self._buckets: Dict[str, Optional[_RollupBucket]] = {tier: None for tier in self.TIERS}
+        self._pending_raw: List[Tuple] = []
+        self._pending_rollups: Dict[str, List[Tuple]] = {tier: [] for tier in self.TIERS}
+        self._last_raw_second = None
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, snapshot: Dict[str, Any]):
+        """Додати зріз семплера; запис у БД - пакетами раз на flush_every зрізів"""
+        ts = snapshot["ts"]
+        second = int(ts)
+        with self._lock:
+            if second != self._last_raw_second:
+                # Сирий рівень має роздільність 1 с - частіші зрізи не дублюємо
+                row = (float(second), snapshot["cpu"], snapshot["memory"], snapshot["disk"],
+                       float(snapshot["net_sent"]), float(snapshot["net_recv"]))
+                self.raw.append(row)
+                self._pending_raw.append(row)
+                self._last_raw_second = second
             
+            for tier, (resolution, _) in self.TIERS.items():
+                start = ts - ts % resolution
+                bucket = self._buckets[tier]
+                if bucket is not None and bucket.start != start:
+                    self._pending_rollups[tier].append(bucket.row())
+                    bucket = None
+                if bucket is None:
+                    bucket = self._buckets[tier] = _RollupBucket(start)
+                bucket.add(snapshot["cpu"], snapshot["memory"], snapshot["disk"],
+                           snapshot.get("net_sent_rate", 0.0), snapshot.get("net_recv_rate", 0.0))
+            
+            should_flush = len(self._pending_raw) >= self.flush_every
+        if should_flush:
+            self.flush()
+    
+    def flush(self, include_partial: bool = False):
+        """Записати накопичене в БД; include_partial - також незавершені інтервали (при зупинці)"""
+        with self._lock:
+            raw, self._pending_raw = self._pending_raw, []
+            rollups = {tier: rows for tier, rows in self._pending_rollups.items()}
+            self._pending_rollups = {tier: [] for tier in self.TIERS}
+            if include_partial:
+                for tier, bucket in self._buckets.items():
+                    if bucket is not None and bucket.samples:
+                        rollups[tier].append(bucket.row())
+                        self._buckets[tier] = None
+        try:
+            if raw:
+                self.db.log_system_monitoring_batch([(r[0], r[1], r[2], r[3], int(r[4]), int(r[5])) for r in raw])
+            for tier, rows in rollups.items():
+                if rows:
+                    self.db.save_monitoring_rollups(tier, rows)
+            now = time.time()
+            if now - self._last_prune > 600:
+                self.db.prune_monitoring(
+                    now - self.RAW_RETENTION,
+                    {tier: now - retention for tier, (_, retention) in self.TIERS.items()}
+                )
+                self._last_prune = now
+        except Exception as e:
+            logging.error(f"Помилка запису моніторингу: {str(e)}")
+    
+    def history(self, range_text: str = "15m") -> Dict[str, Any]:
+        """Готові точки для графіка: рівень обирається за довжиною діапазону"""
+        seconds = parse_duration(range_text)
+        if not seconds:
+            return {"success": False, "error": "❌ Невірний діапазон. Приклади: 15m, 1h, 24h, 7d, 1y"}
+        since = time.time() - seconds
+        
+        if seconds <= self.RAW_RETENTION:
+            tier, resolution = "raw", 1
+            with self._lock:
+                rows = self.raw.since(since)
+            if not rows or rows[0][0] > since + 5:
+                # Після перезапуску буфер порожній - старіші точки беремо з БД
+                first = rows[0][0] if rows else float("inf")
+                rows = [r for r in self.db.get_monitoring_raw(since) if r[0] < first] + rows
+            points = [
+                {"timestamp": datetime.fromtimestamp(r[0]).isoformat(), "cpu": r[1], "memory": r[2], "disk": r[3]}
+                for r in rows
+            ]
+        else:
+            tier = "1m" if seconds <= self.TIERS["1m"][1] else "1h"
+            resolution = self.TIERS[tier][0]
+            rows = self.db.get_monitoring_rollups(tier, since)
+            with self._lock:
+                pending = [r for r in self._pending_rollups[tier] if r[0] >= since]
+                bucket = self._buckets[tier]
+                if bucket is not None and bucket.samples:
+                    pending.append(bucket.row())
+            # Незаписані інтервали - у тому ж форматі, що й рядки з БД
+            rows = list(rows) + [(r[0], r[2], r[4], r[6], r[3], r[5], r[7], r[8]) for r in pending]
+            points = [
+                {
+                    "timestamp": datetime.fromtimestamp(r[0]).isoformat(),
+                    "cpu": round(r[1], 1), "memory": round(r[2], 1), "disk": round(r[3], 1),
+                    "cpu_max": r[4], "memory_max": r[5]
+                }
+                for r in rows
+            ]
+        
+        return {
+            "success": True,
+            "range": range_text,
+            "tier": tier,
+            "resolution_seconds": resolution,
+            "points": points
+        }
+
+# ============================================================================
+# РОЗШИРЕНИЙ СИСТЕМНИЙ МОНІТОР
+# ============================================================================
+
+@traced_methods("system")
+class AdvancedSystemMonitor:
+    """Розширений моніторинг системи"""
+    
+    def get_system_info(self) -> Dict[str, Any]:
+        """Повна системна інформація (статика з кешу, лічильники зі спільного семплера)"""
+        try:
+            info = {name: system_inventory.section(name) for name in ("system", "cpu", "memory", "disk")}
             return {"success": True, "info": info}
             
         except Exception as e:
@@ -1146,29 +3525,28 @@ class AdvancedSystemMonitor:
     def list_processes(self, sort_by: str = "cpu", limit: int = 20) -> Dict[str, Any]:
         """Список процесів з сортуванням"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-                try:
-                    processes.append({
-                        "pid": proc.info['pid'],
-                        "name": proc.info['name'],
-                        "cpu": proc.info['cpu_percent'],
-                        "memory": proc.info['memory_percent'],
-                        "status": proc.info['status']
-                    })
-                except Exception:
-                    pass
-            
-            if sort_by == "cpu":
-                processes.sort(key=lambda x: x['cpu'], reverse=True)
-            elif sort_by == "memory":
-                processes.sort(key=lambda x: x['memory'], reverse=True)
-            
-            return {"success": True, "processes": processes[:limit]}
+            processes = [
+                {
+                    "pid": record['pid'],
+                    "name": record['name'],
+                    "cpu": record['cpu'],
+                    "memory": record['memory'],
+                    "status": record['status']
+                }
+                for record in process_snapshots.get().top(sort_by, limit)
+            ]
+            return {"success": True, "processes": processes}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def app_usage(self, sort_by: str = "cpu", limit: int = 15) -> Dict[str, Any]:
+        """Споживання ресурсів, згруповане за програмами"""
+        try:
+            return {"success": True, "apps": process_snapshots.get().by_application(sort_by, limit)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def get_disk_info(self) -> Dict[str, Any]:
         """Інформація про всі диски"""
         try:
@@ -1195,22 +3573,535 @@ class AdvancedSystemMonitor:
     
     def get_cpu_info(self) -> Dict[str, Any]:
         """Скорочена інформація про CPU"""
-        base = self.get_system_info()
-        if not base.get("success"):
-            return base
-        return {"success": True, "cpu": base["info"]["cpu"]}
+        try:
+            return {"success": True, "cpu": system_inventory.section("cpu")}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
     
     def get_memory_info(self) -> Dict[str, Any]:
         """Скорочена інформація про пам'ять"""
-        base = self.get_system_info()
-        if not base.get("success"):
-            return base
-        return {"success": True, "memory": base["info"]["memory"]}
+        try:
+            return {"success": True, "memory": system_inventory.section("memory")}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+# ============================================================================
+# ПЕРЕВІРКА ДОСТУПНОСТІ ХОСТІВ
+# ============================================================================
+
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class ReachabilityEngine:
+    """Асинхронна перевірка багатьох цілей: TCP connect, HTTP HEAD/GET, ICMP (якщо ОС дозволяє)"""
+    
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+    
+    def __init__(self, concurrency: int = 100, timeout: float = 2.0, attempts: int = 3, interval: float = 0.2):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.attempts = attempts
+        self.interval = interval
+        self._icmp_type: Optional[int] = None
+    
+    # ------------------------------------------------------------------
+    # Розбір цілей
+    # ------------------------------------------------------------------
+    
+    def parse_target(self, text: str, method: str = "HEAD") -> Dict[str, Any]:
+        """'http(s)://...' - HTTP, 'host:port' - TCP, 'icmp:host' або просто 'host' - ICMP (або TCP:80)"""
+        text = text.strip()
+        if text.startswith(("http://", "https://")):
+            parts = urlsplit(text)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            return {
+                "target": text, "kind": "http", "host": parts.hostname,
+                "port": parts.port or self.DEFAULT_PORTS[parts.scheme],
+                "tls": parts.scheme == "https", "path": path, "method": method.upper()
+            }
+        if text.startswith("icmp:"):
+            return {"target": text, "kind": "icmp", "host": text[5:]}
+        if text.startswith("tcp:"):
+            text = text[4:]
+        # Гола IPv6-адреса ('::1', 'fe80::1') сама містить ':' - це не 'host:port'
+        try:
+            literal = ipaddress.ip_address(text.strip("[]"))
+        except ValueError:
+            literal = None
+        if literal is None:
+            host, sep, port = text.rpartition(":")
+            if sep and port.isdigit() and "]" not in port:
+                return {"target": text, "kind": "tcp", "host": host.strip("[]"), "port": int(port)}
+        host = text.strip("[]")
+        # ICMP-проба працює лише по IPv4
+        if self.icmp_available() and not (literal and literal.version == 6):
+            return {"target": text, "kind": "icmp", "host": host}
+        return {"target": text, "kind": "tcp", "host": host, "port": 80}
+    
+    def icmp_available(self) -> bool:
+        """Чи можна слати ICMP без ping: непривілейований SOCK_DGRAM (Linux/macOS) або SOCK_RAW"""
+        if self._icmp_type is None:
+            self._icmp_type = 0
+            for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+                try:
+                    socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP).close()
+                    self._icmp_type = sock_type
+                    break
+                except (OSError, PermissionError):
+                    continue
+        return bool(self._icmp_type)
+    
+    # ------------------------------------------------------------------
+    # Окремі проби (повертають латентність у мс або кидають виняток)
+    # ------------------------------------------------------------------
+    
+    async def _probe_tcp(self, address: str, target: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, target["port"]), self.timeout)
+        latency = (time.perf_counter() - started) * 1000
+        writer.close()
+        return {"latency": latency}
+    
+    async def _probe_http(self, address: str, target: Dict[str, Any]) -> Dict[str, Any]:
+        context = ssl.create_default_context() if target["tls"] else None
+        started = time.perf_counter()
+        
+        async def exchange():
+            reader, writer = await asyncio.open_connection(
+                address, target["port"], ssl=context,
+                server_hostname=target["host"] if context else None
+            )
+            try:
+                writer.write(
+                    f"{target['method']} {target['path']} HTTP/1.1\r\nHost: {target['host']}\r\n"
+                    f"User-Agent: ai-agent-reachability\r\nConnection: close\r\n\r\n".encode()
+                )
+                await writer.drain()
+                return await reader.readline()
+            finally:
+                writer.close()
+        
+        status_line = await asyncio.wait_for(exchange(), self.timeout)
+        latency = (time.perf_counter() - started) * 1000
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ConnectionError("Некоректна HTTP-відповідь")
+        return {"latency": latency, "status": int(parts[1])}
+    
+    async def _probe_icmp(self, address: str, target: Dict[str, Any], sequence: int) -> Dict[str, Any]:
+        if not self.icmp_available():
+            raise PermissionError("ICMP недоступний без прав адміністратора")
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, self._icmp_type, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        try:
+            ident = (id(target) ^ os.getpid()) & 0xFFFF
+            header = struct.pack("!BBHHH", 8, 0, 0, ident, sequence)
+            payload = struct.pack("!d", time.time())
+            packet = struct.pack("!BBHHH", 8, 0, _icmp_checksum(header + payload), ident, sequence) + payload
+            started = time.perf_counter()
+            # connect() для датаграмного/сирого сокета лише фіксує адресу - не блокує
+            sock.connect((address, 0))
+            await loop.sock_sendall(sock, packet)
+            if self._icmp_type != socket.SOCK_RAW:
+                # Для SOCK_DGRAM ядро підміняє ідентифікатор на локальний "порт" сокета
+                ident = sock.getsockname()[1]
+            
+            deadline = started + self.timeout
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                data = await asyncio.wait_for(loop.sock_recv(sock, 1024), remaining)
+                if self._icmp_type == socket.SOCK_RAW:
+                    data = data[(data[0] & 0x0F) * 4:]  # пропускаємо IP-заголовок
+                if len(data) < 8:
+                    continue
+                icmp_type, _, _, reply_ident, reply_sequence = struct.unpack("!BBHHH", data[:8])
+                # Сирий сокет бачить відповіді всіх процесів - звіряємо і ідентифікатор, і номер
+                if icmp_type == 0 and reply_ident == ident and reply_sequence == sequence:
+                    return {"latency": (time.perf_counter() - started) * 1000}
+        finally:
+            sock.close()
+    
+    # ------------------------------------------------------------------
+    # Запуск
+    # ------------------------------------------------------------------
+    
+    async def _check(self, target: Dict[str, Any], semaphore: "asyncio.Semaphore") -> Dict[str, Any]:
+        result = {
+            "target": target["target"], "kind": target["kind"], "host": target["host"],
+            "port": target.get("port"), "sent": 0, "received": 0, "address": None
+        }
+        loop = asyncio.get_running_loop()
+        latencies, errors, statuses = [], [], []
+        try:
+            # DNS - один раз на ціль, а не на кожну спробу
+            family = socket.AF_INET if target["kind"] == "icmp" else socket.AF_UNSPEC
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(target["host"], target.get("port") or 0, family=family, type=socket.SOCK_STREAM),
+                self.timeout
+            )
+            result["address"] = infos[0][4][0]
+        except Exception as e:
+            errors.append(f"DNS: {e or type(e).__name__}")
+        
+        if result["address"]:
+            for attempt in range(self.attempts):
+                if attempt:
+                    await asyncio.sleep(self.interval)
+                result["sent"] += 1
+                async with semaphore:
+                    try:
+                        if target["kind"] == "tcp":
+                            probe = await self._probe_tcp(result["address"], target)
+                        elif target["kind"] == "http":
+                            probe = await self._probe_http(result["address"], target)
+                        else:
+                            probe = await self._probe_icmp(result["address"], target, attempt + 1)
+                    except asyncio.TimeoutError:
+                        errors.append("timeout")
+                        continue
+                    except (OSError, ConnectionError, ssl.SSLError) as e:
+                        errors.append(str(e) or type(e).__name__)
+                        continue
+                latencies.append(probe["latency"])
+                if "status" in probe:
+                    statuses.append(probe["status"])
+        
+        latencies.sort()
+        result["received"] = len(latencies)
+        result["loss"] = round(100 * (1 - len(latencies) / result["sent"]), 1) if result["sent"] else 100.0
+        result["reachable"] = bool(latencies)
+        if latencies:
+            result["min_ms"] = round(latencies[0], 2)
+            result["avg_ms"] = round(sum(latencies) / len(latencies), 2)
+            result["p95_ms"] = round(percentile(latencies, 95), 2)
+            result["max_ms"] = round(latencies[-1], 2)
+        if statuses:
+            result["status"] = statuses[-1]
+        if errors:
+            result["error"] = errors[-1]
+        return result
+    
+    async def run(self, targets: List[str], method: str = "HEAD") -> Dict[str, Any]:
+        """Перевірити всі цілі паралельно (не більше concurrency одночасних проб)"""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        parsed = [self.parse_target(t, method) for t in dict.fromkeys(t.strip() for t in targets if t.strip())]
+        results = await asyncio.gather(*(self._check(target, semaphore) for target in parsed))
+        reachable = sum(1 for r in results if r["reachable"])
+        return {
+            "success": True,
+            "targets": len(results),
+            "reachable": reachable,
+            "unreachable": len(results) - reachable,
+            "elapsed": round(time.perf_counter() - started, 2),
+            "icmp": self.icmp_available(),
+            "results": results
+        }
+    
+    def check(self, targets: List[str], method: str = "HEAD") -> Dict[str, Any]:
+        """Синхронна обгортка для REPL (власний цикл подій)"""
+        return asyncio.run(self.run(targets, method))
+
+# ============================================================================
+# ПАРАЛЕЛЬНЕ ЗАВАНТАЖЕННЯ З ДОКАЧУВАННЯМ
+# ============================================================================
+
+class _OrderedHasher:
+    """Хеш файлу в порядку байтів, хоча сегменти пишуться паралельно"""
+    
+    def __init__(self, algorithm: str, part_path: str, disk_regions: List[Tuple[int, int]],
+                 max_buffer: int = 64 * 1024 * 1024):
+        self.hasher = hashlib.new(algorithm)
+        self.part_path = part_path
+        self.max_buffer = max_buffer
+        self.offset = 0
+        self._pending: Dict[int, bytes] = {}
+        self._buffered = 0
+        # Ділянки, які доведеться дочитати з файлу: завантажені минулого запуску
+        # або ті, що забігли вперед понад max_buffer (зазвичай ще в кеші ОС)
+        self._regions: Dict[int, int] = {}
+        self._region_ends: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        for start, end in disk_regions:
+            if end > start:
+                self._add_region(start, end)
+        with self._lock:
+            self._advance()
+    
+    def feed(self, offset: int, data: bytes):
+        """Дані вже записані у файл за offset"""
+        with self._lock:
+            if offset == self.offset:
+                self.hasher.update(data)
+                self.offset += len(data)
+                self._advance()
+            elif self._buffered + len(data) <= self.max_buffer:
+                self._pending[offset] = data
+                self._buffered += len(data)
+            else:
+                self._add_region(offset, offset + len(data))
+    
+    def _add_region(self, start: int, end: int):
+        if start in self._region_ends:
+            # Продовження попередньої ділянки того ж сегмента
+            start = self._region_ends.pop(start)
+        self._regions[start] = end
+        self._region_ends[end] = start
+    
+    def _advance(self):
+        while True:
+            if self.offset in self._pending:
+                data = self._pending.pop(self.offset)
+                self._buffered -= len(data)
+                self.hasher.update(data)
+                self.offset += len(data)
+            elif self.offset in self._regions:
+                end = self._regions.pop(self.offset)
+                self._region_ends.pop(end, None)
+                with open(self.part_path, 'rb') as f:
+                    f.seek(self.offset)
+                    remaining = end - self.offset
+                    while remaining > 0:
+                        chunk = f.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            break
+                        self.hasher.update(chunk)
+                        remaining -= len(chunk)
+                self.offset = end
+            else:
+                return
+    
+    def finish(self) -> str:
+        with self._lock:
+            self._advance()
+            return self.hasher.hexdigest()
+
+
+class RangeDownloader:
+    """Завантаження паралельними byte-range сегментами з докачуванням за файлом стану"""
+    
+    CHUNK_SIZE = 1024 * 1024
+    MIN_SEGMENT = 4 * 1024 * 1024
+    STATE_INTERVAL = 1.0
+    PROGRESS_INTERVAL = 0.5
+    RETRIES = 3
+    HASH_LENGTHS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+    
+    def __init__(self, connections: int = 4, timeout: float = 30):
+        self.connections = max(1, connections)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def parse_checksum(cls, checksum: Optional[str]) -> Optional[Tuple[str, str]]:
+        """'sha256:abc...' або просто hex (алгоритм - за довжиною)"""
+        if not checksum:
+            return None
+        algorithm, sep, digest = checksum.partition(":")
+        if not sep:
+            algorithm, digest = cls.HASH_LENGTHS.get(len(checksum), ""), checksum
+        algorithm = algorithm.lower().replace("-", "")
+        if algorithm not in hashlib.algorithms_available:
+            raise ValueError(f"Невідомий алгоритм контрольної суми: {algorithm or checksum}")
+        return algorithm, digest.lower()
+    
+    def probe(self, url: str) -> Dict[str, Any]:
+        """Розмір, підтримка Range і валідатори (ETag/Last-Modified) без завантаження тіла"""
+        response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        headers = response.headers if response.ok else {}
+        size = int(headers.get("Content-Length", 0) or 0)
+        ranges = headers.get("Accept-Ranges", "").lower() == "bytes"
+        if not response.ok or not size or not ranges:
+            # Частина серверів не відповідає на HEAD коректно - перевіряємо першим байтом
+            with self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=self.timeout) as r:
+                r.raise_for_status()
+                headers = r.headers
+                if r.status_code == 206 and "/" in headers.get("Content-Range", ""):
+                    total = headers["Content-Range"].rsplit("/", 1)[1]
+                    size = int(total) if total.isdigit() else 0
+                    ranges = bool(size)
+                else:
+                    size = int(headers.get("Content-Length", 0) or 0)
+                    ranges = False
+        return {
+            "url": url,
+            "size": size,
+            "ranges": ranges,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified")
+        }
+    
+    def _plan(self, info: Dict[str, Any]) -> List[Dict[str, int]]:
+        size = info["size"]
+        if not info["ranges"] or size < 2 * self.MIN_SEGMENT:
+            return [{"start": 0, "end": size, "pos": 0}]
+        count = min(self.connections, -(-size // self.MIN_SEGMENT))
+        step = -(-size // count)
+        return [{"start": i, "end": min(i + step, size), "pos": i} for i in range(0, size, step)]
+    
+    def _load_state(self, state_path: Path, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Стан попереднього запуску - лише якщо файл на сервері не змінився"""
+        try:
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        same = all(state.get(key) == info[key] for key in ("url", "size", "etag", "last_modified"))
+        return state if same and info["ranges"] else None
+    
+    def _save_state(self, state_path: Path, state: Dict[str, Any]):
+        tmp = state_path.with_suffix(state_path.suffix + ".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(state), encoding='utf-8')
+            os.replace(tmp, state_path)
+    
+    def download(self, url: str, save_path: str, checksum: str = None) -> Dict[str, Any]:
+        """Завантажити файл; прогрес публікується подіями download.progress"""
+        started = time.perf_counter()
+        expected = self.parse_checksum(checksum)
+        target = Path(save_path)
+        if target.is_dir():
+            target = target / (Path(urlsplit(url).path).name or "download")
+        part_path = target.with_name(target.name + ".part")
+        state_path = target.with_name(target.name + ".part.json")
+        
+        info = self.probe(url)
+        state = self._load_state(state_path, info) if part_path.exists() else None
+        if state is None:
+            state = dict(info, segments=self._plan(info))
+            with open(part_path, 'wb') as f:
+                if info["size"]:
+                    f.truncate(info["size"])
+        segments = state["segments"]
+        resumed = sum(seg["pos"] - seg["start"] for seg in segments)
+        
+        hasher = None
+        if expected:
+            hasher = _OrderedHasher(
+                expected[0], str(part_path),
+                [(seg["start"], seg["pos"]) for seg in segments]
+            )
+        
+        progress = {"downloaded": resumed, "last_event": 0.0, "last_state": time.time()}
+        event_bus.publish("download.started", {"url": url, "path": str(target), "size": info["size"],
+                                               "segments": len(segments), "resumed_bytes": resumed})
+        
+        def report(nbytes: int):
+            with self._lock:
+                progress["downloaded"] += nbytes
+                now = time.time()
+                if now - progress["last_state"] >= self.STATE_INTERVAL and info["ranges"]:
+                    progress["last_state"] = now
+                    save_state = True
+                else:
+                    save_state = False
+                if now - progress["last_event"] < self.PROGRESS_INTERVAL:
+                    return save_state
+                progress["last_event"] = now
+                downloaded = progress["downloaded"]
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            event_bus.publish("download.progress", {
+                "url": url,
+                "path": str(target),
+                "downloaded": downloaded,
+                "size": info["size"],
+                "percent": round(downloaded / info["size"] * 100, 1) if info["size"] else None,
+                "speed_mbps": round((downloaded - resumed) / elapsed / 1024**2, 2)
+            })
+            return save_state
+        
+        def fetch(seg: Dict[str, int]):
+            for attempt in range(self.RETRIES + 1):
+                if info["size"] and seg["pos"] >= seg["end"]:
+                    return
+                headers = {"Range": f"bytes={seg['pos']}-{seg['end'] - 1}"} if info["ranges"] else {}
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response, \
+                            open(part_path, 'r+b') as f:
+                        response.raise_for_status()
+                        if info["ranges"] and response.status_code != 206:
+                            raise IOError("Сервер проігнорував Range-запит")
+                        f.seek(seg["pos"])
+                        for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                            if not chunk:
+                                continue
+                            if info["size"]:
+                                chunk = chunk[:seg["end"] - seg["pos"]]
+                            f.write(chunk)
+                            f.flush()
+                            if hasher:
+                                hasher.feed(seg["pos"], chunk)
+                            seg["pos"] += len(chunk)
+                            if report(len(chunk)):
+                                self._save_state(state_path, state)
+                    if not info["size"]:
+                        seg["end"] = seg["pos"]
+                    return
+                except (requests.RequestException, IOError) as e:
+                    # Без Range почати знову можна лише з нуля
+                    if attempt == self.RETRIES or not info["ranges"]:
+                        raise
+                    logging.warning(f"Сегмент {seg['start']}: {e}, повтор {attempt + 1}")
+                    time.sleep(0.5 * (attempt + 1))
+        
+        try:
+            pending = [seg for seg in segments if seg["pos"] < seg["end"] or not info["size"]]
+            if len(pending) > 1:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="download") as pool:
+                    for future in [pool.submit(fetch, seg) for seg in pending]:
+                        future.result()
+            elif pending:
+                fetch(pending[0])
+        except Exception as e:
+            if info["ranges"]:
+                self._save_state(state_path, state)
+            event_bus.publish("download.failed", {"url": url, "path": str(target), "error": str(e)})
+            raise
+        
+        size = os.path.getsize(part_path)
+        if info["size"] and size != info["size"]:
+            raise IOError(f"Розмір не збігається: {size} замість {info['size']}")
+        
+        digest = hasher.finish() if hasher else None
+        if expected and digest != expected[1]:
+            part_path.unlink()
+            state_path.unlink(missing_ok=True)
+            raise ValueError(f"Контрольна сума {expected[0]} не збігається: {digest}")
+        
+        os.replace(part_path, target)
+        state_path.unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+        result = {
+            "path": str(target),
+            "size": size,
+            "segments": len(segments),
+            "resumed_bytes": resumed,
+            "elapsed": round(elapsed, 2),
+            "speed_mbps": round((size - resumed) / max(elapsed, 1e-6) / 1024**2, 2),
+            "checksum": f"{expected[0]}:{digest}" if digest else None
+        }
+        event_bus.publish("download.finished", dict(result, url=url))
+        return result
 
 # ============================================================================
 # РОЗШИРЕНИЙ МЕРЕЖЕВИЙ МЕНЕДЖЕР
 # ============================================================================
 
+@traced_methods("network")
 class AdvancedNetworkManager:
     """Розширене керування мережею"""
     
@@ -1230,30 +4121,23 @@ class AdvancedNetworkManager:
         except Exception:
             return {"success": True, "connected": False}
     
-    def download_file(self, url: str, save_path: str) -> Dict[str, Any]:
-        """Завантаження файлу"""
+    def download_file(self, url: str, save_path: str, checksum: str = None, connections: int = 4) -> Dict[str, Any]:
+        """Завантаження файлу (паралельні сегменти, докачування, перевірка контрольної суми)"""
         try:
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if not chunk:
-                        continue
-                    downloaded += len(chunk)
-                    f.write(chunk)
-                    if total_size:
-                        progress = (downloaded / total_size) * 100
-                        print(f"\rЗавантаження: {progress:.1f}%", end='', flush=True)
-            
-            print()
+            res = RangeDownloader(connections=connections).download(url, save_path, checksum)
+            message = f"✅ Файл збережено: {res['path']}"
+            if res["resumed_bytes"]:
+                message += f" (докачано з {res['resumed_bytes'] / 1024 / 1024:.2f} MB)"
+            if res["checksum"]:
+                message += f"\n🔐 Контрольна сума збігається: {res['checksum']}"
             return {
                 "success": True,
-                "message": f"✅ Файл збережено: {save_path}",
-                "size": f"{downloaded / 1024 / 1024:.2f} MB"
+                "message": message,
+                "path": res["path"],
+                "size": f"{res['size'] / 1024 / 1024:.2f} MB",
+                "segments": res["segments"],
+                "speed": f"{res['speed_mbps']} MB/s",
+                "elapsed": res["elapsed"]
             }
             
         except Exception as e:
@@ -1276,6 +4160,17 @@ class AdvancedNetworkManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def check_hosts(self, targets: List[str], attempts: int = 3, timeout: float = 2.0,
+                    concurrency: int = 100, method: str = "HEAD") -> Dict[str, Any]:
+        """Паралельна перевірка доступності багатьох хостів/URL з латентністю та втратами"""
+        try:
+            if not targets:
+                return {"success": False, "error": "❌ Не вказано жодної цілі"}
+            engine = ReachabilityEngine(concurrency=concurrency, timeout=timeout, attempts=attempts)
+            return engine.check(targets, method)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def get_ip_info(self) -> Dict[str, Any]:
         """Інформація про IP"""
         try:
@@ -1332,6 +4227,7 @@ class AdvancedNetworkManager:
 # УТИЛІТИ
 # ============================================================================
 
+@traced_methods("utils")
 class Utilities:
     """Корисні утиліти"""
     
@@ -1390,6 +4286,216 @@ class Utilities:
             "timezone": time.tzname[0] if time.tzname else ""
         }
 
+# ============================================================================
+# ПЛАГІНИ КОМАНД
+# ============================================================================
+
+def command(name: str, usage: str = "", summary: str = "", params: Tuple[str, ...] = ()):
+    """Позначити метод плагіна як команду (usage/summary - для help і системного контексту LLM)"""
+    def decorate(func):
+        func.command_spec = {"name": name, "usage": usage, "summary": summary, "params": params}
+        return func
+    return decorate
+
+
+class CommandPlugin:
+    """Група команд розширення; екземпляр (і його менеджери) створюється при першому виклику команди"""
+    
+    name = ""
+    title = ""
+    autoload = False  # створити одразу з агентом (наприклад, фоновий планувальник)
+    
+    def __init__(self, agent: "AIAgent"):
+        self.agent = agent
+        self._subscriptions: List[Callable[[], None]] = []
+    
+    def subscribe(self, topic: str, render: Callable[[Dict[str, Any]], str]):
+        """Подія шини -> сповіщення агента; відписка - у close()"""
+        self._subscriptions.append(
+            event_bus.subscribe(topic, lambda topic, payload: self.agent.notify(render(payload)))
+        )
+    
+    def close(self):
+        """Звільнення ресурсів плагіна при вивантаженні"""
+        for unsubscribe in self._subscriptions:
+            unsubscribe()
+        self._subscriptions.clear()
+    
+    @classmethod
+    def command_specs(cls) -> Dict[str, Dict[str, Any]]:
+        """Команди класу в порядку оголошення"""
+        specs = {}
+        for klass in reversed(cls.__mro__):
+            for attr, value in vars(klass).items():
+                spec = getattr(value, "command_spec", None)
+                if spec is not None:
+                    specs[spec["name"]] = dict(spec, method=attr)
+        return specs
+
+
+class PluginRegistry:
+    """Таблиця команда -> плагін: невідома команда - один пошук у словнику, без імпорту плагінів"""
+    
+    ENTRY_POINT_GROUP = "ai_agent.plugins"
+    
+    def __init__(self):
+        self.plugins: Dict[str, type] = {}
+        self.commands: Dict[str, Tuple[type, Dict[str, Any]]] = {}
+        self.errors: Dict[str, str] = {}
+        self._modules: set = set()
+        self._entry_points_loaded = False
+        self._ready = threading.Event()
+        self._ready.set()
+        self._lock = threading.RLock()
+    
+    def register(self, plugin_cls: type) -> type:
+        """Реєстрація класу плагіна (можна як декоратор)"""
+        with self._lock:
+            self.plugins[plugin_cls.name] = plugin_cls
+            for name, spec in plugin_cls.command_specs().items():
+                owner = self.commands.get(name)
+                if owner is not None and owner[0] is not plugin_cls:
+                    logging.warning(f"Command '{name}' of plugin {plugin_cls.name} shadows {owner[0].name}")
+                self.commands[name] = (plugin_cls, spec)
+        return plugin_cls
+    
+    def discover(self, modules: List[str] = None):
+        """Імпорт модулів плагінів (Config.PLUGIN_MODULES); класи реєструються декоратором register"""
+        for module_name in Config.PLUGIN_MODULES if modules is None else modules:
+            if module_name in self._modules:
+                continue
+            self._modules.add(module_name)
+            try:
+                importlib.import_module(module_name)
+            except ImportError as e:
+                self.errors[module_name] = str(e)
+                logging.warning(f"Plugin module {module_name} not loaded: {e}")
+    
+    def _load_entry_points(self):
+        """Сторонні пакети з entry points групи ai_agent.plugins - лише при першому промаху"""
+        self._entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points(group=self.ENTRY_POINT_GROUP)
+        except Exception as e:
+            logging.warning(f"Plugin entry points unavailable: {e}")
+            return
+        for entry in found:
+            try:
+                loaded = entry.load()
+            except Exception as e:
+                self.errors[entry.name] = str(e)
+                logging.warning(f"Plugin entry point {entry.name} failed: {e}")
+                continue
+            if isinstance(loaded, type) and issubclass(loaded, CommandPlugin) and loaded.name not in self.plugins:
+                self.register(loaded)
+    
+    def load_in_background(self, agent: "AIAgent"):
+        """discover + autoload у фоновому потоці, щоб запрошення з'являлося без очікування на плагіни"""
+        self._ready.clear()
+        
+        def run():
+            try:
+                self.discover()
+                self.autoload(agent)
+            finally:
+                self._ready.set()
+        
+        threading.Thread(target=run, name="plugin-loader", daemon=True).start()
+    
+    def lookup(self, name: str) -> Optional[Tuple[type, Dict[str, Any]]]:
+        # Команда, введена ще до завершення фонового завантаження, чекає на нього, а не йде в LLM
+        self._ready.wait()
+        found = self.commands.get(name)
+        if found is None and not self._entry_points_loaded:
+            with self._lock:
+                if not self._entry_points_loaded:
+                    self._load_entry_points()
+            found = self.commands.get(name)
+        return found
+    
+    def instance(self, agent: "AIAgent", plugin_cls: type) -> CommandPlugin:
+        """Екземпляр плагіна для агента (створюється один раз, потокобезпечно)"""
+        plugin = agent.plugins.get(plugin_cls.name)
+        if plugin is None:
+            with self._lock:
+                plugin = agent.plugins.get(plugin_cls.name)
+                if plugin is None:
+                    start = time.perf_counter()
+                    plugin = agent.plugins[plugin_cls.name] = plugin_cls(agent)
+                    logging.info(f"Plugin {plugin_cls.name} loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return plugin
+    
+    def unload(self, agent: "AIAgent", name: str = None):
+        """Закрити один (або всі) плагіни агента; наступна команда створить екземпляр заново"""
+        with self._lock:
+            names = [name] if name is not None else list(agent.plugins)
+            plugins = [agent.plugins.pop(key) for key in names if key in agent.plugins]
+        for plugin in plugins:
+            try:
+                plugin.close()
+            except Exception as e:
+                logging.error(f"Plugin {plugin.name} failed to close: {e}")
+    
+    def autoload(self, agent: "AIAgent"):
+        for plugin_cls in list(self.plugins.values()):
+            if plugin_cls.autoload:
+                try:
+                    self.instance(agent, plugin_cls)
+                except Exception as e:
+                    self.errors[plugin_cls.name] = str(e)
+                    logging.error(f"Plugin {plugin_cls.name} failed to start: {e}")
+    
+    def dispatch(self, agent: "AIAgent", name: str, args: List[str]) -> Optional[str]:
+        """Виконати команду плагіна; None - якщо такої команди немає"""
+        found = self.lookup(name)
+        if found is None:
+            return None
+        plugin_cls, spec = found
+        try:
+            return getattr(self.instance(agent, plugin_cls), spec["method"])(args)
+        except Exception as e:
+            logging.error(f"Plugin command {name} failed: {e}")
+            return f"❌ Помилка команди {name}: {e}"
+    
+    def usage(self, name: str) -> Optional[str]:
+        found = self.lookup(name)
+        if found is None:
+            return None
+        spec = found[1]
+        return f"{name} {spec['usage']}".strip() + (f" - {spec['summary']}" if spec["summary"] else "")
+    
+    def _sections(self, line: Callable[[str, Dict[str, Any]], str]) -> str:
+        self._ready.wait()
+        with self._lock:
+            if not self._entry_points_loaded:
+                self._load_entry_points()
+            plugins = list(self.plugins.values())
+        sections = []
+        for plugin_cls in plugins:
+            lines = [f"\n{plugin_cls.title or plugin_cls.name}:"]
+            lines += [line(name, spec) for name, spec in plugin_cls.command_specs().items()]
+            sections.append("\n".join(lines))
+        return "\n".join(sections)
+    
+    def help_text(self) -> str:
+        """Розділи довідки по зареєстрованих плагінах"""
+        def line(name, spec):
+            return f"- {(name + ' ' + spec['usage']).strip():<40} - {spec['summary']}"
+        text = self._sections(line)
+        if self.errors:
+            text += "\n\n⚠️ Не завантажено: " + "; ".join(f"{name}: {error}" for name, error in self.errors.items())
+        return text
+    
+    def tools_context(self) -> str:
+        """Ті самі команди для системного контексту LLM: назва + імена JSON-аргументів"""
+        def line(name, spec):
+            return f"- {name} {json.dumps(list(spec['params']), ensure_ascii=False)} - {spec['summary']}"
+        return self._sections(line)
+
+
+plugin_registry = PluginRegistry()
+
 # ============================================================================
 # ГОЛОВНИЙ АГЕНТ
 # ============================================================================
@@ -1398,18 +4504,136 @@ class AIAgent:
     """Головний AI-агент"""
     
     def __init__(self):
-        self.db = AgentDatabase()
-        self.lm_client = LMStudioClient(db=self.db)
-        self.fs_manager = AdvancedFileSystemManager(self.db)
-        self.app_manager = AdvancedApplicationManager(self.db)
-        self.sys_monitor = AdvancedSystemMonitor()
-        self.net_manager = AdvancedNetworkManager()
-        self.utilities = Utilities()
+        self.plugins: Dict[str, CommandPlugin] = {}
+        event_bus.subscribe("download.progress", self._print_download_progress)
+        event_bus.subscribe("fileop.progress", self._print_fileop_progress)
+        event_bus.subscribe("copy.progress", self._print_copy_progress)
+        for topic in ("copy.finished", "copy.failed", "copy.cancelled"):
+            event_bus.subscribe(topic, self._print_copy_done)
+        self._db_lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        plugin_registry.load_in_background(self)
+        # Історія процесів збирається з запуску - kill_frozen_apps вирішує за нею без очікування
+        process_tracker.start()
+        startup_profile.mark("AIAgent створено")
+    
+    # БД і менеджери створюються при першому зверненні, а не до першого запиту
+    @functools.cached_property
+    def db(self) -> AgentDatabase:
+        # Плагіни відкривають БД з фонового потоку - друге з'єднання не потрібне
+        with self._db_lock:
+            if "db" not in self.__dict__:
+                db = self.__dict__["db"] = AgentDatabase()
+                tracer.attach(db)
+            return self.__dict__["db"]
+    
+    @functools.cached_property
+    def lm_client(self) -> LMStudioClient:
+        return LMStudioClient(db=self.db)
+    
+    @functools.cached_property
+    def fs_manager(self) -> AdvancedFileSystemManager:
+        return AdvancedFileSystemManager(self.db)
+    
+    @functools.cached_property
+    def app_manager(self) -> AdvancedApplicationManager:
+        return AdvancedApplicationManager(self.db)
+    
+    @functools.cached_property
+    def sys_monitor(self) -> AdvancedSystemMonitor:
+        return AdvancedSystemMonitor()
+    
+    @functools.cached_property
+    def net_manager(self) -> AdvancedNetworkManager:
+        return AdvancedNetworkManager()
+    
+    @functools.cached_property
+    def utilities(self) -> Utilities:
+        return Utilities()
+    
+    def notify(self, message: str):
+        """Повідомлення фонової задачі в консоль: окремим рядком, не перемежовуючись з іншими"""
+        with self._output_lock:
+            print(f"\n{message}", flush=True)
+    
+    @staticmethod
+    def _print_download_progress(topic: str, event: Dict[str, Any]):
+        """Прогрес завантаження в одному рядку консолі"""
+        if event["percent"] is not None:
+            print(f"\r⬇️ Завантаження: {event['percent']:.1f}% ({event['speed_mbps']} MB/s)", end='', flush=True)
+        else:
+            print(f"\r⬇️ Завантажено: {event['downloaded'] / 1024 / 1024:.1f} MB", end='', flush=True)
+    
+    @staticmethod
+    def _print_fileop_progress(topic: str, event: Dict[str, Any]):
+        """Прогрес пакетної файлової операції в одному рядку консолі"""
+        if event["done"] < event["total"]:
+            print(f"\r📦 {event['done']}/{event['total']} ({event['percent']:.1f}%, {event['speed_mbps']} MB/s)",
+                  end='', flush=True)
+        else:
+            print("\r" + " " * 60 + "\r", end='', flush=True)
+    
+    @staticmethod
+    def _print_copy_progress(topic: str, event: Dict[str, Any]):
+        """Прогрес великого копіювання в одному рядку; фонові завдання не перебивають введення"""
+        if event["job_id"]:
+            return
+        if event["copied"] < event["size"]:
+            print(f"\r📀 Копіювання: {event['percent']:.1f}% ({event['speed_mbps']} MB/s)", end='', flush=True)
+        else:
+            print("\r" + " " * 60 + "\r", end='', flush=True)
+    
+    def _print_copy_done(self, topic: str, event: Dict[str, Any]):
+        """Завершення фонового копіювання"""
+        if not event.get("job_id"):
+            return
+        if topic == "copy.finished":
+            self.notify(f"✅ Копіювання {event['job_id']} завершено: {event['path']} "
+                        f"({event['size'] / 1024 / 1024:.2f} MB, {event['speed_mbps']} MB/s)")
+        else:
+            self.notify(f"{'⏹️' if topic == 'copy.cancelled' else '❌'} Копіювання {event['job_id']}: {event['error']}")
     
     @staticmethod
     def _json(data: Any) -> str:
         return json.dumps(data, ensure_ascii=False, indent=2)
     
+    @staticmethod
+    def _format_process_report(title: str, res: Dict[str, Any], limit: int = 20) -> str:
+        """Підсумок масової операції над процесами: лічильники та перші рядки звіту"""
+        labels = {
+            "terminated": "завершено", "killed": "вбито", "already_gone": "вже не було",
+            "access_denied": "немає доступу", "zombie": "зомбі", "alive": "не завершились"
+        }
+        counts = ", ".join(f"{labels.get(k, k)}: {v}" for k, v in res["counts"].items())
+        lines = [f"{title} ({res['matched']} за {res['elapsed']} с): {counts}"]
+        for o in res["processes"][:limit]:
+            lines.append(f"  {o['pid']}: {o['name']} - {labels.get(o['outcome'], o['outcome'])}")
+        if res["matched"] > limit:
+            lines.append(f"  ... ще {res['matched'] - limit}")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _format_file_batch(res: Dict[str, Any], limit: int = 10) -> str:
+        """Підсумок пакетної файлової операції (або план для --dry-run)"""
+        title = {"copy": "📄 Копіювання", "move": "🔀 Переміщення", "delete": "🗑️ Видалення"}[res["action"]]
+        size = f"{res['bytes'] / 1024 / 1024:.2f} MB"
+        if not res["dry_run"] and "elapsed" not in res:
+            lines = [res.get("error") or f"⏭️ Нічого не змінено: усі {len(res['skipped'])} цілей уже існують"]
+        elif res["dry_run"]:
+            lines = [f"🔎 План: {title.split(' ', 1)[1].lower()} {res['planned']} об'єкт(ів), {size} "
+                     f"(пропущено {len(res['skipped'])}, помилок {len(res['errors'])})"]
+            lines += [f"  {op['src']}" + (f" → {op['dst']}" if op["dst"] else "") for op in res["operations"][:limit]]
+        else:
+            methods = ", ".join(f"{k}: {v}" for k, v in res["methods"].items())
+            lines = [f"{title}: {res['done']}/{res['planned']}, {size} за {res['elapsed']} с "
+                     f"({res['speed_mbps']} MB/s, потоків {res['workers']}; {methods})"]
+            if res["skipped"]:
+                lines.append(f"  ⏭️ Пропущено (ціль існує): {len(res['skipped'])}")
+        lines += [f"  ❌ {e['path']}: {e['error']}" for e in res["errors"][:limit]]
+        if len(res["errors"]) > limit:
+            lines.append(f"  ... ще {len(res['errors']) - limit}")
+        return "\n".join(lines)
+    
     def handle_direct_command(self, user_input: str) -> Optional[str]:
         """
         Обробка явних команд (read_file, system_info, search_files тощо).
@@ -1431,22 +4655,25 @@ class AIAgent:
         # Якщо перше слово не схоже на ім'я команди — вважаємо, що це не команда
         known_commands = {
             "read_file", "search_files", "open_file", "copy_file", "move_file",
-            "delete_file", "create_folder", "list_directory", "file_info",
+            "delete_file", "copy_files", "move_files", "delete_files",
+            "copy_large", "copy_jobs", "copy_cancel",
+            "create_folder", "list_directory", "file_info",
             "search_in_files", "get_file_hash", "find_large_files", "find_duplicates",
             "analyze_folder", "index_directory",
             "list_programs", "launch_program", "close_program",
-            "list_processes", "process_info", "kill_process",
+            "list_processes", "process_info", "process_tree", "app_usage", "kill_process", "kill_processes",
             "system_info", "cpu_info", "memory_info", "disk_info",
             "network_info", "battery_info",
-            "check_internet", "download_file", "open_webpage", "ping",
+            "check_internet", "download_file", "open_webpage", "ping", "check_hosts",
             "get_ip_info", "list_network_connections",
             "remember", "recall", "forget", "show_memory", "command_history",
             "calculator", "generate_password", "hash_text", "current_time",
+            "perf_report",
             "help", "about"
         }
         
         if cmd not in known_commands:
-            return None
+            return plugin_registry.dispatch(self, cmd, args)
         
         # --- ФАЙЛОВА СИСТЕМА ---
         if cmd == "read_file":
@@ -1511,6 +4738,65 @@ class AIAgent:
             res = self.fs_manager.delete_file(args[0])
             return res.get("message") if res.get("success") else res.get("error", "❌ Помилка")
         
+        if cmd == "copy_large":
+            options = {a[2:].split("=", 1)[0]: a.split("=", 1)[1] if "=" in a else True
+                       for a in args if a.startswith("--")}
+            paths = [a.strip('"') for a in args if not a.startswith("--")]
+            if len(paths) < 2:
+                return "❌ Використання: copy_large <джерело> <призначення> [sha256[:хеш]] [--limit=MB/s] [--wait]"
+            try:
+                limit = float(options["limit"]) if "limit" in options else None
+            except ValueError:
+                return "❌ --limit має бути числом (MB/s)"
+            res = self.fs_manager.copy_large_file(paths[0], paths[1], paths[2] if len(paths) > 2 else None,
+                                                  limit_mbps=limit, background="wait" not in options)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            if "job_id" in res:
+                return res["message"]
+            return f"{res['message']}\n📦 {res['size'] / 1024 / 1024:.2f} MB за {res['elapsed']} с ({res['speed_mbps']} MB/s, {res['method']})"
+        
+        if cmd == "copy_jobs":
+            jobs = self.fs_manager.copy_jobs_status()["jobs"]
+            if not jobs:
+                return "📦 Фонових копіювань немає"
+            icons = {"running": "⏳", "finished": "✅", "failed": "❌", "cancelled": "⏹️"}
+            return "\n".join(
+                f"{icons[j['status']]} {j['job_id']} {j['source']} → {j['destination']} ({j['started']})"
+                + (f"\n   {(j['result'].get('message') or j['result'].get('error')).splitlines()[0]}" if j["result"] else "")
+                for j in jobs
+            )
+        
+        if cmd == "copy_cancel":
+            if not args:
+                return "❌ Використання: copy_cancel <id>"
+            res = self.fs_manager.cancel_copy(args[0])
+            return res.get("message") if res.get("success") else res.get("error", "❌ Помилка")
+        
+        if cmd in ("copy_files", "move_files", "delete_files"):
+            action = cmd[:-len("_files")]
+            options = {a[2:].split("=", 1)[0]: a.split("=", 1)[1] if "=" in a else True
+                       for a in args if a.startswith("--")}
+            # Лапки лишаються після shlex(posix=False) - шаблони в лапках, щоб shell їх не розгортав
+            paths = [a[1:-1] if len(a) > 1 and a[0] == a[-1] and a[0] in "\"'" else a
+                     for a in args if not a.startswith("--")]
+            if len(paths) < (1 if action == "delete" else 2):
+                target = "" if action == "delete" else " <куди>"
+                return (f"❌ Використання: {cmd} <шляхи або шаблони...>{target} [--dry-run]"
+                        + ("" if action == "delete" else " [--conflict=skip|overwrite|rename]"))
+            try:
+                workers = int(options["workers"]) if "workers" in options else None
+            except ValueError:
+                return "❌ --workers має бути числом"
+            res = self.fs_manager.batch_file_operation(
+                action, paths if action == "delete" else paths[:-1],
+                None if action == "delete" else paths[-1],
+                conflict=options.get("conflict"), dry_run=bool(options.get("dry-run")), workers=workers
+            )
+            if "planned" not in res:
+                return res.get("error", "❌ Помилка")
+            return self._format_file_batch(res)
+        
         if cmd == "create_folder":
             if not args:
                 return "❌ Вкажіть шлях до папки. Приклад: create_folder \"C:\\НоваПапка\""
@@ -1644,7 +4930,7 @@ class AIAgent:
             res = self.app_manager.close_program(" ".join(args))
             if not res.get("success"):
                 return res.get("error", "❌ Помилка")
-            return "✅ Закрито процеси:\n" + "\n".join(res.get("terminated", []))
+            return self._format_process_report("✅ Закрито процеси", res)
         
         if cmd == "list_processes":
             sort_by = "cpu"
@@ -1674,16 +4960,61 @@ class AIAgent:
                 return res.get("error", "❌ Помилка")
             return "ℹ️ Інформація про процес:\n" + self._json(res["info"])
         
+        if cmd == "process_tree":
+            if not args:
+                return "❌ Використання: process_tree <pid або частина назви>"
+            res = self.app_manager.process_tree(args[0])
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            
+            lines = []
+            def walk(node, depth):
+                lines.append(
+                    f"{'  ' * depth}{'└─ ' if depth else ''}{node['name']} (PID {node['pid']}) | "
+                    f"CPU {node['cpu']}% | RAM {node['rss'] / 1024**2:.1f} MB"
+                    + (f" | разом: CPU {node['total_cpu']}%, RAM {node['total_rss'] / 1024**2:.1f} MB" if node['children'] else "")
+                )
+                for child in node['children']:
+                    walk(child, depth + 1)
+            for tree in res["trees"]:
+                walk(tree, 0)
+            return "🌳 Дерево процесів:\n" + "\n".join(lines)
+        
+        if cmd == "app_usage":
+            sort_by = args[0] if args and args[0] in ("cpu", "memory") else "cpu"
+            try:
+                limit = int(args[1]) if len(args) >= 2 else 15
+            except ValueError:
+                return "❌ Обмеження (limit) має бути числом."
+            res = self.sys_monitor.app_usage(sort_by=sort_by, limit=limit)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            lines = [
+                f"{app['name']} ×{app['processes']} | CPU {app['cpu']}% | RAM {app['rss'] / 1024**2:.1f} MB | потоків {app['threads']}"
+                for app in res["apps"]
+            ]
+            return f"📦 Ресурси за програмами (сортування: {sort_by}):\n" + "\n".join(lines)
+        
         if cmd == "kill_process":
             if not args:
-                return "❌ Використання: kill_process <pid>"
+                return "❌ Використання: kill_process <pid> [tree]"
             try:
                 pid = int(args[0])
             except ValueError:
                 return "❌ PID має бути числом."
-            res = self.app_manager.kill_process(pid)
+            res = self.app_manager.kill_process(pid, tree=len(args) > 1 and args[1].lower() == "tree")
             return res.get("message") if res.get("success") else res.get("error", "❌ Помилка")
         
+        if cmd == "kill_processes":
+            if not args:
+                return "❌ Використання: kill_processes <назва | re:шаблон | user:ім'я | pid> [tree]"
+            tree = len(args) > 1 and args[-1].lower() == "tree"
+            selector = " ".join(args[:-1] if tree else args)
+            res = self.app_manager.terminate_processes(selector, tree=tree)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            return self._format_process_report("🛑 Завершено процеси", res)
+        
         # --- СИСТЕМА ---
         if cmd == "system_info":
             res = self.sys_monitor.get_system_info()
@@ -1732,9 +5063,11 @@ class AIAgent:
         
         if cmd == "download_file":
             if len(args) < 2:
-                return "❌ Використання: download_file <url> <шлях_для_збереження>"
-            res = self.net_manager.download_file(args[0], args[1])
-            return res.get("message") if res.get("success") else res.get("error", "❌ Помилка")
+                return "❌ Використання: download_file <url> <шлях_для_збереження> [контрольна_сума]"
+            res = self.net_manager.download_file(args[0], args[1], checksum=args[2] if len(args) > 2 else None)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            return f"{res['message']}\n📦 {res['size']} за {res['elapsed']} с ({res['speed']}, сегментів: {res['segments']})"
         
         if cmd == "open_webpage":
             if not args:
@@ -1759,6 +5092,38 @@ class AIAgent:
             status = "✅ Доступний" if reachable else "⚠️ Недоступний"
             return f"{status} хост {host}:\n{res.get('output', '')}"
         
+        if cmd == "check_hosts":
+            if not args:
+                return "❌ Використання: check_hosts <хост | хост:порт | http(s)://url | icmp:хост | @файл> ..."
+            targets = []
+            for arg in args:
+                if arg.startswith("@"):
+                    try:
+                        with open(arg[1:], 'r', encoding='utf-8') as f:
+                            targets.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+                    except OSError as e:
+                        return f"❌ Не вдалося прочитати список цілей: {e}"
+                else:
+                    targets.append(arg)
+            res = self.net_manager.check_hosts(targets)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            
+            lines = [
+                f"📡 Перевірено {res['targets']} цілей за {res['elapsed']} с: "
+                f"✅ {res['reachable']}, ⚠️ {res['unreachable']}" + ("" if res["icmp"] else " (ICMP недоступний, хости без порту - TCP:80)")
+            ]
+            for r in sorted(res["results"], key=lambda r: (r["reachable"], r["target"])):
+                if r["reachable"]:
+                    status = f" HTTP {r['status']}" if "status" in r else ""
+                    lines.append(
+                        f"✅ {r['target']} [{r['kind']}]{status}: min {r['min_ms']} / avg {r['avg_ms']} / "
+                        f"p95 {r['p95_ms']} мс, втрати {r['loss']}%"
+                    )
+                else:
+                    lines.append(f"⚠️ {r['target']} [{r['kind']}]: {r.get('error', 'недоступний')}")
+            return "\n".join(lines)
+        
         if cmd == "get_ip_info":
             res = self.net_manager.get_ip_info()
             if not res.get("success"):
@@ -2052,6 +5417,35 @@ class AIAgent:
                 return "❌ Помилка отримання часу"
             return f"⏰ Поточний час: {res['datetime']} (TZ: {res['timezone']})"
         
+        # --- ПРОДУКТИВНІСТЬ ---
+        if cmd == "perf_report":
+            command = None
+            hours = None
+            for arg in args:
+                if arg.isdigit():
+                    hours = int(arg)
+                else:
+                    command = arg.lower()
+            res = tracer.report(command=command, hours=hours)
+            if not res.get("success"):
+                return res.get("error", "❌ Помилка")
+            spans = res.get("spans", [])
+            if not spans:
+                return f"ℹ️ Немає метрик за останні {res['hours']} год."
+            title = f"span-и команди {command}" if command else "команди"
+            lines = [
+                f"- {s['name']}: n={s['count']} | p50 {s['p50_ms']} ms | p95 {s['p95_ms']} ms | "
+                f"p99 {s['p99_ms']} ms | CPU {s['avg_cpu_ms']} ms"
+                for s in spans[:30]
+            ]
+            llm = res["llm"]
+            if llm["requests"]:
+                lines.append(
+                    f"\n🧠 LLM: {llm['requests']} запит(ів), токени {llm['prompt_tokens']} → "
+                    f"{llm['completion_tokens']}, {llm['avg_tokens_per_sec']} ток/с"
+                )
+            return f"📈 Продуктивність ({title}, {res['hours']} год):\n" + "\n".join(lines)
+        
         # --- ДОВІДКА / ІНФО ---
         if cmd == "help":
             if not args:
@@ -2063,6 +5457,10 @@ class AIAgent:
                     "- copy_file <src> <dst>\n"
                     "- move_file <src> <dst>\n"
                     "- delete_file <шлях>\n"
+                    "- copy_files / move_files <шаблони...> <куди> [--conflict=...] [--dry-run]\n"
+                    "- delete_files <шаблони...> [--dry-run]\n"
+                    "- copy_large <src> <dst> [sha256[:хеш]] [--limit=MB/s] [--wait]\n"
+                    "- copy_jobs / copy_cancel <id>\n"
                     "- create_folder <шлях>\n"
                     "- list_directory <шлях>\n"
                     "- file_info <шлях>\n"
@@ -2078,7 +5476,10 @@ class AIAgent:
                     "- close_program <назва>\n"
                     "- list_processes [cpu|memory] [limit]\n"
                     "- process_info <pid>\n"
-                    "- kill_process <pid>\n"
+                    "- process_tree <pid|назва>\n"
+                    "- app_usage [cpu|memory] [limit]\n"
+                    "- kill_process <pid> [tree]\n"
+                    "- kill_processes <назва|re:шаблон|user:ім'я> [tree]\n"
                     "\n💻 Система:\n"
                     "- system_info\n"
                     "- cpu_info\n"
@@ -2088,9 +5489,10 @@ class AIAgent:
                     "- battery_info\n"
                     "\n🌐 Мережа:\n"
                     "- check_internet\n"
-                    "- download_file <url> <шлях>\n"
+                    "- download_file <url> <шлях> [хеш]\n"
                     "- open_webpage <url>\n"
                     "- ping <хост>\n"
+                    "- check_hosts <хост:порт | url | @файл> ...\n"
                     "- get_ip_info\n"
                     "- list_network_connections\n"
                     "\n🧠 Пам'ять:\n"
@@ -2104,10 +5506,15 @@ class AIAgent:
                     "- generate_password [довжина]\n"
                     "- hash_text <текст>\n"
                     "- current_time\n"
+                    "\n📈 Продуктивність:\n"
+                    "- perf_report [команда] [години]\n"
                     "\nℹ️ Інше:\n"
                     "- about\n"
                     "- exit"
-                )
+                ) + plugin_registry.help_text()
+            usage = plugin_registry.usage(args[0].lower())
+            if usage:
+                return f"ℹ️ {usage}"
             return f"ℹ️ Довідка по команді {args[0]}: (тут має бути детальний опис, але поки див. загальний help)"
 
         if cmd == "about":
@@ -2147,6 +5554,11 @@ class AIAgent:
                     elif func_name == "list_directory" and "path" in args:
                         return self.handle_direct_command(f"list_directory {args['path']}")
                     
+                    found = plugin_registry.lookup(func_name)
+                    if found is not None:
+                        values = [str(args[param]) for param in found[1]["params"] if param in args]
+                        return plugin_registry.dispatch(self, func_name, values)
+                    
                     return f"✅ Команда '{func_name}' розпізнана: {json_args}"
                     
                 except json.JSONDecodeError:
@@ -2166,6 +5578,8 @@ class AIAgent:
         print("💡 Введіть команду або запит звичайною мовою.")
         print("💡 Введіть 'help' для списку команд або 'exit' для виходу.")
         print("-" * 60)
+        if startup_profile.enabled:
+            print(startup_profile.report())
 
         while True:
             try:
@@ -2175,24 +5589,33 @@ class AIAgent:
                     continue
                 
                 if user_input.lower() in ('exit', 'quit', 'вихід'):
+                    plugin_registry.unload(self)
                     print("👋 До побачення!")
                     break
                 
-                # Спробуємо виконати як пряму команду
-                direct_result = self.handle_direct_command(user_input)
-                
-                if direct_result:
-                    print(f"\n🤖 Агент:\n{direct_result}")
-                else:
-                    # Якщо це не пряма команда - відправляємо в LLM
-                    print("\n⏳ Думаю...", end="", flush=True)
-                    response = self.lm_client.send_message(user_input)
-                    # Очищаємо рядок "Думаю..."
-                    print("\r" + " " * 20 + "\r", end="", flush=True)
+                # Час команди міряємо окремо: при вимкненому трасуванні span порожній
+                started = time.perf_counter()
+                with tracer.trace(command_name(user_input)) as root:
+                    # Спробуємо виконати як пряму команду
+                    direct_result = self.handle_direct_command(user_input)
                     
-                    # Обробляємо відповідь на наявність функцій
-                    processed_response = self.process_llm_response(response)
-                    print(f"🤖 Агент:\n{processed_response}")
+                    if direct_result:
+                        output = direct_result
+                        print(f"\n🤖 Агент:\n{direct_result}")
+                    else:
+                        # Якщо це не пряма команда - відправляємо в LLM
+                        root.name = "chat"
+                        print("\n⏳ Думаю...", end="", flush=True)
+                        response = self.lm_client.send_message(user_input)
+                        # Очищаємо рядок "Думаю..."
+                        print("\r" + " " * 20 + "\r", end="", flush=True)
+                        
+                        # Обробляємо відповідь на наявність функцій
+                        output = self.process_llm_response(response)
+                        print(f"🤖 Агент:\n{output}")
+                    
+                    success = root.success = not is_error_result(output)
+                    self.db.log_command(user_input, output[:500], success, time.perf_counter() - started)
                     
             except KeyboardInterrupt:
                 print("\n👋 Перервано користувачем. До побачення!")
@@ -2200,8 +5623,14 @@ class AIAgent:
             except Exception as e:
                 logging.error(f"Критична помилка: {str(e)}")
                 print(f"\n❌ Сталася помилка: {str(e)}")
+        
+        process_tracker.stop()
+
+startup_profile.mark("ai_agent імпортовано")
 
 if __name__ == "__main__":
+    # Плагіни роблять "from ai_agent import ..." - без цього вони отримали б другу копію модуля
+    sys.modules.setdefault("ai_agent", sys.modules[__name__])
     setup_logging()
     try:
         agent = AIAgent()
@@ -30,10 +30,16 @@ import secrets
 import string
 import smtplib
 import winreg
+import zlib
+import struct
+import fnmatch
+import hmac
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Tuple
-from collections import defaultdict
+from collections import defaultdict, deque
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -56,6 +62,25 @@ try:
 except ImportError:
     PLYER_AVAILABLE = False
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.exceptions import InvalidTag
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # ============================================================================
 # РОЗШИРЕНА КОНФІГУРАЦІЯ
 # ============================================================================
@@ -99,6 +124,12 @@ class Config:
     MAX_SEARCH_RESULTS = 100
     MAX_HISTORY_MESSAGES = 50
     
+    # Розпакування архівів (захист від zip-бомб)
+    ARCHIVE_MAX_TOTAL_SIZE = 20 * 1024 * 1024 * 1024  # 20 ГБ розпакованих даних
+    ARCHIVE_MAX_MEMBERS = 100_000
+    ARCHIVE_MAX_RATIO = 200  # 0 - не перевіряти
+    ARCHIVE_RATIO_MIN_SIZE = 256 * 1024 * 1024  # коефіцієнт важить лише для елементів, більших за 256 МБ
+    
     # Автоматизація
     SCHEDULE_CHECK_INTERVAL = 60  # секунд
     AUTO_CLEANUP_DAYS = 30
@@ -552,6 +583,600 @@ to=functions.<команда> <|message|>{{JSON_аргументи}}
         """Очищення історії"""
         self.conversation_history = []
 
+# ============================================================================
+# ПАРАЛЕЛЬНЕ СТИСНЕННЯ АРХІВІВ
+# ============================================================================
+
+# Уже стиснені формати: deflate їх не зменшить, лише витратить час
+STORED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.aac', '.ogg', '.flac', '.m4a', '.opus',
+    '.mp4', '.mkv', '.avi', '.mov', '.webm', '.wmv',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar',
+    '.docx', '.xlsx', '.pptx', '.jar', '.apk', '.whl'
+}
+
+
+def _deflate_block(data: bytes, history: bytes, level: int) -> bytes:
+    """Сирий deflate одного блоку; history - останні 32 КБ попереднього блоку як словник"""
+    if history:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, history)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9)
+    # SYNC_FLUSH вирівнює потік по байту, тож блоки можна просто склеїти
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ParallelDeflater:
+    """Стиснення потоку блоками на пулі потоків (як pigz); результат - один валідний deflate-потік"""
+    
+    BLOCK_SIZE = 1024 * 1024
+    HISTORY = 32 * 1024
+    
+    def __init__(self, level: int = 6, workers: int = None):
+        self.level = level
+        self.workers = workers or os.cpu_count() or 2
+        self.depth = self.workers * 2
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        # Порожній фінальний блок (BFINAL=1) закриває склеєний потік
+        self.terminator = zlib.compressobj(level, zlib.DEFLATED, -15).flush()
+    
+    def submit(self, data: bytes, history: bytes):
+        """Завдання на стиснення блоку; zlib відпускає GIL, тож потоки працюють паралельно"""
+        return self.pool.submit(_deflate_block, data, history, self.level)
+    
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class ParallelGzipWriter:
+    """Файлоподібний gzip-потік: блоки стискаються паралельно, порядок запису зберігається"""
+    
+    def __init__(self, fileobj, deflater: ParallelDeflater):
+        self.fileobj = fileobj
+        self.deflater = deflater
+        self.crc = 0
+        self.size = 0
+        self._buffer = bytearray()
+        self._history = b""
+        self._pending = deque()
+        # Заголовок gzip: magic, deflate, без прапорців, mtime=0, OS=unknown
+        self.fileobj.write(b"\x1f\x8b\x08\x00" + struct.pack("<L", 0) + b"\x00\xff")
+    
+    def _submit(self, data: bytes):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self._pending.append(self.deflater.submit(data, self._history))
+        self._history = (self._history + data)[-ParallelDeflater.HISTORY:]
+        while len(self._pending) > self.deflater.depth:
+            self.fileobj.write(self._pending.popleft().result())
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= ParallelDeflater.BLOCK_SIZE:
+            block = bytes(self._buffer[:ParallelDeflater.BLOCK_SIZE])
+            del self._buffer[:ParallelDeflater.BLOCK_SIZE]
+            self._submit(block)
+        return len(data)
+    
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().result())
+        self.fileobj.write(self.deflater.terminator)
+        self.fileobj.write(struct.pack("<LL", self.crc, self.size & 0xFFFFFFFF))
+
+
+class ParallelZipWriter:
+    """Потоковий запис .zip: блоки файлів стискаються на пулі, заголовки дописуються після даних (з ZIP64)"""
+    
+    LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+    CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+    END_RECORD = struct.Struct("<4s4H2LH")
+    ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+    ZIP64_LOCATOR = struct.Struct("<4sLQL")
+    # Як у zipfile: з 2 ГБ переходимо на ZIP64 із запасом на можливе зростання при стисненні
+    ZIP64_LIMIT = (1 << 31) - 1
+    MAX_32 = 0xFFFFFFFF
+    
+    def __init__(self, path: str, deflater: ParallelDeflater, mode: str = "auto"):
+        self.file = open(path, "wb")
+        self.deflater = deflater
+        self.mode = mode
+        self.entries: List[Dict[str, Any]] = []
+        self.bytes_in = 0
+        self.skipped: List[str] = []
+        self._system = 0 if sys.platform == "win32" else 3
+    
+    @staticmethod
+    def _dos_time(timestamp: float) -> Tuple[int, int]:
+        t = time.localtime(max(timestamp, 315532800))  # не раніше 1980-01-01
+        dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        return dos_time, dos_date
+    
+    def _should_store(self, arcname: str) -> bool:
+        if self.mode == "store":
+            return True
+        if self.mode == "deflate":
+            return False
+        return os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS
+    
+    def _events(self, items: List[Tuple[str, str]]):
+        """Читання файлів і постановка блоків у пул; записувач споживає події по порядку"""
+        for path, arcname in items:
+            if path is None:
+                yield "dir", {"name": arcname, "mtime": time.time(), "mode": 0o40775}
+                continue
+            try:
+                f = open(path, "rb")
+                st = os.fstat(f.fileno())
+            except OSError as e:
+                self.skipped.append(f"{arcname}: {e}")
+                continue
+            entry = {"name": arcname, "mtime": st.st_mtime, "mode": st.st_mode & 0xFFFF,
+                     "stored": self._should_store(arcname), "zip64": st.st_size > self.ZIP64_LIMIT,
+                     "crc": 0, "size": 0}
+            yield "begin", entry
+            history = b""
+            with f:
+                while True:
+                    block = f.read(ParallelDeflater.BLOCK_SIZE)
+                    if not block:
+                        break
+                    entry["crc"] = zlib.crc32(block, entry["crc"])
+                    entry["size"] += len(block)
+                    if entry["stored"]:
+                        yield "data", block
+                    else:
+                        yield "data", self.deflater.submit(block, history)
+                        history = (history + block)[-ParallelDeflater.HISTORY:]
+            if not entry["stored"]:
+                yield "data", self.deflater.terminator
+            yield "end", entry
+    
+    def _write_local_header(self, entry: Dict[str, Any]):
+        name = entry["name"].encode("utf-8")
+        flags = 0x800 if not entry["name"].isascii() else 0
+        dos_time, dos_date = self._dos_time(entry["mtime"])
+        extra = struct.pack("<2H2Q", 1, 16, 0, 0) if entry.get("zip64") else b""
+        entry["offset"] = self.file.tell()
+        entry["flags"] = flags
+        entry["method"] = zipfile.ZIP_STORED if entry.get("stored", True) else zipfile.ZIP_DEFLATED
+        entry["version"] = 45 if entry.get("zip64") else 20
+        entry["dos"] = (dos_time, dos_date)
+        size_field = self.MAX_32 if entry.get("zip64") else 0
+        self.file.write(self.LOCAL_HEADER.pack(
+            b"PK\x03\x04", entry["version"], flags, entry["method"], dos_time, dos_date,
+            0, size_field, size_field, len(name), len(extra)
+        ) + name + extra)
+        entry["data_start"] = self.file.tell()
+    
+    def _finish_entry(self, entry: Dict[str, Any]):
+        end = self.file.tell()
+        entry["compressed"] = end - entry["data_start"]
+        if not entry["zip64"] and max(entry["size"], entry["compressed"]) > self.MAX_32:
+            raise OverflowError(f"{entry['name']}: файл виріс під час архівації понад 4 ГБ")
+        # Дописуємо CRC і розміри в локальний заголовок, а для ZIP64 - у його extra-поле
+        self.file.seek(entry["offset"] + 14)
+        if entry["zip64"]:
+            self.file.write(struct.pack("<L", entry["crc"]))
+            self.file.seek(entry["offset"] + self.LOCAL_HEADER.size + len(entry["name"].encode("utf-8")) + 4)
+            self.file.write(struct.pack("<2Q", entry["size"], entry["compressed"]))
+        else:
+            self.file.write(struct.pack("<3L", entry["crc"], entry["compressed"], entry["size"]))
+        self.file.seek(end)
+        self.bytes_in += entry["size"]
+        self.entries.append(entry)
+    
+    def write_items(self, items: List[Tuple[str, str]]):
+        """items: (шлях, ім'я в архіві); шлях None - запис папки"""
+        window = deque()
+        
+        def consume(kind, payload):
+            if kind == "dir":
+                payload.update(stored=True, zip64=False, crc=0, size=0)
+                self._write_local_header(payload)
+                self._finish_entry(payload)
+            elif kind == "begin":
+                self._write_local_header(payload)
+            elif kind == "data":
+                self.file.write(payload if isinstance(payload, bytes) else payload.result())
+            else:
+                self._finish_entry(payload)
+        
+        for event in self._events(items):
+            window.append(event)
+            # Читання випереджає запис на depth блоків - у роботі весь пул
+            while len(window) > self.deflater.depth:
+                consume(*window.popleft())
+        while window:
+            consume(*window.popleft())
+    
+    def close(self):
+        """Центральний каталог і кінцеві записи (ZIP64, якщо перевищено ліміти)"""
+        cd_start = self.file.tell()
+        for entry in self.entries:
+            name = entry["name"].encode("utf-8")
+            extra_values = []
+            usize, csize, offset = entry["size"], entry["compressed"], entry["offset"]
+            if usize > self.ZIP64_LIMIT or entry["zip64"]:
+                extra_values.append(usize)
+                usize = self.MAX_32
+            if csize > self.ZIP64_LIMIT or entry["zip64"]:
+                extra_values.append(csize)
+                csize = self.MAX_32
+            if offset > self.ZIP64_LIMIT:
+                extra_values.append(offset)
+                offset = self.MAX_32
+            extra = struct.pack(f"<2H{len(extra_values)}Q", 1, 8 * len(extra_values), *extra_values) \
+                if extra_values else b""
+            version = 45 if extra_values else entry["version"]
+            attributes = (entry["mode"] << 16) | (0x10 if entry["name"].endswith("/") else 0)
+            self.file.write(self.CENTRAL_HEADER.pack(
+                b"PK\x01\x02", (self._system << 8) | version, version, entry["flags"], entry["method"],
+                entry["dos"][0], entry["dos"][1], entry["crc"], csize, usize,
+                len(name), len(extra), 0, 0, 0, attributes, offset
+            ) + name + extra)
+        
+        cd_end = self.file.tell()
+        count, cd_size = len(self.entries), cd_end - cd_start
+        if count >= 0xFFFF or cd_start > self.ZIP64_LIMIT or cd_size > self.ZIP64_LIMIT:
+            self.file.write(self.ZIP64_END_RECORD.pack(
+                b"PK\x06\x06", 44, 45, 45, 0, 0, count, count, cd_size, cd_start
+            ))
+            self.file.write(self.ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, cd_end, 1))
+        self.file.write(self.END_RECORD.pack(
+            b"PK\x05\x06", 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(cd_size, self.MAX_32), min(cd_start, self.MAX_32), 0
+        ))
+        self.file.close()
+
+
+# ============================================================================
+# РОЗПАКУВАННЯ АРХІВІВ
+# ============================================================================
+
+class ArchiveLimitError(Exception):
+    """Архів перевищує ліміти розміру, кількості елементів або коефіцієнта стиснення"""
+
+
+class ArchiveExtractor:
+    """Перегляд і вибіркове розпакування .zip/.tar: zip - паралельно, tar - потоково"""
+    
+    COPY_BUFFER = 1024 * 1024
+    
+    def __init__(self, max_total: int = None, max_members: int = None, max_ratio: float = None,
+                 workers: int = None):
+        self.max_total = max_total or Config.ARCHIVE_MAX_TOTAL_SIZE
+        self.max_members = max_members or Config.ARCHIVE_MAX_MEMBERS
+        self.max_ratio = Config.ARCHIVE_MAX_RATIO if max_ratio is None else max_ratio
+        self.workers = workers or min(8, os.cpu_count() or 2)
+        self._lock = threading.Lock()
+        self._written = 0
+    
+    @staticmethod
+    def kind(archive_path: str) -> Optional[str]:
+        """Тип за вмістом, а не за розширенням"""
+        if zipfile.is_zipfile(archive_path):
+            return "zip"
+        if tarfile.is_tarfile(archive_path):
+            return "tar"
+        return None
+    
+    @staticmethod
+    def matches(name: str, patterns: Optional[List[str]]) -> bool:
+        """Glob по повному імені в архіві або по імені файлу"""
+        if not patterns:
+            return True
+        base = name.rstrip("/").rsplit("/", 1)[-1]
+        return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(base, p) for p in patterns)
+    
+    @staticmethod
+    def safe_target(destination: str, name: str) -> str:
+        """Шлях призначення всередині destination (відсікає абсолютні шляхи і '..')"""
+        target = os.path.realpath(os.path.join(destination, name))
+        root = os.path.realpath(destination)
+        if target != root and not target.startswith(root + os.sep):
+            raise ArchiveLimitError(f"небезпечний шлях в архіві: {name}")
+        return target
+    
+    def list_entries(self, archive_path: str, patterns: List[str] = None) -> List[Dict[str, Any]]:
+        """Вміст архіву без розпакування (для zip - лише центральний каталог)"""
+        entries = []
+        if self.kind(archive_path) == "zip":
+            with zipfile.ZipFile(archive_path) as zf:
+                for info in zf.infolist():
+                    if self.matches(info.filename, patterns):
+                        entries.append({
+                            "name": info.filename,
+                            "size": info.file_size,
+                            "compressed": info.compress_size,
+                            "is_dir": info.is_dir(),
+                            "modified": datetime(*info.date_time).isoformat()
+                        })
+        else:
+            with tarfile.open(archive_path, 'r|*') as tar:
+                for member in tar:
+                    if self.matches(member.name, patterns):
+                        entries.append({
+                            "name": member.name,
+                            "size": member.size,
+                            "compressed": None,
+                            "is_dir": member.isdir(),
+                            "modified": datetime.fromtimestamp(member.mtime).isoformat()
+                        })
+        return entries
+    
+    def _reserve(self, size: int):
+        with self._lock:
+            self._written += size
+            if self._written > self.max_total:
+                raise ArchiveLimitError(
+                    f"розпаковано понад {self.max_total / 1024 ** 3:.1f} ГБ - схоже на zip-бомбу"
+                )
+    
+    def _check_zip(self, infos: List[zipfile.ZipInfo]):
+        """Перевірка за центральним каталогом - ще до читання даних"""
+        if len(infos) > self.max_members:
+            raise ArchiveLimitError(f"забагато елементів: {len(infos)} > {self.max_members}")
+        total = sum(info.file_size for info in infos)
+        if total > self.max_total:
+            raise ArchiveLimitError(f"заявлений розмір {total / 1024 ** 3:.1f} ГБ перевищує ліміт")
+        if not self.max_ratio:
+            return
+        for info in infos:
+            # Логи й текст легко стискаються в сотні разів - сам коефіцієнт без великого розміру не підозрілий
+            ratio = info.file_size / max(info.compress_size, 1)
+            if info.file_size > Config.ARCHIVE_RATIO_MIN_SIZE and ratio > self.max_ratio:
+                raise ArchiveLimitError(f"{info.filename}: коефіцієнт стиснення {ratio:.0f}x - схоже на zip-бомбу")
+    
+    def _extract_zip_member(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo, destination: str) -> int:
+        target = self.safe_target(destination, info.filename)
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            return 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        written = 0
+        # ZipExtFile не віддає більше file_size байт і перевіряє CRC, тож брехливий заголовок не пройде
+        with zf.open(info) as src, open(target, 'wb') as dst:
+            while True:
+                block = src.read(self.COPY_BUFFER)
+                if not block:
+                    break
+                self._reserve(len(block))
+                dst.write(block)
+                written += len(block)
+        mode = (info.external_attr >> 16) & 0o777
+        if mode:
+            os.chmod(target, mode)
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        os.utime(target, (mtime, mtime))
+        return written
+    
+    def _extract_zip_batch(self, archive_path: str, infos: List[zipfile.ZipInfo], destination: str) -> int:
+        # Окремий дескриптор на потік: ZipFile не можна читати з кількох потоків одночасно
+        with zipfile.ZipFile(archive_path) as zf:
+            return sum(self._extract_zip_member(zf, info, destination) for info in infos)
+    
+    def extract_zip(self, archive_path: str, destination: str, patterns: List[str] = None) -> Dict[str, Any]:
+        with zipfile.ZipFile(archive_path) as zf:
+            infos = [info for info in zf.infolist() if self.matches(info.filename, patterns)]
+        self._check_zip(infos)
+        
+        # Найбільші елементи першими, кожен у найменш завантажений кошик
+        batches = [[] for _ in range(min(self.workers, len(infos)) or 1)]
+        loads = [0] * len(batches)
+        for info in sorted(infos, key=lambda i: i.compress_size, reverse=True):
+            slot = loads.index(min(loads))
+            batches[slot].append(info)
+            loads[slot] += info.compress_size
+        
+        if len(batches) == 1:
+            written = self._extract_zip_batch(archive_path, batches[0], destination)
+        else:
+            with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+                written = sum(pool.map(
+                    lambda batch: self._extract_zip_batch(archive_path, batch, destination), batches
+                ))
+        return {"extracted": len(infos), "bytes": written}
+    
+    def extract_tar(self, source, destination: str, patterns: List[str] = None) -> Dict[str, Any]:
+        """Потокове розпакування tar (шлях або файловий об'єкт без seek): один прохід, без індексу"""
+        # Точні імена без glob-символів: зупиняємось, щойно всі знайдено
+        wanted = {p for p in patterns if not any(c in p for c in "*?[")} if patterns else None
+        exact_only = bool(patterns) and len(wanted) == len(patterns)
+        extracted, written = 0, 0
+        
+        if isinstance(source, str):
+            tar = tarfile.open(source, 'r|*')
+        else:
+            tar = tarfile.open(fileobj=source, mode='r|*')
+        with tar:
+            for member in tar:
+                if not self.matches(member.name, patterns):
+                    continue
+                extracted += 1
+                if extracted > self.max_members:
+                    raise ArchiveLimitError(f"забагато елементів: > {self.max_members}")
+                self.safe_target(destination, member.name)
+                if member.issym() or member.islnk():
+                    self.safe_target(destination, os.path.join(os.path.dirname(member.name), member.linkname)
+                                     if member.issym() else member.linkname)
+                if member.isfile():
+                    self._reserve(member.size)
+                    written += member.size
+                if hasattr(tarfile, "data_filter"):
+                    tar.extract(member, destination, filter="data")
+                else:
+                    tar.extract(member, destination)
+                if exact_only:
+                    wanted.discard(member.name)
+                    wanted.discard(member.name.rsplit("/", 1)[-1])
+                    if not wanted:
+                        break
+        return {"extracted": extracted, "bytes": written}
+    
+    def extract(self, source, destination: str, patterns: List[str] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        os.makedirs(destination, exist_ok=True)
+        if isinstance(source, str) and self.kind(source) == "zip":
+            result = self.extract_zip(source, destination, patterns)
+        else:
+            result = self.extract_tar(source, destination, patterns)
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+
+# ============================================================================
+# ШИФРУВАННЯ ФАЙЛІВ
+# ============================================================================
+
+def _xor_bytes(data: bytes, keystream: bytes) -> bytes:
+    """XOR двох рівних за довжиною буферів: векторно через numpy або одним великим цілим"""
+    if NUMPY_AVAILABLE:
+        return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8),
+                              np.frombuffer(keystream, dtype=np.uint8)).tobytes()
+    n = len(data)
+    return (int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")).to_bytes(n, "little")
+
+
+class CipherError(Exception):
+    """Невірний пароль, пошкоджений або обрізаний файл"""
+
+
+class FileCipher:
+    """Потокове шифрування шматками з автентифікацією кожного шматка (формат AIAENC v1)
+    
+    Заголовок: magic, версія, алгоритм, ітерації PBKDF2, розмір шматка, сіль, префікс nonce.
+    Nonce шматка = префікс + номер + прапорець останнього шматка, тож перестановку,
+    видалення чи обрізання шматків виявляє перевірка тегу. Заголовок - associated data.
+    """
+    
+    MAGIC = b"AIAENC"
+    VERSION = 1
+    AES_GCM = 1
+    SHAKE_HMAC = 2  # запасний варіант без cryptography: keystream SHAKE-256 + HMAC-SHA256
+    HEADER = struct.Struct("<6sBBII16s7s")
+    TAG_SIZE = 16
+    CHUNK_SIZE = 1024 * 1024
+    ITERATIONS = 200_000
+    # Межі для значень із заголовка: інакше підроблений файл змусить виділити гігабайти пам'яті
+    # або рахувати PBKDF2 годинами ще до перевірки тегу
+    MAX_CHUNK_SIZE = 64 * 1024 * 1024
+    MAX_ITERATIONS = ITERATIONS * 10
+    
+    @classmethod
+    def is_encrypted(cls, path: str) -> bool:
+        with open(path, "rb") as f:
+            return f.read(len(cls.MAGIC)) == cls.MAGIC
+    
+    def _derive(self, salt: bytes, iterations: int) -> Tuple[bytes, bytes]:
+        """Ключ шифрування і ключ MAC з пароля (PBKDF2-SHA256)"""
+        derived = hashlib.pbkdf2_hmac("sha256", self.password.encode("utf-8"), salt, iterations, dklen=64)
+        return derived[:32], derived[32:]
+    
+    @staticmethod
+    def _nonce(prefix: bytes, index: int, last: bool) -> bytes:
+        return prefix + struct.pack(">I", index) + (b"\x01" if last else b"\x00")
+    
+    def __init__(self, password: str, algorithm: int = None):
+        self.password = password
+        self.algorithm = algorithm or (self.AES_GCM if CRYPTOGRAPHY_AVAILABLE else self.SHAKE_HMAC)
+    
+    def _sealer(self, algorithm: int, enc_key: bytes, mac_key: bytes, header: bytes):
+        if algorithm == self.AES_GCM:
+            if not CRYPTOGRAPHY_AVAILABLE:
+                raise CipherError("файл зашифровано AES-GCM - встановіть cryptography: pip install cryptography")
+            aead = AESGCM(enc_key)
+            seal = lambda nonce, data: aead.encrypt(nonce, data, header)
+            
+            def open_(nonce, data):
+                try:
+                    return aead.decrypt(nonce, data, header)
+                except InvalidTag:
+                    raise CipherError("невірний пароль або файл пошкоджено")
+            return seal, open_
+        
+        def mac(nonce, ciphertext):
+            return hmac.new(mac_key, header + nonce + ciphertext, hashlib.sha256).digest()[:self.TAG_SIZE]
+        
+        def seal(nonce, data):
+            ciphertext = _xor_bytes(data, hashlib.shake_256(enc_key + nonce).digest(len(data)))
+            return ciphertext + mac(nonce, ciphertext)
+        
+        def open_(nonce, data):
+            ciphertext, tag = data[:-self.TAG_SIZE], data[-self.TAG_SIZE:]
+            if not hmac.compare_digest(tag, mac(nonce, ciphertext)):
+                raise CipherError("невірний пароль або файл пошкоджено")
+            return _xor_bytes(ciphertext, hashlib.shake_256(enc_key + nonce).digest(len(ciphertext)))
+        return seal, open_
+    
+    def encrypt(self, src_path: str, dst_path: str) -> int:
+        salt, prefix = secrets.token_bytes(16), secrets.token_bytes(7)
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, self.algorithm, self.ITERATIONS,
+                                  self.CHUNK_SIZE, salt, prefix)
+        seal, _ = self._sealer(self.algorithm, *self._derive(salt, self.ITERATIONS), header)
+        processed = 0
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            dst.write(header)
+            chunk, index = src.read(self.CHUNK_SIZE), 0
+            while True:
+                # Наперед читаємо наступний шматок, щоб позначити останній
+                following = src.read(self.CHUNK_SIZE) if len(chunk) == self.CHUNK_SIZE else b""
+                dst.write(seal(self._nonce(prefix, index, not following), chunk))
+                processed += len(chunk)
+                if not following:
+                    return processed
+                chunk, index = following, index + 1
+    
+    def decrypt(self, src_path: str, dst_path: str) -> int:
+        with open(src_path, "rb") as src:
+            header = src.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                raise CipherError("файл обрізано")
+            magic, version, algorithm, iterations, chunk_size, salt, prefix = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise CipherError(f"непідтримувана версія формату: {version}")
+            if not 0 < chunk_size <= self.MAX_CHUNK_SIZE:
+                raise CipherError(f"недопустимий розмір шматка в заголовку: {chunk_size}")
+            if not self.ITERATIONS <= iterations <= self.MAX_ITERATIONS:
+                raise CipherError(f"недопустима кількість ітерацій у заголовку: {iterations}")
+            _, open_ = self._sealer(algorithm, *self._derive(salt, iterations), header)
+            
+            processed = 0
+            block = chunk_size + self.TAG_SIZE
+            with open(dst_path, "wb") as dst:
+                chunk, index = src.read(block), 0
+                while True:
+                    following = src.read(block) if len(chunk) == block else b""
+                    if len(chunk) < self.TAG_SIZE:
+                        raise CipherError("файл обрізано")
+                    plain = open_(self._nonce(prefix, index, not following), chunk)
+                    dst.write(plain)
+                    processed += len(plain)
+                    if not following:
+                        return processed
+                    chunk, index = following, index + 1
+    
+    def legacy_xor(self, src_path: str, dst_path: str) -> int:
+        """Старий формат (XOR з sha256 пароля) - лише для розшифрування наявних файлів"""
+        key = hashlib.sha256(self.password.encode()).digest()
+        # Розмір шматка кратний довжині ключа, тож ключ у кожному шматку починається з нуля
+        chunk_size = self.CHUNK_SIZE
+        pad = key * (chunk_size // len(key))
+        processed = 0
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    return processed
+                dst.write(_xor_bytes(chunk, pad[:len(chunk)]))
+                processed += len(chunk)
+
+
 # ============================================================================
 # РОЗШИРЕНИЙ МЕНЕДЖЕР ФАЙЛОВОЇ СИСТЕМИ
 # ============================================================================
@@ -659,116 +1284,318 @@ class AdvancedFileSystemManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def secure_delete(self, filepath: str, passes: int = 3) -> Dict[str, Any]:
-        """Безпечне видалення файлу з перезаписом"""
+    WIPE_BUFFER = 4 * 1024 * 1024
+    
+    @staticmethod
+    def _wipeable(st: os.stat_result) -> bool:
+        """Перезаписувати можна лише звичайний файл без інших жорстких посилань"""
+        return stat.S_ISREG(st.st_mode) and st.st_nlink == 1
+    
+    @classmethod
+    def _wipe_file(cls, path: str, passes: int) -> int:
+        """Перезапис файлу на місці шматками по WIPE_BUFFER з fsync після кожного проходу"""
+        # O_NONBLOCK/O_NOFOLLOW: якщо файл встигли підмінити на FIFO чи посилання, open не зависне
+        flags = os.O_WRONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_NOFOLLOW", 0)
+        fd = os.open(path, flags)
+        try:
+            st = os.fstat(fd)
+            if not cls._wipeable(st):
+                raise OSError(f"не звичайний файл або має кілька жорстких посилань: {path}")
+            size = st.st_size
+            for _ in range(passes):
+                # Один випадковий буфер на прохід, перевикористаний для всіх шматків
+                buffer = memoryview(os.urandom(min(cls.WIPE_BUFFER, max(size, 1))))
+                os.lseek(fd, 0, os.SEEK_SET)
+                remaining = size
+                while remaining > 0:
+                    written = os.write(fd, buffer[:min(remaining, len(buffer))])
+                    remaining -= written
+                os.fsync(fd)
+            os.ftruncate(fd, 0)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # Випадкове ім'я перед видаленням, щоб у каталозі не лишилось оригінальної назви
+        hidden = os.path.join(os.path.dirname(path), secrets.token_hex(8))
+        os.rename(path, hidden)
+        os.remove(hidden)
+        return size
+    
+    def secure_delete(self, filepath: str, passes: int = 3, workers: int = None) -> Dict[str, Any]:
+        """Безпечне видалення файлу або папки з перезаписом (на SSD/CoW-ФС гарантій немає)"""
         try:
             if not self.is_safe_path(filepath):
                 return {"success": False, "error": "❌ Доступ заборонено"}
-            if not os.path.isfile(filepath):
+            if not os.path.lexists(filepath):
                 return {"success": False, "error": "❌ Файл не існує"}
+            if passes < 1:
+                return {"success": False, "error": "❌ Кількість проходів має бути не менше 1"}
             
-            file_size = os.path.getsize(filepath)
-            
-            # Перезаписування випадковими даними
-            with open(filepath, 'ba+', buffering=0) as f:
-                for _ in range(passes):
-                    f.seek(0)
-                    f.write(os.urandom(file_size))
+            started = time.perf_counter()
+            # files - перезаписуємо; unlink_only - лише видаляємо: симлінки (ціль може бути поза папкою),
+            # FIFO, сокети, пристрої (open на запис зависне або зачепить пристрій) і файли з жорсткими
+            # посиланнями (їхні дані спільні з іншим шляхом)
+            files, unlink_only, dirs = [], [], []
+            if os.path.isdir(filepath) and not os.path.islink(filepath):
+                for root, dirnames, filenames in os.walk(filepath):
+                    dirs.append(root)
+                    for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(root, d))]:
+                        path = os.path.join(root, name)
+                        (files if self._wipeable(os.lstat(path)) else unlink_only).append(path)
+            else:
+                (files if self._wipeable(os.lstat(filepath)) else unlink_only).append(filepath)
             
-            # Видалення файлу
-            os.remove(filepath)
+            errors, wiped, wiped_files, unlinked = [], 0, 0, 0
+            with ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 2)) as pool:
+                futures = {pool.submit(self._wipe_file, path, passes): path for path in files}
+                for future, path in futures.items():
+                    try:
+                        wiped += future.result()
+                        wiped_files += 1
+                    except OSError as e:
+                        errors.append(f"{path}: {e}")
+            for path in unlink_only:
+                try:
+                    os.remove(path)
+                    unlinked += 1
+                except OSError as e:
+                    errors.append(f"{path}: {e}")
+            for path in reversed(dirs):
+                try:
+                    os.rmdir(path)
+                except OSError as e:
+                    errors.append(f"{path}: {e}")
             
-            return {"success": True, "message": f"✅ Файл безпечно видалено ({passes} проходів)"}
+            elapsed = time.perf_counter() - started
+            result = {
+                "success": not errors,
+                "message": f"✅ Безпечно видалено файлів: {wiped_files} ({passes} проходів)"
+                           + (f", без перезапису видалено: {unlinked}" if unlinked else ""),
+                "files": wiped_files,
+                "unlinked": unlinked,
+                "size_mb": f"{wiped / 1024 / 1024:.2f} MB",
+                "passes": passes,
+                "elapsed_seconds": round(elapsed, 2),
+                "throughput_mb_s": round(wiped * passes / 1024 / 1024 / elapsed, 1) if elapsed > 0 else None
+            }
+            if errors:
+                result["error"] = f"❌ Не вдалося видалити: {len(errors)}"
+                result["errors"] = errors[:20]
+            return result
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def compress_archive(self, source_paths: List[str], archive_path: str) -> Dict[str, Any]:
-        """Створення архіву"""
+    @staticmethod
+    def _archive_items(source_paths: List[str]) -> List[Tuple[str, str]]:
+        """(шлях, ім'я в архіві) для файлів і порожніх папок у порядку обходу"""
+        items = []
+        for source in source_paths:
+            if os.path.isfile(source):
+                items.append((source, os.path.basename(source)))
+            elif os.path.isdir(source):
+                base = os.path.dirname(os.path.abspath(source))
+                for root, dirs, files in os.walk(source):
+                    if not dirs and not files:
+                        items.append((None, os.path.relpath(root, base).replace(os.sep, "/") + "/"))
+                    for file in sorted(files):
+                        file_path = os.path.join(root, file)
+                        items.append((file_path, os.path.relpath(file_path, base).replace(os.sep, "/")))
+        return items
+    
+    def compress_archive(self, source_paths: List[str], archive_path: str, mode: str = "auto",
+                         level: int = 6, workers: int = None) -> Dict[str, Any]:
+        """Створення архіву з паралельним стисненням (mode: auto/deflate/store)"""
         try:
-            if archive_path.endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for source in source_paths:
-                        if os.path.isfile(source):
-                            zipf.write(source, os.path.basename(source))
-                        elif os.path.isdir(source):
-                            for root, dirs, files in os.walk(source):
-                                for file in files:
-                                    file_path = os.path.join(root, file)
-                                    arcname = os.path.relpath(file_path, os.path.dirname(source))
-                                    zipf.write(file_path, arcname)
-            elif archive_path.endswith(('.tar.gz', '.tgz')):
-                with tarfile.open(archive_path, 'w:gz') as tar:
-                    for source in source_paths:
-                        tar.add(source, arcname=os.path.basename(source))
-            else:
-                return {"success": False, "error": "❌ Підтримуються тільки .zip та .tar.gz архіви"}
+            if mode not in ("auto", "deflate", "store"):
+                return {"success": False, "error": "❌ Режим: auto, deflate або store"}
+            missing = [source for source in source_paths if not os.path.exists(source)]
+            if missing:
+                return {"success": False, "error": f"❌ Не знайдено: {', '.join(missing)}"}
+            if archive_path.endswith('.tar.zst') and not ZSTD_AVAILABLE:
+                return {"success": False, "error": "❌ Для .tar.zst встановіть zstandard: pip install zstandard"}
             
-            return {"success": True, "message": f"✅ Архів створено: {archive_path}"}
+            started = time.perf_counter()
+            skipped: List[str] = []
+            # store для .tar.gz лишає gzip-контейнер, але з нестиснутими deflate-блоками (рівень 0)
+            gzip_store = mode == "store" and archive_path.endswith(('.tar.gz', '.tgz'))
+            deflater = ParallelDeflater(0 if gzip_store else level, workers)
+            try:
+                if archive_path.endswith('.zip'):
+                    writer = ParallelZipWriter(archive_path, deflater, mode)
+                    try:
+                        writer.write_items(self._archive_items(source_paths))
+                    finally:
+                        writer.close()
+                    files, bytes_in, skipped = len(writer.entries), writer.bytes_in, writer.skipped
+                elif archive_path.endswith(('.tar.gz', '.tgz', '.tar', '.tar.zst')):
+                    counter = {"files": 0, "bytes": 0}
+                    
+                    def count(info):
+                        if info.isfile():
+                            counter["files"] += 1
+                            counter["bytes"] += info.size
+                        return info
+                    
+                    with open(archive_path, 'wb') as raw:
+                        if archive_path.endswith('.tar.zst'):
+                            # zstd сам розпаралелює стиснення (threads=-1 - усі ядра)
+                            cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+                            stream = cctx.stream_writer(raw, closefd=False)
+                        elif archive_path.endswith('.tar'):
+                            stream = None
+                        else:
+                            stream = ParallelGzipWriter(raw, deflater)
+                        with tarfile.open(fileobj=stream or raw, mode='w|') as tar:
+                            for source in source_paths:
+                                tar.add(source, arcname=os.path.basename(source), filter=count)
+                        if stream is not None:
+                            stream.close()
+                    files, bytes_in = counter["files"], counter["bytes"]
+                else:
+                    return {"success": False, "error": "❌ Підтримуються .zip, .tar, .tar.gz та .tar.zst архіви"}
+            finally:
+                deflater.close()
+            
+            elapsed = time.perf_counter() - started
+            bytes_out = os.path.getsize(archive_path)
+            result = {
+                "success": True,
+                "message": f"✅ Архів створено: {archive_path}",
+                "archive": archive_path,
+                "files": files,
+                "original_mb": f"{bytes_in / 1024 / 1024:.2f} MB",
+                "archive_mb": f"{bytes_out / 1024 / 1024:.2f} MB",
+                "ratio": f"{bytes_out / bytes_in * 100:.1f}%" if bytes_in else "n/a",
+                "elapsed_seconds": round(elapsed, 2),
+                "throughput_mb_s": round(bytes_in / 1024 / 1024 / elapsed, 1) if elapsed > 0 else None,
+                "workers": deflater.workers
+            }
+            if skipped:
+                result["skipped"] = skipped
+            return result
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def extract_archive(self, archive_path: str, destination: str) -> Dict[str, Any]:
-        """Розпакування архіву"""
+    def list_archive(self, archive_path: str, patterns: List[str] = None) -> Dict[str, Any]:
+        """Перегляд вмісту архіву без розпакування"""
+        try:
+            if not os.path.isfile(archive_path):
+                return {"success": False, "error": "❌ Архів не існує"}
+            extractor = ArchiveExtractor()
+            if extractor.kind(archive_path) is None:
+                return {"success": False, "error": "❌ Непідтримуваний формат архіву"}
+            entries = extractor.list_entries(archive_path, patterns)
+            return {
+                "success": True,
+                "archive": archive_path,
+                "count": len(entries),
+                "total_size_mb": f"{sum(e['size'] for e in entries) / 1024 / 1024:.2f} MB",
+                "entries": entries
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def extract_archive(self, archive_path: str, destination: str, patterns: List[str] = None,
+                        workers: int = None, max_ratio: float = None) -> Dict[str, Any]:
+        """Розпакування архіву (усього або елементів за glob-шаблонами)"""
         try:
             if not os.path.exists(archive_path):
                 return {"success": False, "error": "❌ Архів не існує"}
-            
-            os.makedirs(destination, exist_ok=True)
-            
-            if archive_path.endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as zipf:
-                    zipf.extractall(destination)
-            elif archive_path.endswith(('.tar.gz', '.tgz', '.tar')):
-                with tarfile.open(archive_path, 'r:*') as tar:
-                    tar.extractall(destination)
-            else:
+            if not self.is_safe_path(destination):
+                return {"success": False, "error": "❌ Доступ заборонено"}
+            extractor = ArchiveExtractor(max_ratio=max_ratio, workers=workers)
+            if extractor.kind(archive_path) is None:
                 return {"success": False, "error": "❌ Непідтримуваний формат архіву"}
             
-            return {"success": True, "message": f"✅ Архів розпаковано в: {destination}"}
+            res = extractor.extract(archive_path, destination, patterns)
+            if patterns and not res["extracted"]:
+                return {"success": False, "error": f"❌ Немає елементів за шаблоном: {' '.join(patterns)}"}
+            return {
+                "success": True,
+                "message": f"✅ Розпаковано {res['extracted']} елементів в: {destination}",
+                **res
+            }
+        except ArchiveLimitError as e:
+            return {"success": False, "error": f"❌ Розпакування зупинено: {e}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def extract_stream(self, fileobj, destination: str, patterns: List[str] = None,
+                       max_ratio: float = None) -> Dict[str, Any]:
+        """Розпакування tar(.gz/.bz2/.xz) з потоку (сокет, HTTP-відповідь, stdin) без тимчасового файлу"""
+        try:
+            if not self.is_safe_path(destination):
+                return {"success": False, "error": "❌ Доступ заборонено"}
+            res = ArchiveExtractor(max_ratio=max_ratio).extract(fileobj, destination, patterns)
+            return {"success": True, "message": f"✅ Розпаковано {res['extracted']} елементів в: {destination}", **res}
+        except ArchiveLimitError as e:
+            return {"success": False, "error": f"❌ Розпакування зупинено: {e}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def encrypt_file(self, filepath: str, password: str) -> Dict[str, Any]:
-        """Проста XOR-шифрування файлу"""
+        """Потокове шифрування файлу (AES-256-GCM, без cryptography - SHAKE-256 + HMAC)"""
         try:
             if not self.is_safe_path(filepath):
                 return {"success": False, "error": "❌ Доступ заборонено"}
             if not os.path.isfile(filepath):
                 return {"success": False, "error": "❌ Файл не існує"}
             
-            with open(filepath, 'rb') as f:
-                data = f.read()
-            
-            # XOR шифрування
-            key = hashlib.sha256(password.encode()).digest()
-            encrypted = bytes([data[i] ^ key[i % len(key)] for i in range(len(data))])
-            
+            started = time.perf_counter()
+            cipher = FileCipher(password)
             encrypted_path = filepath + '.encrypted'
-            with open(encrypted_path, 'wb') as f:
-                f.write(encrypted)
+            tmp_path = encrypted_path + '.tmp'
+            try:
+                size = cipher.encrypt(filepath, tmp_path)
+                os.replace(tmp_path, encrypted_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            elapsed = time.perf_counter() - started
             
-            return {"success": True, "message": f"✅ Файл зашифровано: {encrypted_path}"}
+            return {
+                "success": True,
+                "message": f"✅ Файл зашифровано: {encrypted_path}",
+                "algorithm": "AES-256-GCM" if cipher.algorithm == FileCipher.AES_GCM else "SHAKE-256 + HMAC-SHA256",
+                "size_mb": f"{size / 1024 / 1024:.2f} MB",
+                "throughput_mb_s": round(size / 1024 / 1024 / elapsed, 1) if elapsed > 0 else None
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def decrypt_file(self, filepath: str, password: str) -> Dict[str, Any]:
-        """Розшифрування файлу"""
+        """Розшифрування файлу (новий формат з перевіркою цілісності або старий XOR)"""
         try:
             if not os.path.isfile(filepath):
                 return {"success": False, "error": "❌ Файл не існує"}
             
-            with open(filepath, 'rb') as f:
-                encrypted = f.read()
-            
-            # XOR розшифрування
-            key = hashlib.sha256(password.encode()).digest()
-            decrypted = bytes([encrypted[i] ^ key[i % len(key)] for i in range(len(encrypted))])
-            
+            started = time.perf_counter()
+            cipher = FileCipher(password)
             decrypted_path = filepath.replace('.encrypted', '.decrypted')
-            with open(decrypted_path, 'wb') as f:
-                f.write(decrypted)
+            if decrypted_path == filepath:
+                decrypted_path = filepath + '.decrypted'
+            tmp_path = decrypted_path + '.tmp'
+            legacy = not FileCipher.is_encrypted(filepath)
+            try:
+                # Старий XOR не має ні заголовка, ні перевірки пароля
+                size = cipher.legacy_xor(filepath, tmp_path) if legacy else cipher.decrypt(filepath, tmp_path)
+                os.replace(tmp_path, decrypted_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            elapsed = time.perf_counter() - started
             
-            return {"success": True, "message": f"✅ Файл розшифровано: {decrypted_path}"}
+            result = {
+                "success": True,
+                "message": f"✅ Файл розшифровано: {decrypted_path}",
+                "size_mb": f"{size / 1024 / 1024:.2f} MB",
+                "throughput_mb_s": round(size / 1024 / 1024 / elapsed, 1) if elapsed > 0 else None
+            }
+            if legacy:
+                result["warning"] = "⚠️ Старий формат XOR без перевірки пароля - зашифруйте файл повторно"
+            return result
+        except CipherError as e:
+            return {"success": False, "error": f"❌ Не вдалося розшифрувати: {e}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -2,15 +2,18 @@
 FastAPI Application - Main Entry Point
 AI Local Agent Web API
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 import asyncio
 import logging
-from typing import List
+import time
+from typing import Dict, List, Optional
 
 # Import our bridge to AI Agent
-from api.utils.agent_bridge import agent_bridge
+from api.utils.agent_bridge import agent_bridge, tracer
+from api.utils import metrics
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -36,28 +39,110 @@ app.add_middleware(
 
 # WebSocket connections manager
 class ConnectionManager:
-    def __init__(self):
+    """Fan-out to WebSocket clients; every client has its own bounded send queue"""
+
+    def __init__(self, queue_size: int = 4, send_timeout: float = 5.0):
         self.active_connections: List[WebSocket] = []
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.dropped_messages = 0
+        self._queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues[websocket] = queue
+        self._senders[websocket] = asyncio.create_task(self._sender(websocket, queue))
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
+        if websocket not in self.active_connections:
+            return
         self.active_connections.remove(websocket)
+        self._queues.pop(websocket, None)
+        sender = self._senders.pop(websocket, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+    async def _sender(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain one client's queue; a client stuck longer than send_timeout is dropped"""
+        try:
+            while True:
+                message = await queue.get()
+                await asyncio.wait_for(websocket.send_json(message), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Dropping slow or broken WebSocket client: {e}")
+            self.disconnect(websocket)
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+    def _enqueue(self, websocket: WebSocket, message: dict):
+        queue = self._queues.get(websocket)
+        if queue is None:
+            return
+        if queue.full():
+            # Slow client: the oldest update is stale anyway - drop it
             try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
+                queue.get_nowait()
+                self.dropped_messages += 1
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(message)
+
+    async def send_to(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client"""
+        self._enqueue(websocket, message)
+
+    async def broadcast(self, message: dict):
+        """Queue a message for every client without waiting on any of them"""
+        for connection in list(self.active_connections):
+            self._enqueue(connection, message)
 
 manager = ConnectionManager()
 
 
+# ============================================================================
+# PROMETHEUS METRICS
+# ============================================================================
+
+tracer.add_listener(metrics.record_trace)
+metrics.registry.gauge_callback(
+    "agent_websocket_connections",
+    "Open WebSocket connections",
+    lambda: len(manager.active_connections)
+)
+metrics.registry.gauge_callback(
+    "agent_db_write_queue_size",
+    "Trace spans waiting to be written to the database",
+    tracer.pending_count
+)
+
+
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    """Record request latency per route template"""
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        metrics.HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            request.method,
+            metrics.route_label(request.scope),
+            status
+        )
+
+
 # ============================================================================
 # ROOT ENDPOINTS
 # ============================================================================
@@ -77,6 +162,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus/OpenMetrics scrape endpoint"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 
 # ============================================================================
 # SYSTEM ENDPOINTS
@@ -97,18 +187,44 @@ async def get_system_info():
 
 @app.get("/api/system/stats")
 async def get_system_stats():
-    """Get quick system stats (CPU, RAM, Disk)"""
+    """Get quick system stats (CPU, RAM, Disk) from the shared sampler"""
     try:
-        info = agent_bridge.get_system_info()
-        return {
-            "cpu": info["cpu"]["percent"],
-            "memory": info["memory"]["percent"],
-            "disk": info["disk"]["percent"],
-            "timestamp": info["timestamp"]
-        }
+        return stats_payload(agent_bridge.get_system_stats())
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/system/history")
+async def get_system_history(range: str = "15m"):
+    """Get CPU/RAM/Disk history (raw 1s up to 1h, 1-minute up to 7d, 1-hour up to 1y)"""
+    try:
+        return await run_in_threadpool(agent_bridge.get_system_history, range)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/api/system/monitor/start")
+async def start_monitoring(interval: float = 1.0, duration: float = None):
+    """Start background performance monitoring; threshold alerts arrive over /ws"""
+    try:
+        return agent_bridge.start_monitoring(interval=interval, duration=duration)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/api/system/monitor/stop")
+async def stop_monitoring():
+    """Stop background performance monitoring and return the summary"""
+    try:
+        return await run_in_threadpool(agent_bridge.stop_monitoring)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.get("/api/system/monitor")
+async def get_monitoring_status():
+    """Running mean/max/percentiles, per-core and per-process breakdown"""
+    try:
+        return agent_bridge.get_monitoring_status()
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 @app.get("/api/system/processes")
 async def get_processes(limit: int = 20):
     """Get running processes"""
@@ -126,8 +242,10 @@ async def get_processes(limit: int = 20):
 @app.post("/api/commands/execute")
 async def execute_command(command: str):
     """Execute a command through AI Agent"""
+    metrics.LLM_IN_FLIGHT.inc()
     try:
-        result = agent_bridge.execute_command(command)
+        # LLM call blocks for seconds - keep it off the event loop
+        result = await run_in_threadpool(agent_bridge.execute_command, command)
         return result
     except Exception as e:
         logger.error(f"Error executing command: {e}")
@@ -135,6 +253,8 @@ async def execute_command(command: str):
             "success": False,
             "error": str(e)
         }
+    finally:
+        metrics.LLM_IN_FLIGHT.dec()
 
 @app.get("/api/commands/history")
 async def get_command_history(limit: int = 50):
@@ -146,6 +266,52 @@ async def get_command_history(limit: int = 50):
         return {"error": str(e)}
 
 
+@app.get("/api/commands/stats")
+async def get_command_stats(days: int = None):
+    """Per-command counts, failures and timings (whole history unless days is given)"""
+    try:
+        return agent_bridge.get_command_stats(days=days if days and days > 0 else None)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/api/commands/errors")
+async def get_command_errors(limit: int = 20):
+    """Most frequent error classes and the latest failed commands"""
+    try:
+        return agent_bridge.get_error_report(limit=limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/api/metrics")
+async def get_metrics(command: str = None, hours: int = None):
+    """Get latency percentiles per command and LLM throughput"""
+    try:
+        return agent_bridge.get_performance_report(command=command, hours=hours)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ============================================================================
+# NETWORK ENDPOINTS
+# ============================================================================
+
+@app.post("/api/network/reachability")
+async def check_reachability(targets: List[str], attempts: int = 3, timeout: float = 2.0,
+                             concurrency: int = 100, method: str = "HEAD"):
+    """Check many targets at once: host:port (TCP), http(s):// URLs, icmp:host"""
+    try:
+        if not targets:
+            return {"success": False, "error": "No targets given"}
+        return await agent_bridge.check_reachability(
+            targets, attempts=attempts, timeout=timeout,
+            concurrency=max(1, min(concurrency, 500)), method=method
+        )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 # ============================================================================
 # FILE ENDPOINTS
 # ============================================================================
@@ -163,6 +329,63 @@ async def search_files(pattern: str, directory: str = None, limit: int = 100):
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/api/files/batch/{action}")
+async def batch_files(action: str, paths: List[str], destination: str = None, conflict: str = None,
+                      dry_run: bool = False):
+    """Bulk copy/move/delete; progress arrives over /ws as fileop_progress and fileop_finished"""
+    try:
+        return await run_in_threadpool(agent_bridge.batch_files, action, paths, destination, conflict, dry_run)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/api/files/copy")
+async def copy_large_file(source: str, destination: str, checksum: str = None, limit_mbps: float = None):
+    """Background large-file copy; progress arrives over /ws as copy_progress, then copy_finished"""
+    try:
+        return await run_in_threadpool(agent_bridge.copy_large_file, source, destination, checksum, limit_mbps)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.get("/api/files/copy")
+async def get_copy_jobs():
+    """Running and recently finished background copies"""
+    try:
+        return agent_bridge.get_copy_jobs()
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.delete("/api/files/copy/{job_id}")
+async def cancel_copy(job_id: str):
+    """Stop a background copy; starting it again resumes where it stopped"""
+    try:
+        return agent_bridge.cancel_copy(job_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/api/files/watch")
+async def start_watch(directory: str, duration: float = None, recursive: bool = True, debounce: float = 0.5):
+    """Watch a directory in the background; change batches arrive over /ws as fs_changes"""
+    try:
+        return await run_in_threadpool(agent_bridge.watch_directory, directory, duration, recursive, debounce)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.get("/api/files/watch")
+async def get_watches():
+    """Active and recently finished directory watches"""
+    try:
+        return agent_bridge.get_watches()
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.delete("/api/files/watch/{watch_id}")
+async def stop_watch(watch_id: str):
+    """Stop a directory watch and return its summary"""
+    try:
+        return await run_in_threadpool(agent_bridge.stop_watch, watch_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 
 # ============================================================================
 # WEBSOCKET ENDPOINT
@@ -170,26 +393,14 @@ async def search_files(pattern: str, directory: str = None, limit: int = 100):
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time system stats"""
+    """WebSocket endpoint for real-time system stats (pushed by the shared sampler)"""
     await manager.connect(websocket)
     try:
-        # Send stats every 2 seconds
+        if latest_stats is not None:
+            await manager.send_to(websocket, {"type": "system_stats", "data": latest_stats})
+        # Keep the connection open; updates are sent by stats_sampler_loop
         while True:
-            try:
-                stats = agent_bridge.get_system_info()
-                await websocket.send_json({
-                    "type": "system_stats",
-                    "data": {
-                        "cpu": stats["cpu"]["percent"],
-                        "memory": stats["memory"]["percent"],
-                        "disk": stats["disk"]["percent"],
-                        "timestamp": stats["timestamp"]
-                    }
-                })
-                await asyncio.sleep(2)
-            except Exception as e:
-                logger.error(f"Error in WebSocket loop: {e}")
-                break
+            await websocket.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
@@ -197,6 +408,51 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
+# ============================================================================
+# SHARED SYSTEM STATS SAMPLER
+# ============================================================================
+
+latest_stats: Optional[dict] = None
+
+
+def stats_payload(stats: dict) -> dict:
+    """Dashboard payload from a sampler snapshot"""
+    return {
+        "cpu": stats["cpu"],
+        "memory": stats["memory"],
+        "disk": stats["disk"],
+        "timestamp": stats["timestamp"]
+    }
+
+
+async def stats_sampler_loop(interval: float):
+    """One sampler for all clients: sample, then fan out through the manager"""
+    global latest_stats
+    while True:
+        started = time.perf_counter()
+        try:
+            stats = await run_in_threadpool(agent_bridge.sample_system_stats)
+            latest_stats = stats_payload(stats)
+            if manager.active_connections:
+                await manager.broadcast({"type": "system_stats", "data": latest_stats})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in stats sampler: {e}")
+        await asyncio.sleep(max(interval - (time.perf_counter() - started), 0.05))
+
+
+def forward_events(loop: asyncio.AbstractEventLoop,
+                   topics=("monitor.alert", "monitor.finished", "fs.changes", "fs.watch.finished",
+                           "fileop.progress", "fileop.finished",
+                           "copy.progress", "copy.finished", "copy.failed", "copy.cancelled")):
+    """Relay event bus messages from worker threads to WebSocket clients"""
+    def relay(topic: str, payload: dict):
+        message = {"type": topic.replace(".", "_"), "data": payload}
+        asyncio.run_coroutine_threadsafe(manager.broadcast(message), loop)
+    return [agent_bridge.events.subscribe(topic, relay) for topic in topics]
+
+
 # ============================================================================
 # STARTUP EVENT
 # ============================================================================
@@ -207,9 +463,31 @@ async def startup_event():
     logger.info("🚀 AI Local Agent API starting...")
     logger.info("📡 WebSocket endpoint: ws://localhost:8000/ws")
     logger.info("📚 API documentation: http://localhost:8000/api/docs")
+    app.state.stats_sampler = asyncio.create_task(
+        stats_sampler_loop(agent_bridge.config.SYSTEM_SAMPLE_INTERVAL)
+    )
+    app.state.event_relays = forward_events(asyncio.get_running_loop())
+    # Per-process history is collected from startup so frozen-app checks answer at once
+    agent_bridge.process_tracker.start()
     logger.info("✅ API ready!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background samplers and persist unfinished history buckets"""
+    sampler = getattr(app.state, "stats_sampler", None)
+    if sampler is not None:
+        sampler.cancel()
+    for unsubscribe in getattr(app.state, "event_relays", []):
+        unsubscribe()
+    if agent_bridge.monitoring.monitoring_active:
+        await run_in_threadpool(agent_bridge.stop_monitoring)
+    if agent_bridge.automation.watchers:
+        await run_in_threadpool(agent_bridge.stop_watch)
+    await run_in_threadpool(agent_bridge.process_tracker.stop)
+    agent_bridge.metrics_recorder.flush(include_partial=True)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -2,6 +2,7 @@
 Bridge to connect FastAPI with existing AI Agent core
 """
 import sys
+import time
 from pathlib import Path
 
 # Add parent directory to path to import ai_agent modules
@@ -10,9 +11,12 @@ project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
-    from ai_agent import AgentDatabase, LMStudioClient, Config
-    import psutil
-    import platform
+    from ai_agent import (
+        AgentDatabase, LMStudioClient, Config, MetricsRecorder,
+        tracer, is_error_result, system_sampler, system_inventory, event_bus, process_snapshots,
+        process_tracker, ReachabilityEngine, AdvancedFileSystemManager
+    )
+    from extended_features import MonitoringManager, AutomationManager, StatisticsManager
     from datetime import datetime
 except ImportError as e:
     print(f"Error importing AI Agent modules: {e}")
@@ -26,38 +30,109 @@ class AgentBridge:
         self.db = AgentDatabase()
         self.llm_client = LMStudioClient(db=self.db)
         self.config = Config
+        self.metrics_recorder = MetricsRecorder(self.db)
+        self.monitoring = MonitoringManager(self.db)
+        self.automation = AutomationManager(self.db)
+        self.statistics = StatisticsManager(self.db)
+        self.fs_manager = AdvancedFileSystemManager(self.db)
+        self.events = event_bus
+        self.process_tracker = process_tracker
+        tracer.attach(self.db)
+    
+    def sample_system_stats(self):
+        """Take a fresh non-blocking sample and record it (called by the shared sampler loop)"""
+        stats = system_sampler.sample()
+        self.metrics_recorder.record(stats)
+        return stats
+    
+    def get_system_history(self, range_text: str = "15m"):
+        """Pre-aggregated history points for the dashboard chart"""
+        history = self.metrics_recorder.history(range_text)
+        if not history.get("success"):
+            return {"error": history.get("error")}
+        return history
+    
+    def start_monitoring(self, interval: float = 1.0, duration: float = None):
+        """Start the background performance monitor (alerts are published on the event bus)"""
+        return self.monitoring.start_monitoring(interval=interval, duration=duration)
+    
+    def stop_monitoring(self):
+        """Stop the background performance monitor and return its summary"""
+        return self.monitoring.stop_monitoring()
+    
+    def get_monitoring_status(self):
+        """Running aggregates of the current (or last) monitoring session"""
+        return self.monitoring.monitoring_status()
+    
+    def watch_directory(self, directory: str, duration: float = None, recursive: bool = True,
+                        debounce: float = 0.5):
+        """Start a background directory watch (changes also update the file index)"""
+        return self.automation.watch_directory(directory, duration, recursive, debounce)
+    
+    def stop_watch(self, watch_id: str = None):
+        """Stop one watch (or all of them) and return the summaries"""
+        return self.automation.stop_watch(watch_id)
+    
+    def get_watches(self):
+        """Status of directory watches"""
+        return self.automation.watch_status()
+    
+    def batch_files(self, action: str, paths: list, destination: str = None, conflict: str = None,
+                    dry_run: bool = False):
+        """Bulk copy/move/delete over paths or glob patterns (progress is published on the event bus)"""
+        return self.fs_manager.batch_file_operation(action, paths, destination, conflict, dry_run)
+    
+    def copy_large_file(self, source: str, destination: str, checksum: str = None, limit_mbps: float = None):
+        """Start a background large-file copy (resumable; progress is published on the event bus)"""
+        return self.fs_manager.copy_large_file(source, destination, checksum, limit_mbps, background=True)
+    
+    def get_copy_jobs(self):
+        """Background copy jobs; finished ones are dropped after being reported"""
+        return self.fs_manager.copy_jobs_status()
+    
+    def cancel_copy(self, job_id: str):
+        """Stop a background copy; rerunning it resumes from the checkpoint"""
+        return self.fs_manager.cancel_copy(job_id)
+    
+    def get_system_stats(self):
+        """Latest shared sample, without waiting for a new CPU interval"""
+        return system_sampler.get_latest()
     
     def get_system_info(self):
         """Get system information"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            stats = system_sampler.get_latest()
+            static = system_inventory.static
             
             return {
                 "cpu": {
-                    "percent": cpu_percent,
-                    "count": psutil.cpu_count(),
-                    "freq": psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None
+                    "percent": stats["cpu"],
+                    "per_cpu": stats["per_cpu"],
+                    "count": static["total_cores"],
+                    "freq": {
+                        "current": system_inventory.cpu_frequency(),
+                        "min": static["min_frequency"],
+                        "max": static["max_frequency"]
+                    } if static["max_frequency"] is not None else None
                 },
                 "memory": {
-                    "total": memory.total,
-                    "available": memory.available,
-                    "percent": memory.percent,
-                    "used": memory.used
+                    "total": stats["memory_total"],
+                    "available": stats["memory_available"],
+                    "percent": stats["memory"],
+                    "used": stats["memory_used"]
                 },
                 "disk": {
-                    "total": disk.total,
-                    "used": disk.used,
-                    "free": disk.free,
-                    "percent": disk.percent
+                    "total": stats["disk_total"],
+                    "used": stats["disk_used"],
+                    "free": stats["disk_free"],
+                    "percent": stats["disk"]
                 },
                 "system": {
-                    "platform": platform.system(),
-                    "platform_version": platform.version(),
-                    "architecture": platform.machine(),
-                    "processor": platform.processor(),
-                    "hostname": platform.node()
+                    "platform": static["platform"],
+                    "platform_version": static["version"],
+                    "architecture": static["machine"],
+                    "processor": static["processor"],
+                    "hostname": static["hostname"]
                 },
                 "timestamp": datetime.now().isoformat()
             }
@@ -67,36 +142,49 @@ class AgentBridge:
     def get_processes(self, limit=20):
         """Get running processes"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-                try:
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            # Sort by CPU usage
-            processes.sort(key=lambda x: x.get('cpu_percent', 0), reverse=True)
-            return processes[:limit]
+            # Shared snapshot: real CPU deltas, refreshed at most once per second
+            return [
+                {
+                    "pid": record["pid"],
+                    "name": record["name"],
+                    "cpu_percent": record["cpu"],
+                    "memory_percent": record["memory"],
+                    "status": record["status"]
+                }
+                for record in process_snapshots.get().top("cpu", limit)
+            ]
         except Exception as e:
             return {"error": str(e)}
     
+    async def check_reachability(self, targets, attempts: int = 3, timeout: float = 2.0,
+                                 concurrency: int = 100, method: str = "HEAD"):
+        """Probe many hosts/URLs concurrently on the running event loop"""
+        engine = ReachabilityEngine(concurrency=concurrency, timeout=timeout, attempts=attempts)
+        return await engine.run(targets, method)
+    
     def execute_command(self, command: str):
         """Execute command through LLM client"""
         try:
-            response = self.llm_client.send_message(command)
-            
-            # Log to database
-            self.db.log_command(
-                command=command,
-                result=response[:500] if response else "No response",
-                success=bool(response),
-                execution_time=0.0
-            )
+            # Timed separately: with tracing disabled the span is a no-op
+            started = time.perf_counter()
+            with tracer.trace("chat") as root:
+                response = self.llm_client.send_message(command)
+                success = root.success = not is_error_result(response)
+                execution_time = time.perf_counter() - started
+                
+                # Log to database
+                self.db.log_command(
+                    command=command,
+                    result=response[:500] if response else "No response",
+                    success=success,
+                    execution_time=execution_time
+                )
             
             return {
                 "success": True,
                 "command": command,
                 "response": response,
+                "execution_time": execution_time,
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
@@ -113,17 +201,37 @@ class AgentBridge:
             history = self.db.get_command_history(limit=limit)
             return [
                 {
-                    "command": h[0],
-                    "result": h[1][:200] if h[1] else "",  # Truncate for API
-                    "success": bool(h[2]),
-                    "execution_time": h[3],
-                    "timestamp": h[4]
+                    "command": h["command"],
+                    "success": h["success"],
+                    "execution_time": h["execution_time"],
+                    "timestamp": h["timestamp"]
                 }
                 for h in history
             ]
         except Exception as e:
             return {"error": str(e)}
     
+    def get_command_stats(self, days: int = None):
+        """Lifetime (or last N days) per-command usage from the daily rollups"""
+        stats = self.statistics.usage_statistics(days)
+        if not stats.get("success"):
+            return {"error": stats.get("error")}
+        return stats
+    
+    def get_error_report(self, limit: int = 20):
+        """Error counts per command and per message class"""
+        report = self.statistics.error_report(limit)
+        if not report.get("success"):
+            return {"error": report.get("error")}
+        return report
+    
+    def get_performance_report(self, command: str = None, hours: int = None):
+        """Get p50/p95/p99 latency per command (or per span of one command)"""
+        report = tracer.report(command=command, hours=hours)
+        if not report.get("success"):
+            return {"error": report.get("error")}
+        return report
+    
     def search_files(self, pattern: str, directory: str = None, limit=100):
         """Search for files"""
         try:
@@ -132,11 +240,15 @@ class AgentBridge:
             
             search_dir = Path(directory) if directory else Path.home()
             results = []
+            scanned = 0
             
-            for file_path in search_dir.rglob(pattern):
-                if len(results) >= limit:
-                    break
-                if file_path.is_file():
+            with tracer.trace("search_files") as span:
+                for file_path in search_dir.rglob(pattern):
+                    if len(results) >= limit:
+                        break
+                    scanned += 1
+                    if not file_path.is_file():
+                        continue
                     try:
                         stat = file_path.stat()
                         results.append({
@@ -147,6 +259,7 @@ class AgentBridge:
                         })
                     except:
                         pass
+                span.set(files_scanned=scanned)
             
             return results
         except Exception as e:
@@ -0,0 +1,249 @@
+"""
+Prometheus/OpenMetrics exporter for the FastAPI backend
+
+Every metric keeps one shard per thread. Updates touch only the calling
+thread's shard, so the hot path never takes a lock; the lock is used once
+per thread (shard registration) and when /metrics is scraped.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ThreadShards:
+    """Per-thread dict storage; values are merged only at scrape time"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL, so a concurrent writer is safe
+        return [shard.copy() for shard in shards]
+
+
+class Metric:
+    """Base class: name, help text and label names"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic counter with lock-free per-thread increments"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._shards = _ThreadShards()
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return sum(shard.get(labels, 0.0) for shard in self._shards.snapshot())
+
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._shards.snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        values = self.collect()
+        if not values and not self.labelnames:
+            values = {(): 0.0}
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class UpDownGauge(Counter):
+    """Gauge built from per-thread +/- deltas (in-flight requests etc.)"""
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, *labels: str):
+        self.inc(-amount, *labels)
+
+
+class CallbackGauge(Metric):
+    """Gauge whose value is read from a callback at scrape time"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.callback())
+        except Exception:
+            return []
+        return self.header() + [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    """Histogram with per-thread, non-cumulative bucket counts"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _ThreadShards()
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shards.get()
+        cells = shard.get(labels)
+        if cells is None:
+            # buckets..., +Inf bucket, sum, count
+            cells = shard[labels] = [0.0] * (len(self.buckets) + 3)
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-2] += value
+        cells[-1] += 1
+
+    def render(self) -> List[str]:
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._shards.snapshot():
+            for labels, cells in shard.items():
+                cells = list(cells)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = cells
+                else:
+                    for i, value in enumerate(cells):
+                        total[i] += value
+
+        lines = self.header()
+        bounds = list(self.buckets) + [float("inf")]
+        for labels, cells in sorted(merged.items()):
+            cumulative = 0.0
+            for bound, count in zip(bounds, cells):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {_format_value(cumulative)}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(cells[-2])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cells[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders the text exposition format"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def up_down_gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> UpDownGauge:
+        return self.register(UpDownGauge(name, documentation, labelnames))
+
+    def gauge_callback(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "agent_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status")
+)
+LLM_IN_FLIGHT = registry.up_down_gauge(
+    "agent_llm_queue_depth",
+    "LLM requests waiting for or being served by LM Studio"
+)
+LLM_PROMPT_TOKENS = registry.counter("agent_llm_prompt_tokens_total", "Prompt tokens sent to the LLM")
+LLM_COMPLETION_TOKENS = registry.counter("agent_llm_completion_tokens_total", "Completion tokens generated by the LLM")
+LLM_GENERATION_SECONDS = registry.counter("agent_llm_generation_seconds_total", "Wall time spent in LLM requests")
+FS_FILES_SCANNED = registry.counter("agent_fs_files_scanned_total", "Files visited by filesystem scans")
+FS_SCAN_SECONDS = registry.counter("agent_fs_scan_seconds_total", "Wall time spent in filesystem scans")
+
+
+def record_trace(spans) -> None:
+    """Tracer listener: fold finished spans into LLM and filesystem counters"""
+    for span in spans:
+        attrs = span.attrs
+        if span.kind == "llm" and attrs.get("completion_tokens") is not None:
+            LLM_PROMPT_TOKENS.inc(attrs.get("prompt_tokens") or 0)
+            LLM_COMPLETION_TOKENS.inc(attrs["completion_tokens"])
+            LLM_GENERATION_SECONDS.inc(span.wall_ms / 1000)
+        files_scanned = attrs.get("files_scanned")
+        if files_scanned is not None:
+            FS_FILES_SCANNED.inc(files_scanned)
+            FS_SCAN_SECONDS.inc(span.wall_ms / 1000)
+
+
+def route_label(scope: dict, default: Optional[str] = None) -> str:
+    """Route template (/api/files/search) instead of the raw URL to bound cardinality"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or default or "unmatched"
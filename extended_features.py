@@ -4,6 +4,7 @@
 """
 
 import os
+import re
 import sys
 import subprocess
 import time
@@ -11,32 +12,36 @@ import hashlib
 import json
 import zipfile
 import tarfile
+import math
+import logging
+import threading
+import ctypes
+import ctypes.util
+import errno
+import select
+import struct
+import uuid
+import zlib
+import fnmatch
+import shutil
+import stat
+import tempfile
+import heapq
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, List
-import psutil
+from typing import Dict, Any, List, Callable, Optional
 import platform
 
-try:
-    from PIL import ImageGrab, Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    print("⚠️ Встановіть Pillow для роботи зі скріншотами: pip install Pillow")
-
-try:
-    import pyperclip
-    PYPERCLIP_AVAILABLE = True
-except ImportError:
-    PYPERCLIP_AVAILABLE = False
-    print("⚠️ Встановіть pyperclip для роботи з буфером: pip install pyperclip")
-
-try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    print("⚠️ Встановіть plyer для сповіщень: pip install plyer")
+from ai_agent import (
+    system_sampler, event_bus, process_snapshots, process_tracker,
+    Config, parse_duration, is_error_result, message_template, optional_module, LazyModule,
+    CommandPlugin, command, plugin_registry
+)
+
+# Імпортуються при першому використанні: psutil - тут, необов'язкові Pillow/pyperclip/plyer/numpy - через optional_module
+psutil = LazyModule("psutil")
 
 # ============================================================================
 # МУЛЬТИМЕДІА ФУНКЦІЇ
@@ -51,15 +56,16 @@ class MultimediaManager:
     
     def take_screenshot(self, filename: str = None) -> Dict[str, Any]:
         """Зробити скріншот"""
-        if not PIL_AVAILABLE:
-            return {"success": False, "error": "❌ Pillow не встановлено"}
+        image_grab = optional_module("PIL.ImageGrab")
+        if image_grab is None:
+            return {"success": False, "error": "❌ Pillow не встановлено: pip install Pillow"}
         
         try:
             if not filename:
                 filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
             
             filepath = self.screenshots_dir / filename
-            screenshot = ImageGrab.grab()
+            screenshot = image_grab.grab()
             screenshot.save(filepath, "PNG")
             
             file_size = os.path.getsize(filepath)
@@ -74,15 +80,16 @@ class MultimediaManager:
     
     def compress_image(self, filepath: str, quality: int = 85) -> Dict[str, Any]:
         """Стиснути зображення"""
-        if not PIL_AVAILABLE:
-            return {"success": False, "error": "❌ Pillow не встановлено"}
+        image = optional_module("PIL.Image")
+        if image is None:
+            return {"success": False, "error": "❌ Pillow не встановлено: pip install Pillow"}
         
         try:
             if not os.path.exists(filepath):
                 return {"success": False, "error": "❌ Файл не існує"}
             
             original_size = os.path.getsize(filepath)
-            img = Image.open(filepath)
+            img = image.open(filepath)
             
             output_path = str(Path(filepath).with_suffix('')) + '_compressed' + Path(filepath).suffix
             img.save(output_path, quality=quality, optimize=True)
@@ -111,14 +118,137 @@ class MultimediaManager:
 # СИСТЕМНІ УТИЛІТИ
 # ============================================================================
 
+class CleanupPlanner:
+    """План очищення: один прохід scandir відбирає файли й рахує розмір, виконання - пулом потоків"""
+    
+    # Сокети й блокування сесії, які не можна чіпати навіть якщо вони старі
+    DEFAULT_EXCLUDE = [".X11-unix", ".ICE-unix", ".XIM-unix", ".font-unix", ".Test-unix",
+                       "systemd-private-*", "*.lock", "*.pid", "ssh-*", "tmux-*"]
+    
+    def __init__(self, min_age_hours: float = 24, patterns: List[str] = None, exclude: List[str] = None):
+        self.cutoff = time.time() - min_age_hours * 3600
+        self.patterns = patterns
+        self.exclude = self.DEFAULT_EXCLUDE + (exclude or [])
+    
+    @staticmethod
+    def default_dirs() -> List[str]:
+        """Тимчасові папки й кеші для поточної ОС"""
+        home = os.path.expanduser("~")
+        system = platform.system()
+        if system == "Windows":
+            candidates = [os.environ.get("TEMP"), os.path.join(os.environ.get("LOCALAPPDATA", ""), "Temp"),
+                          os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "Temp")]
+        elif system == "Darwin":
+            candidates = [tempfile.gettempdir(), os.path.join(home, "Library", "Caches")]
+        else:
+            data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+            candidates = [tempfile.gettempdir(), "/var/tmp",
+                          os.environ.get("XDG_CACHE_HOME") or os.path.join(home, ".cache"),
+                          os.path.join(data_home, "Trash", "files")]
+        seen, result = set(), []
+        for path in candidates:
+            if path and os.path.isdir(path):
+                real = os.path.realpath(path)
+                if real not in seen:
+                    seen.add(real)
+                    result.append(path)
+        return result
+    
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+    
+    def _eligible(self, name: str, st) -> bool:
+        if st.st_mtime > self.cutoff:
+            return False
+        return not self.patterns or any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+    
+    def _scan(self, path: str, items: List[tuple], errors: List[str]) -> tuple:
+        """Обхід папки; повертає (усе можна видалити, байтів до видалення, файлів) і додає кандидатів у items"""
+        whole, total, count = True, 0, 0
+        local: List[tuple] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self._excluded(entry.name):
+                        whole = False
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        errors.append(f"{entry.path}: {e}")
+                        whole = False
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        nested: List[tuple] = []
+                        sub_whole, sub_size, sub_count = self._scan(entry.path, nested, errors)
+                        # Папку видаляємо цілком лише тоді, коли підходить увесь її вміст
+                        if sub_whole and st.st_mtime <= self.cutoff and not self.patterns:
+                            local.append((entry.path, True, sub_size, sub_count))
+                        else:
+                            local.extend(nested)
+                            whole = False
+                        total += sub_size
+                        count += sub_count
+                    elif (stat.S_ISREG(st.st_mode) or stat.S_ISLNK(st.st_mode)) and self._eligible(entry.name, st):
+                        local.append((entry.path, False, st.st_size, 1))
+                        total += st.st_size
+                        count += 1
+                    else:
+                        whole = False
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+            whole = False
+        items.extend(local)
+        return whole, total, count
+    
+    def plan(self, directories: List[str]) -> Dict[str, Any]:
+        items, errors, per_dir = [], [], {}
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            before = len(items)
+            self._scan(directory, items, errors)
+            found = items[before:]
+            per_dir[directory] = {"files": sum(i[3] for i in found), "bytes": sum(i[2] for i in found)}
+        return {
+            "items": items,
+            "files": sum(item[3] for item in items),
+            "bytes": sum(item[2] for item in items),
+            "directories": per_dir,
+            "errors": errors
+        }
+    
+    @staticmethod
+    def _delete(item: tuple):
+        path, is_dir = item[0], item[1]
+        if is_dir:
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    
+    def execute(self, plan: Dict[str, Any], workers: int = 4) -> Dict[str, Any]:
+        freed, removed, errors = 0, 0, []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._delete, item): item for item in plan["items"]}
+            for future, item in futures.items():
+                try:
+                    future.result()
+                    freed += item[2]
+                    removed += item[3]
+                except OSError as e:
+                    errors.append(f"{item[0]}: {e}")
+        return {"files": removed, "bytes": freed, "errors": errors}
+
+
 class SystemUtilities:
     """Системні утиліти - буфер, сповіщення, клінап"""
     
     @staticmethod
     def clipboard_get() -> Dict[str, Any]:
         """Отримати вміст буфера обміну"""
-        if not PYPERCLIP_AVAILABLE:
-            return {"success": False, "error": "❌ pyperclip не встановлено"}
+        pyperclip = optional_module("pyperclip")
+        if pyperclip is None:
+            return {"success": False, "error": "❌ pyperclip не встановлено: pip install pyperclip"}
         
         try:
             content = pyperclip.paste()
@@ -129,8 +259,9 @@ class SystemUtilities:
     @staticmethod
     def clipboard_set(text: str) -> Dict[str, Any]:
         """Встановити вміст буфера обміну"""
-        if not PYPERCLIP_AVAILABLE:
-            return {"success": False, "error": "❌ pyperclip не встановлено"}
+        pyperclip = optional_module("pyperclip")
+        if pyperclip is None:
+            return {"success": False, "error": "❌ pyperclip не встановлено: pip install pyperclip"}
         
         try:
             pyperclip.copy(text)
@@ -141,7 +272,8 @@ class SystemUtilities:
     @staticmethod
     def send_notification(title: str, message: str, timeout: int = 10) -> Dict[str, Any]:
         """Відправити системне сповіщення"""
-        if not PLYER_AVAILABLE:
+        plyer = optional_module("plyer")
+        if plyer is None:
             # Fallback для Windows без plyer
             if platform.system() == "Windows":
                 try:
@@ -154,9 +286,10 @@ class SystemUtilities:
                         "success": False, 
                         "error": "❌ Встановіть plyer або win10toast: pip install plyer win10toast"
                     }
+            return {"success": False, "error": "❌ Встановіть plyer: pip install plyer"}
         
         try:
-            notification.notify(
+            plyer.notification.notify(
                 title=title,
                 message=message,
                 timeout=timeout
@@ -166,78 +299,65 @@ class SystemUtilities:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    def auto_cleanup(temp_dirs: List[str] = None) -> Dict[str, Any]:
-        """Автоматичне очищення тимчасових файлів"""
+    def auto_cleanup(temp_dirs: List[str] = None, dry_run: bool = False, min_age_hours: float = 24,
+                     patterns: List[str] = None, workers: int = 4) -> Dict[str, Any]:
+        """Очищення тимчасових файлів: план за один прохід, потім паралельне видалення"""
         try:
-            if temp_dirs is None:
-                temp_dirs = [
-                    os.environ.get('TEMP', 'C:\\Windows\\Temp'),
-                    os.path.expanduser('~\\AppData\\Local\\Temp')
-                ]
-            
-            cleaned_files = 0
-            freed_space = 0
-            errors = []
+            planner = CleanupPlanner(min_age_hours, patterns)
+            directories = temp_dirs or planner.default_dirs()
+            plan = planner.plan(directories)
+            largest = sorted(plan["items"], key=lambda item: item[2], reverse=True)[:10]
+            report = {
+                "directories": {
+                    path: {"files": info["files"], "size_mb": f"{info['bytes'] / 1024 / 1024:.2f} MB"}
+                    for path, info in plan["directories"].items()
+                },
+                "largest": [{"path": item[0], "size_mb": f"{item[2] / 1024 / 1024:.2f} MB"} for item in largest]
+            }
             
-            for temp_dir in temp_dirs:
-                if not os.path.exists(temp_dir):
-                    continue
-                
-                try:
-                    for item in os.listdir(temp_dir):
-                        item_path = os.path.join(temp_dir, item)
-                        try:
-                            if os.path.isfile(item_path):
-                                size = os.path.getsize(item_path)
-                                os.remove(item_path)
-                                cleaned_files += 1
-                                freed_space += size
-                            elif os.path.isdir(item_path):
-                                import shutil
-                                size = sum(f.stat().st_size for f in Path(item_path).rglob('*') if f.is_file())
-                                shutil.rmtree(item_path)
-                                cleaned_files += 1
-                                freed_space += size
-                        except (PermissionError, OSError) as e:
-                            errors.append(f"{item}: {str(e)}")
-                            continue
-                except Exception as e:
-                    errors.append(f"Помилка доступу до {temp_dir}: {str(e)}")
+            if dry_run:
+                return {
+                    "success": True,
+                    "dry_run": True,
+                    "cleaned_files": plan["files"],
+                    "freed_space_mb": f"{plan['bytes'] / 1024 / 1024:.2f} MB",
+                    "errors": plan["errors"][:20] or None,
+                    **report
+                }
             
+            done = planner.execute(plan, workers)
+            errors = plan["errors"] + done["errors"]
             return {
                 "success": True,
-                "cleaned_files": cleaned_files,
-                "freed_space_mb": f"{freed_space / 1024 / 1024:.2f} MB",
-                "errors": errors if errors else None
+                "dry_run": False,
+                "cleaned_files": done["files"],
+                "freed_space_mb": f"{done['bytes'] / 1024 / 1024:.2f} MB",
+                "errors": errors[:20] or None,
+                **report
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    def kill_frozen_apps(cpu_threshold: float = 0.1) -> Dict[str, Any]:
-        """Закрити завислі програми"""
+    def kill_frozen_apps(cpu_threshold: float = 0.1, window: float = 5.0) -> Dict[str, Any]:
+        """Закрити завислі програми (рішення за історією процесів, без пауз на кожен процес)"""
         try:
+            # Якщо трекер уже збирає історію - рішення миттєве, інакше одне спільне очікування
+            observed = process_tracker.ensure_window(window)
             frozen_apps = []
             
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'status']):
+            for record in process_tracker.frozen(window=window, cpu_threshold=cpu_threshold):
                 try:
-                    if proc.info['status'] == 'stopped' or (proc.info['cpu_percent'] == 0 and proc.info['status'] == 'running'):
-                        # Додаткова перевірка
-                        time.sleep(0.5)
-                        if not proc.is_running():
-                            continue
-                        
-                        cpu = proc.cpu_percent(interval=1.0)
-                        if cpu < cpu_threshold and proc.info['status'] not in ['sleeping', 'disk-sleep']:
-                            proc.terminate()
-                            frozen_apps.append(f"{proc.info['name']} (PID: {proc.info['pid']})")
+                    process_snapshots.process(record['pid']).terminate()
+                    frozen_apps.append(f"{record['name']} (PID: {record['pid']})")
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
             
             return {
                 "success": True,
                 "terminated": frozen_apps,
-                "count": len(frozen_apps)
+                "count": len(frozen_apps),
+                "observed_seconds": round(observed, 1)
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -277,62 +397,512 @@ class SystemUtilities:
 # МОНІТОРИНГ ТА АНАЛІТИКА
 # ============================================================================
 
+class P2Quantile:
+    """Потоковий квантиль (алгоритм P²): п'ять маркерів замість усієї вибірки"""
+    
+    def __init__(self, q: float):
+        self.q = q
+        self._initial: List[float] = []
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+    
+    def add(self, x: float):
+        if not self._heights:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                self._heights = sorted(self._initial)
+            return
+        
+        h, n = self._heights, self._positions
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+        
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        
+        # Коригуємо три внутрішні маркери параболічною (або лінійною) інтерполяцією
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = candidate
+                n[i] += d
+    
+    def value(self) -> float:
+        if self._heights:
+            return self._heights[2]
+        if not self._initial:
+            return 0.0
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(round(self.q * (len(ordered) - 1))))]
+
+
+class StreamingStats:
+    """Середнє, мінімум, максимум і квантилі з постійною пам'яттю"""
+    
+    def __init__(self, quantiles: tuple = (0.5, 0.95, 0.99)):
+        self.count = 0
+        self.mean = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.last = 0.0
+        self.quantiles = {q: P2Quantile(q) for q in quantiles}
+    
+    def add(self, x: float):
+        self.count += 1
+        self.mean += (x - self.mean) / self.count
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        self.last = x
+        for sketch in self.quantiles.values():
+            sketch.add(x)
+    
+    def to_dict(self, digits: int = 1) -> Dict[str, float]:
+        if not self.count:
+            return {}
+        result = {
+            "avg": round(self.mean, digits),
+            "min": round(self.min, digits),
+            "max": round(self.max, digits),
+            "last": round(self.last, digits)
+        }
+        for q, sketch in self.quantiles.items():
+            result[f"p{int(q * 100)}"] = round(sketch.value(), digits)
+        return result
+
+
+class PerformanceSession:
+    """Стан одного сеансу моніторингу: агрегати, пороги та активні тривоги"""
+    
+    METRICS = ("cpu", "memory", "disk", "swap")
+    
+    def __init__(self, interval: float, duration: float = None, thresholds: Dict[str, float] = None,
+                 sustain: float = 3.0, top_n: int = 5):
+        self.interval = interval
+        self.duration = duration
+        self.thresholds = thresholds or {}
+        self.top_n = top_n
+        # Тривога спрацьовує, лише якщо поріг перевищено протягом sustain секунд поспіль
+        self.sustain_samples = max(1, math.ceil(sustain / interval))
+        self.started_at = time.time()
+        self.finished_at = None
+        self.samples = 0
+        self.stats = {name: StreamingStats() for name in self.METRICS}
+        self.net_stats = {"sent": StreamingStats(), "recv": StreamingStats()}
+        self.per_core: List[StreamingStats] = []
+        self.processes: Dict[int, Dict[str, Any]] = {}
+        self.alerts = deque(maxlen=50)
+        self._over: Dict[str, int] = defaultdict(int)
+        self._firing: set = set()
+    
+    def add_sample(self, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Врахувати зріз; повертає нові події тривог"""
+        self.samples += 1
+        for name in self.METRICS:
+            self.stats[name].add(snapshot[name])
+        self.net_stats["sent"].add(snapshot["net_sent_rate"] / 1024)
+        self.net_stats["recv"].add(snapshot["net_recv_rate"] / 1024)
+        
+        per_cpu = snapshot.get("per_cpu") or []
+        while len(self.per_core) < len(per_cpu):
+            self.per_core.append(StreamingStats())
+        for core, value in zip(self.per_core, per_cpu):
+            core.add(value)
+        
+        return self._check_thresholds(snapshot)
+    
+    def _check_thresholds(self, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        events = []
+        for metric, threshold in self.thresholds.items():
+            value = snapshot.get(metric)
+            if value is None:
+                continue
+            if value >= threshold:
+                self._over[metric] += 1
+                if metric not in self._firing and self._over[metric] >= self.sustain_samples:
+                    self._firing.add(metric)
+                    events.append(self._alert(metric, value, threshold, "firing"))
+            else:
+                self._over[metric] = 0
+                # Гістерезис 5%, щоб значення біля порогу не спамило подіями
+                if metric in self._firing and value < threshold - 5:
+                    self._firing.discard(metric)
+                    events.append(self._alert(metric, value, threshold, "resolved"))
+        return events
+    
+    def _alert(self, metric: str, value: float, threshold: float, state: str) -> Dict[str, Any]:
+        label = {"cpu": "CPU", "memory": "RAM", "disk": "диску", "swap": "swap"}.get(metric, metric)
+        if state == "firing":
+            message = f"⚠️ Високе навантаження {label}: {value:.1f}% (поріг {threshold:.0f}%)"
+        else:
+            message = f"✅ Навантаження {label} нормалізувалося: {value:.1f}%"
+        event = {
+            "metric": metric,
+            "value": value,
+            "threshold": threshold,
+            "state": state,
+            "message": message,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.alerts.append(event)
+        return event
+    
+    def add_processes(self, processes: List[Dict[str, Any]]):
+        """Врахувати топ процесів за CPU; відстежується не більше 4*top_n процесів"""
+        for proc in processes[:self.top_n]:
+            entry = self.processes.get(proc["pid"])
+            if entry is None or entry["name"] != proc["name"]:
+                entry = self.processes[proc["pid"]] = {"name": proc["name"], "cpu": StreamingStats(quantiles=()), "rss_max": 0}
+            entry["cpu"].add(proc["cpu"])
+            entry["rss_max"] = max(entry["rss_max"], proc["rss"])
+        
+        limit = self.top_n * 4
+        if len(self.processes) > limit:
+            ranked = sorted(self.processes.items(), key=lambda item: item[1]["cpu"].mean, reverse=True)
+            self.processes = dict(ranked[:limit])
+    
+    def summary(self, running: bool = False) -> Dict[str, Any]:
+        end = time.time() if self.finished_at is None else self.finished_at
+        cpu, memory = self.stats["cpu"], self.stats["memory"]
+        top = sorted(self.processes.items(), key=lambda item: item[1]["cpu"].mean, reverse=True)[:self.top_n]
+        
+        return {
+            "success": True,
+            "running": running,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_seconds": round(end - self.started_at, 1),
+            "interval": self.interval,
+            "samples": self.samples,
+            "average": {
+                "cpu": f"{cpu.mean:.1f}%",
+                "memory": f"{memory.mean:.1f}%"
+            },
+            "peak": {
+                "cpu": f"{max(cpu.max, 0):.1f}%",
+                "memory": f"{max(memory.max, 0):.1f}%"
+            },
+            "metrics": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "network_kbps": {name: stats.to_dict() for name, stats in self.net_stats.items()},
+            "per_core": [dict(core=i, **stats.to_dict()) for i, stats in enumerate(self.per_core)],
+            "top_processes": [
+                {
+                    "pid": pid,
+                    "name": entry["name"],
+                    "cpu_avg": round(entry["cpu"].mean, 1),
+                    "cpu_max": round(entry["cpu"].max, 1),
+                    "memory_max_mb": round(entry["rss_max"] / 1024**2, 1)
+                }
+                for pid, entry in top
+            ],
+            "alerts": [alert["message"] for alert in self.alerts if alert["state"] == "firing"] or None
+        }
+
+
+class LogAnalyzer:
+    """Інкрементальний аналіз логів: пам'ятає зміщення кожного файлу й читає лише дописане"""
+    
+    READ_BLOCK = 8 * 1024 * 1024
+    RECENT = 10
+    MAX_TEMPLATES = 1000
+    
+    # Формат setup_logging: "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    RECORD = re.compile(
+        r"^(?P<ts>\d{4}-\d\d-\d\d[ T][\d:.,]+)\s+-\s+(?P<logger>\S+)\s+-\s+(?P<level>[A-Z]+)\s+-\s+(?P<msg>.*)$"
+    )
+    LEVEL = re.compile(r"\b(CRITICAL|FATAL|ERROR|WARNING|WARN|INFO|DEBUG|TRACE)\b")
+    LEVEL_ALIASES = {"FATAL": "CRITICAL", "WARN": "WARNING", "TRACE": "DEBUG"}
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        # Лічильники, шаблони й останні рядки - окремо для кожного файлу, разом зі зміщенням:
+        # інакше аналіз іншого шляху або повторне читання файлу рахує ті самі рядки двічі
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._seq = 0
+    
+    def _new_state(self, identity: tuple) -> Dict[str, Any]:
+        return {
+            "identity": identity,
+            "offset": 0,
+            "levels": Counter(),
+            "loggers": defaultdict(Counter),
+            "templates": {},
+            "recent_errors": deque(maxlen=self.RECENT),
+            "recent_warnings": deque(maxlen=self.RECENT)
+        }
+    
+    @classmethod
+    def template(cls, message: str) -> str:
+        """Шаблон повідомлення: числа, шляхи, hex, uuid, IP і час замінено заповнювачами"""
+        return message_template(message)
+    
+    def _classify(self, line: str):
+        match = self.RECORD.match(line)
+        if match:
+            return match["level"], match["logger"], match["msg"]
+        if line[:1].isspace() or line.startswith("Traceback"):
+            # Продовження попереднього запису (трасування стеку)
+            return None, None, None
+        found = self.LEVEL.search(line)
+        if found:
+            return found.group(1), "-", line
+        lowered = line.lower()
+        if "traceback" in lowered or "exception" in lowered:
+            return "ERROR", "-", line
+        return None, None, None
+    
+    def _add_template(self, state: Dict[str, Any], level: str, message: str, source: str):
+        templates = state["templates"]
+        key = self.template(message)
+        cluster = templates.get(key)
+        now = datetime.now().isoformat(timespec="seconds")
+        if cluster is None:
+            if len(templates) >= self.MAX_TEMPLATES:
+                rarest = min(templates, key=lambda k: templates[k]["count"])
+                del templates[rarest]
+            cluster = templates[key] = {"template": key, "level": level, "count": 0,
+                                        "example": message[:300], "file": source, "first_seen": now}
+        cluster["count"] += 1
+        cluster["last_seen"] = now
+    
+    def _consume(self, state: Dict[str, Any], text: str, source: str) -> int:
+        lines = 0
+        for line in text.splitlines():
+            level, logger, message = self._classify(line)
+            if level is None:
+                continue
+            level = self.LEVEL_ALIASES.get(level, level)
+            lines += 1
+            state["levels"][level] += 1
+            state["loggers"][logger][level] += 1
+            if level in ("ERROR", "CRITICAL", "WARNING"):
+                # Порядковий номер - щоб злити останні рядки кількох файлів у порядку читання
+                self._seq += 1
+                recent = state["recent_warnings" if level == "WARNING" else "recent_errors"]
+                recent.append((self._seq, line.strip()))
+                self._add_template(state, level, message.strip(), source)
+        return lines
+    
+    def _read_new(self, path: str) -> int:
+        """Дочитати файл від збереженого зміщення; ротацію/обрізання виявляємо за inode і розміром"""
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        state = self.files.get(key)
+        identity = (st.st_dev, st.st_ino)
+        if state is None or state["identity"] != identity or st.st_size < state["offset"]:
+            # Новий вміст за цим шляхом - старі підсумки файлу вже не про нього
+            state = self.files[key] = self._new_state(identity)
+        if st.st_size == state["offset"]:
+            return 0
+        
+        consumed = 0
+        with open(path, "rb") as f:
+            f.seek(state["offset"])
+            carry = b""
+            while True:
+                block = f.read(self.READ_BLOCK)
+                if not block:
+                    break
+                data = carry + block
+                # Недописаний останній рядок лишаємо на наступний запуск
+                cut = data.rfind(b"\n") + 1
+                carry = data[cut:]
+                if cut:
+                    self._consume(state, data[:cut].decode("utf-8", errors="replace"), path)
+                    consumed += cut
+                    state["offset"] += cut
+        return consumed
+    
+    def _aggregate(self, states: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Підсумок лише по запитаних файлах"""
+        levels, loggers, templates = Counter(), defaultdict(Counter), {}
+        for state in states:
+            levels.update(state["levels"])
+            for name, counts in state["loggers"].items():
+                loggers[name].update(counts)
+            for key, cluster in state["templates"].items():
+                merged = templates.get(key)
+                if merged is None:
+                    templates[key] = dict(cluster)
+                    continue
+                merged["count"] += cluster["count"]
+                merged["first_seen"] = min(merged["first_seen"], cluster["first_seen"])
+                merged["last_seen"] = max(merged["last_seen"], cluster["last_seen"])
+        
+        def recent(name):
+            rows = sorted(row for state in states for row in state[name])
+            return [line for _, line in rows[-self.RECENT:]]
+        
+        top_templates = sorted(templates.values(), key=lambda c: c["count"], reverse=True)[:10]
+        top_loggers = sorted(loggers.items(), key=lambda item: sum(item[1].values()), reverse=True)[:10]
+        return {
+            "levels": dict(levels),
+            "loggers": {name: dict(counts) for name, counts in top_loggers},
+            "top_templates": top_templates,
+            "recent_errors": recent("recent_errors"),
+            "recent_warnings": recent("recent_warnings")
+        }
+    
+    def analyze(self, paths: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with self._lock:
+            new_bytes, errors, states = 0, [], []
+            for path in paths:
+                try:
+                    new_bytes += self._read_new(path)
+                    states.append(self.files[os.path.abspath(path)])
+                except OSError as e:
+                    errors.append(f"{path}: {e}")
+            # Зниклі файли (видалені старі логи) більше не відстежуємо; незапитані - лишаються
+            for key in [k for k in self.files if not os.path.exists(k)]:
+                del self.files[key]
+            
+            return {
+                "files": len(paths),
+                "new_bytes": new_bytes,
+                **self._aggregate(states),
+                "read_errors": errors,
+                "elapsed": round(time.perf_counter() - started, 3)
+            }
+
+
 class MonitoringManager:
     """Моніторинг системи та аналітика"""
     
+    DEFAULT_THRESHOLDS = {"cpu": 80.0, "memory": 85.0, "disk": 95.0}
+    MIN_INTERVAL = 0.1
+    
     def __init__(self, db=None):
         self.db = db
         self.monitoring_active = False
         self.monitoring_thread = None
+        self.session: PerformanceSession = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.logs = LogAnalyzer()
     
-    def monitor_performance(self, duration: int = 60) -> Dict[str, Any]:
-        """Моніторинг продуктивності системи"""
-        try:
-            samples = []
-            interval = 2  # секунди
-            num_samples = duration // interval
-            
-            for _ in range(num_samples):
-                sample = {
-                    "timestamp": datetime.now().isoformat(),
-                    "cpu": psutil.cpu_percent(interval=1),
-                    "memory": psutil.virtual_memory().percent,
-                    "disk": psutil.disk_usage('/').percent if platform.system() != "Windows" else psutil.disk_usage('C:\\').percent
-                }
-                samples.append(sample)
-                time.sleep(interval - 1)  # -1 секунда вже витрачена на cpu_percent
+    def start_monitoring(self, interval: float = 1.0, duration: float = None,
+                         thresholds: Dict[str, float] = None, process_interval: float = 5.0,
+                         top_n: int = 5) -> Dict[str, Any]:
+        """Запустити фоновий збір показників (duration=None - до зупинки)"""
+        with self._lock:
+            if self.monitoring_active:
+                return {"success": False, "error": "❌ Моніторинг вже запущено (monitor_stop для зупинки)"}
+            if interval < self.MIN_INTERVAL:
+                return {"success": False, "error": f"❌ Мінімальний інтервал: {self.MIN_INTERVAL} с"}
             
-            # Аналіз
-            avg_cpu = sum(s['cpu'] for s in samples) / len(samples)
-            avg_memory = sum(s['memory'] for s in samples) / len(samples)
-            max_cpu = max(s['cpu'] for s in samples)
-            max_memory = max(s['memory'] for s in samples)
-            
-            alerts = []
-            if avg_cpu > 80:
-                alerts.append(f"⚠️ Високе навантаження CPU: {avg_cpu:.1f}%")
-            if avg_memory > 85:
-                alerts.append(f"⚠️ Високе використання RAM: {avg_memory:.1f}%")
-            
-            return {
-                "success": True,
-                "duration_seconds": duration,
-                "samples": len(samples),
-                "average": {
-                    "cpu": f"{avg_cpu:.1f}%",
-                    "memory": f"{avg_memory:.1f}%"
-                },
-                "peak": {
-                    "cpu": f"{max_cpu:.1f}%",
-                    "memory": f"{max_memory:.1f}%"
-                },
-                "alerts": alerts if alerts else None
-            }
+            limits = dict(self.DEFAULT_THRESHOLDS)
+            limits.update(thresholds or {})
+            self.session = PerformanceSession(interval, duration, limits, top_n=top_n)
+            self._stop_event.clear()
+            self.monitoring_active = True
+            self.monitoring_thread = threading.Thread(
+                target=self._run,
+                args=(self.session, process_interval),
+                name="performance-monitor",
+                daemon=True
+            )
+            self.monitoring_thread.start()
+        
+        return {
+            "success": True,
+            "status": "started",
+            "interval": interval,
+            "duration_seconds": duration,
+            "thresholds": limits
+        }
+    
+    def stop_monitoring(self) -> Dict[str, Any]:
+        """Зупинити фоновий збір і повернути підсумок"""
+        with self._lock:
+            if not self.monitoring_active:
+                if self.session is None:
+                    return {"success": False, "error": "❌ Моніторинг не запущено"}
+                return self.session.summary()
+            self._stop_event.set()
+            thread = self.monitoring_thread
+        thread.join(timeout=max(self.session.interval, 1.0) + 1.0)
+        return self.session.summary()
+    
+    def monitoring_status(self) -> Dict[str, Any]:
+        """Поточні агрегати без зупинки збору"""
+        if self.session is None:
+            return {"success": False, "error": "❌ Моніторинг ще не запускався"}
+        return self.session.summary(running=self.monitoring_active)
+    
+    def monitor_performance(self, duration: int = 60, interval: float = 1.0) -> Dict[str, Any]:
+        """Моніторинг продуктивності у фоні; підсумок приходить подією monitor.finished"""
+        try:
+            return self.start_monitoring(interval=interval, duration=duration)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def log_analyzer(self, log_path: str = None) -> Dict[str, Any]:
-        """Аналіз лог-файлів"""
+    def _run(self, session: PerformanceSession, process_interval: float):
+        """Цикл семплера: тіки за розкладом, без накопичення дрейфу"""
+        try:
+            next_tick = time.monotonic()
+            next_processes = next_tick
+            deadline = next_tick + session.duration if session.duration else None
+            last_ts = None
+            
+            while not self._stop_event.is_set():
+                # cpu_percent(None) має одну базу на процес: кожен зайвий sample() вкорочує вікно виміру
+                # циклу API. Якщо з минулого тіку хтось уже зняв зріз - беремо його, інакше знімаємо самі
+                latest = system_sampler.latest
+                if latest is not None and latest["ts"] != last_ts and time.time() - latest["ts"] <= session.interval:
+                    snapshot = latest
+                else:
+                    snapshot = system_sampler.sample()
+                last_ts = snapshot["ts"]
+                for event in session.add_sample(snapshot):
+                    event_bus.publish("monitor.alert", event)
+                
+                now = time.monotonic()
+                if now >= next_processes:
+                    session.add_processes(self._top_processes())
+                    next_processes = now + process_interval
+                if deadline is not None and now >= deadline:
+                    break
+                
+                next_tick += session.interval
+                if next_tick < now:
+                    # Пропущені тіки (сон, перевантаження) не наздоганяємо
+                    next_tick = now
+                self._stop_event.wait(next_tick - now)
+        except Exception as e:
+            logging.error(f"Помилка фонового моніторингу: {e}")
+        finally:
+            session.finished_at = time.time()
+            self.monitoring_active = False
+        
+        if not self._stop_event.is_set():
+            event_bus.publish("monitor.finished", session.summary())
+    
+    @staticmethod
+    def _top_processes() -> List[Dict[str, Any]]:
+        """Процеси за CPU зі спільного знімка таблиці процесів"""
+        return [record for record in process_snapshots.get().top("cpu", 50) if record['cpu'] is not None]
+    
+    def log_analyzer(self, log_path: str = None, reset: bool = False) -> Dict[str, Any]:
+        """Аналіз лог-файлів: повторний виклик читає лише нові рядки"""
         try:
             if not log_path:
                 log_path = "logs"
@@ -340,38 +910,30 @@ class MonitoringManager:
             if not os.path.exists(log_path):
                 return {"success": False, "error": "❌ Шлях не існує"}
             
-            errors = []
-            warnings = []
-            info_count = 0
-            
             # Якщо це директорія, знайти всі .log файли
             if os.path.isdir(log_path):
-                log_files = list(Path(log_path).glob("*.log"))
+                log_files = sorted(str(p) for p in Path(log_path).glob("*.log"))
             else:
-                log_files = [Path(log_path)]
+                log_files = [str(Path(log_path))]
             
-            for log_file in log_files:
-                try:
-                    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        for line in f:
-                            line_lower = line.lower()
-                            if 'error' in line_lower or 'exception' in line_lower:
-                                errors.append(line.strip())
-                            elif 'warning' in line_lower or 'warn' in line_lower:
-                                warnings.append(line.strip())
-                            elif 'info' in line_lower:
-                                info_count += 1
-                except Exception:
-                    continue
+            if reset:
+                self.logs.reset()
+            res = self.logs.analyze(log_files)
+            levels = res["levels"]
             
             return {
                 "success": True,
-                "files_analyzed": len(log_files),
-                "errors": len(errors),
-                "warnings": len(warnings),
-                "info_messages": info_count,
-                "recent_errors": errors[-10:] if errors else [],
-                "recent_warnings": warnings[-10:] if warnings else []
+                "files_analyzed": res["files"],
+                "new_bytes": res["new_bytes"],
+                "errors": levels.get("ERROR", 0) + levels.get("CRITICAL", 0),
+                "warnings": levels.get("WARNING", 0),
+                "info_messages": levels.get("INFO", 0),
+                "levels": levels,
+                "loggers": res["loggers"],
+                "error_templates": res["top_templates"],
+                "recent_errors": res["recent_errors"],
+                "recent_warnings": res["recent_warnings"],
+                "elapsed_seconds": res["elapsed"]
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -379,26 +941,17 @@ class MonitoringManager:
     def system_report(self) -> Dict[str, Any]:
         """Комплексний звіт про систему"""
         try:
-            cpu = psutil.cpu_percent(interval=1, percpu=False)
+            cpu = system_sampler.get_latest()['cpu']
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('C:\\' if platform.system() == "Windows" else '/')
             boot_time = datetime.fromtimestamp(psutil.boot_time())
             uptime = datetime.now() - boot_time
             
             # Топ процесів
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    processes.append({
-                        "name": proc.info['name'],
-                        "cpu": proc.info['cpu_percent'],
-                        "memory": proc.info['memory_percent']
-                    })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            processes.sort(key=lambda x: x['cpu'], reverse=True)
-            top_processes = processes[:10]
+            top_processes = [
+                {"name": record['name'], "cpu": record['cpu'], "memory": record['memory']}
+                for record in process_snapshots.get().top("cpu", 10)
+            ]
             
             report = {
                 "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -486,109 +1039,1305 @@ class NetworkUtilities:
 # АВТОМАТИЗАЦІЯ
 # ============================================================================
 
+def _file_index_metadata(path: str, stat_result) -> Dict[str, Any]:
+    """Метадані файлу у форматі file_index (як у index_directory)"""
+    name = os.path.basename(path)
+    extension = os.path.splitext(name)[1]
+    return {
+        "filename": name,
+        "extension": extension,
+        "size": stat_result.st_size,
+        "modified_date": datetime.fromtimestamp(stat_result.st_mtime).isoformat(),
+        "hash": hashlib.md5(path.encode()).hexdigest(),
+        "tags": f"{extension} {name}"
+    }
+
+
+class _InotifyBackend:
+    """Події ядра Linux через inotify (ctypes), з окремим watch на кожну підпапку"""
+    
+    name = "inotify"
+    
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+    EVENT = struct.Struct("iIII")
+    # MOVED_FROM без пари за цей час - файл переміщено за межі папки
+    MOVE_TIMEOUT = 0.5
+    
+    _libc = None
+    
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        if cls._libc is None:
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                cls._libc = libc
+            except (OSError, AttributeError):
+                cls._libc = False
+        return bool(cls._libc)
+    
+    def __init__(self, root: str, recursive: bool = True):
+        self.root = root
+        self.recursive = recursive
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.paths: Dict[int, str] = {}
+        self._moves: Dict[int, tuple] = {}
+        try:
+            self._add_tree(root)
+        except OSError:
+            os.close(self.fd)
+            raise
+    
+    def _add_watch(self, path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                raise OSError(code, "вичерпано ліміт inotify (fs.inotify.max_user_watches)")
+            # Папку вже видалили або немає доступу - пропускаємо
+            return False
+        self.paths[wd] = path
+        return True
+    
+    def _add_tree(self, path: str, report: bool = False) -> List[tuple]:
+        """Поставити watch на папку й підпапки; report - повернути вже наявні файли як додані"""
+        events = []
+        if not self._add_watch(path):
+            return events
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if report:
+                            events.append(("added", entry.path, is_dir, None))
+                        if is_dir and self.recursive and self._add_watch(entry.path):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+            if not self.recursive:
+                break
+        return events
+    
+    def _subtree_wds(self, path: str) -> List[int]:
+        prefix = path + os.sep
+        return [wd for wd, p in self.paths.items() if p == path or p.startswith(prefix)]
+    
+    def _rename(self, old: str, new: str):
+        for wd in self._subtree_wds(old):
+            self.paths[wd] = new + self.paths[wd][len(old):]
+    
+    def _forget(self, path: str):
+        # Переміщена назовні папка лишається під watch - знімаємо, щоб не отримувати чужих подій
+        for wd in self._subtree_wds(path):
+            self._libc.inotify_rm_watch(self.fd, wd)
+            self.paths.pop(wd, None)
+    
+    def _translate(self, wd: int, mask: int, cookie: int, name: str) -> List[tuple]:
+        if mask & self.IN_Q_OVERFLOW:
+            return [("overflow", self.root, True, None)]
+        if mask & self.IN_IGNORED:
+            self.paths.pop(wd, None)
+            return []
+        base = self.paths.get(wd)
+        if base is None:
+            return []
+        path = os.path.join(base, name) if name else base
+        is_dir = bool(mask & self.IN_ISDIR)
+        
+        if mask & self.IN_CREATE:
+            events = [("added", path, is_dir, None)]
+            if is_dir and self.recursive:
+                # Файли, створені до появи watch, інакше загубились би
+                events.extend(self._add_tree(path, report=True))
+            return events
+        if mask & self.IN_MOVED_FROM:
+            self._moves[cookie] = (path, is_dir, time.monotonic())
+            return []
+        if mask & self.IN_MOVED_TO:
+            source = self._moves.pop(cookie, None)
+            if source is None:
+                events = [("added", path, is_dir, None)]
+                if is_dir and self.recursive:
+                    events.extend(self._add_tree(path, report=True))
+                return events
+            if is_dir:
+                self._rename(source[0], path)
+            return [("moved", path, is_dir, source[0])]
+        if mask & self.IN_DELETE:
+            return [("deleted", path, is_dir, None)]
+        if mask & self.IN_DELETE_SELF:
+            return [("deleted", path, True, None)] if path == self.root else []
+        if not is_dir and mask & (self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE):
+            return [("modified", path, False, None)]
+        return []
+    
+    def read(self, timeout: float) -> List[tuple]:
+        """Сирі події (тип, шлях, is_dir, звідки) за не більше ніж timeout секунд"""
+        events = []
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                data = b""
+            offset = 0
+            while offset + self.EVENT.size <= len(data):
+                wd, mask, cookie, length = self.EVENT.unpack_from(data, offset)
+                start = offset + self.EVENT.size
+                name = os.fsdecode(data[start:start + length].rstrip(b"\0"))
+                offset = start + length
+                events.extend(self._translate(wd, mask, cookie, name))
+        
+        now = time.monotonic()
+        for cookie, (path, is_dir, seen) in list(self._moves.items()):
+            if now - seen >= self.MOVE_TIMEOUT:
+                del self._moves[cookie]
+                if is_dir:
+                    self._forget(path)
+                events.append(("deleted", path, is_dir, None))
+        return events
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Запасний варіант: періодичний scandir і порівняння (inode, розмір, mtime)"""
+    
+    name = "polling"
+    
+    def __init__(self, root: str, recursive: bool = True, interval: float = 1.0):
+        self.root = root
+        self.recursive = recursive
+        self.interval = interval
+        self.state = self._scan()
+        self._next_scan = time.monotonic() + interval
+    
+    def _scan(self) -> Dict[str, tuple]:
+        state = {}
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        state[entry.path] = (st.st_ino, st.st_size, st.st_mtime_ns, is_dir)
+                        if is_dir and self.recursive:
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return state
+    
+    def read(self, timeout: float) -> List[tuple]:
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next_scan = time.monotonic() + self.interval
+        
+        previous, current = self.state, self._scan()
+        self.state = current
+        gone = {path: info for path, info in previous.items() if path not in current}
+        gone_by_inode = {info[0]: path for path, info in gone.items()}
+        
+        events = []
+        for path, info in current.items():
+            old = previous.get(path)
+            if old is None:
+                source = gone_by_inode.pop(info[0], None)
+                if source is not None and gone[source][3] == info[3]:
+                    del gone[source]
+                    events.append(("moved", path, info[3], source))
+                else:
+                    events.append(("added", path, info[3], None))
+            elif not info[3] and old[1:3] != info[1:3]:
+                events.append(("modified", path, False, None))
+        for path, info in gone.items():
+            events.append(("deleted", path, info[3], None))
+        return events
+    
+    def close(self):
+        self.state = {}
+
+
+class DirectoryWatcher:
+    """Фонове спостереження за папкою: пачки подій після затишшя (debounce) публікуються в event_bus"""
+    
+    TOPIC = "fs.changes"
+    FINISHED_TOPIC = "fs.watch.finished"
+    TICK = 0.1
+    
+    def __init__(self, directory: str, duration: float = None, recursive: bool = True,
+                 debounce: float = 0.5, max_delay: float = 5.0, poll_interval: float = 1.0,
+                 backend: str = "auto"):
+        self.id = uuid.uuid4().hex[:8]
+        self.directory = os.path.abspath(directory)
+        self.duration = duration
+        self.recursive = recursive
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.requested_backend = backend
+        self.backend = None
+        self.active = False
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.counts: Dict[str, int] = {}
+        self.transient = 0
+        self.overflows = 0
+        self.recent = deque(maxlen=100)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _open_backend(self):
+        if self.requested_backend != "polling" and _InotifyBackend.available():
+            try:
+                return _InotifyBackend(self.directory, self.recursive)
+            except OSError as e:
+                logging.warning(f"inotify недоступний ({e}), перехід на опитування")
+        return _PollingBackend(self.directory, self.recursive, self.poll_interval)
+    
+    def start(self):
+        # Watch ставиться до повернення, тож зміни одразу після старту не губляться
+        self.backend = self._open_backend()
+        self.started_at = time.time()
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name=f"watch-{self.id}", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+    
+    def _merge(self, kind: str, path: str, is_dir: bool, source: str = None):
+        """Злиття серії сирих подій по шляху в одну підсумкову"""
+        pending = self._pending
+        if kind == "moved":
+            previous = pending.pop(source, None)
+            if previous is not None and previous["type"] == "added":
+                pending[path] = {"type": "added", "path": path, "is_dir": is_dir}
+            else:
+                origin = previous["src"] if previous is not None and previous["type"] == "moved" else source
+                pending[path] = {"type": "moved", "path": path, "is_dir": is_dir, "src": origin}
+            return
+        
+        previous = pending.get(path)
+        if kind == "added":
+            kind = "modified" if previous is not None and previous["type"] == "deleted" else "added"
+        elif kind == "modified":
+            if previous is not None and previous["type"] in ("added", "moved"):
+                return
+        elif kind == "deleted" and previous is not None:
+            if previous["type"] == "added":
+                # Файл прожив менше за вікно debounce - рахуємо, але не розсилаємо
+                del pending[path]
+                self.transient += 1
+                return
+            if previous["type"] == "moved":
+                del pending[path]
+                path = previous["src"]
+        pending[path] = {"type": kind, "path": path, "is_dir": is_dir}
+    
+    def _flush(self):
+        if not self._pending:
+            return
+        events = list(self._pending.values())
+        self._pending = {}
+        for event in events:
+            self.counts[event["type"]] = self.counts.get(event["type"], 0) + 1
+        self.recent.extend(events)
+        event_bus.publish(self.TOPIC, {
+            "watch_id": self.id,
+            "directory": self.directory,
+            "events": events,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    def _run(self):
+        try:
+            deadline = time.monotonic() + self.duration if self.duration else None
+            while not self._stop_event.is_set():
+                raw = self.backend.read(self.TICK)
+                now = time.monotonic()
+                for kind, path, is_dir, source in raw:
+                    if kind == "overflow":
+                        self.overflows += 1
+                        logging.warning(f"Переповнення черги inotify для {self.directory}: частину подій втрачено")
+                        continue
+                    if not self._pending:
+                        self._first_event = now
+                    self._last_event = now
+                    self._merge(kind, path, is_dir, source)
+                
+                if self._pending and (now - self._last_event >= self.debounce
+                                      or now - self._first_event >= self.max_delay):
+                    self._flush()
+                if deadline is not None and now >= deadline:
+                    break
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"Помилка спостереження за {self.directory}: {e}")
+        finally:
+            self._flush()
+            self.backend.close()
+            self.finished_at = time.time()
+            self.active = False
+        event_bus.publish(self.FINISHED_TOPIC, self.summary())
+    
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        result = {
+            "success": self.error is None,
+            "watch_id": self.id,
+            "directory": self.directory,
+            "backend": self.backend.name if self.backend else None,
+            "running": self.active,
+            "duration_seconds": round(end - self.started_at, 1) if self.started_at else 0,
+            "total_changes": sum(self.counts.values()),
+            "counts": dict(self.counts),
+            "transient": self.transient,
+            "overflows": self.overflows,
+            "recent": list(self.recent)[-20:]
+        }
+        if self.error is not None:
+            result["error"] = f"❌ {self.error}"
+        return result
+
+
+class ContentChunker:
+    """Розбиття файлу на шматки змінного розміру за вмістом (gear-хеш останніх 16 байт)"""
+    
+    WINDOW = 16
+    SLICE = 1024 * 1024
+    
+    def __init__(self, min_size: int = 128 * 1024, avg_bits: int = 19, max_size: int = 2 * 1024 * 1024,
+                 read_size: int = 4 * 1024 * 1024):
+        self.read_size = read_size
+        # Без numpy файли ріжуться на шматки фіксованого розміру
+        self.np = optional_module("numpy")
+        self.mode = "cdc" if self.np is not None else "fixed"
+        if self.mode == "cdc":
+            self.min_size, self.max_size = min_size, max_size
+            self.mask = (1 << avg_bits) - 1
+            # Таблиця з sha256, а не з RNG: межі шматків не залежать від версії numpy
+            seed = b"".join(hashlib.sha256(bytes([i])).digest()[:4] for i in range(256))
+            self.gear = self.np.frombuffer(seed, dtype="<u4").astype(self.np.uint32)
+        else:
+            self.min_size = self.max_size = min_size + (1 << avg_bits)
+    
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "min": self.min_size, "max": self.max_size,
+                "mask": getattr(self, "mask", None)}
+    
+    def _candidates(self, data: bytes) -> "np.ndarray":
+        """Зміщення можливих меж: кінець байта, де хеш вікна має нульові молодші біти"""
+        np = self.np
+        raw = np.frombuffer(data, dtype=np.uint8)
+        found = []
+        # Шматками по SLICE з перекриттям у вікно, щоб тимчасові масиви були малі
+        for start in range(0, len(raw), self.SLICE):
+            lo = max(0, start - self.WINDOW + 1)
+            acc = self.gear[raw[lo:start + self.SLICE]]
+            step = 1
+            while step < self.WINDOW:
+                acc[step:] += acc[:-step] << np.uint32(step)
+                step *= 2
+            hits = np.flatnonzero((acc[start - lo:] & np.uint32(self.mask)) == 0)
+            found.append(hits + start + 1)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+    
+    def _boundaries(self, data: bytes, final: bool) -> List[int]:
+        n = len(data)
+        candidates = self._candidates(data) if self.mode == "cdc" else None
+        cuts, start = [], 0
+        while start + self.min_size < n:
+            limit = start + self.max_size
+            cut = None
+            if candidates is not None:
+                k = int(self.np.searchsorted(candidates, start + self.min_size))
+                if k < len(candidates) and candidates[k] <= min(limit, n):
+                    cut = int(candidates[k])
+            if cut is None:
+                if limit > n:
+                    break
+                cut = limit
+            cuts.append(cut)
+            start = cut
+        if final and start < n:
+            cuts.append(n)
+        return cuts
+    
+    def split(self, stream):
+        """Генератор шматків (bytes) з відкритого двійкового файлу"""
+        pending = b""
+        while True:
+            block = stream.read(self.read_size)
+            data = pending + block if pending else block
+            position = 0
+            for cut in self._boundaries(data, final=not block):
+                yield data[position:cut]
+                position = cut
+            if not block:
+                return
+            pending = data[position:]
+
+
+class BackupRepository:
+    """Сховище бекапів: стиснуті шматки за sha256 (chunks/) і маніфест на кожен знімок (snapshots/)"""
+    
+    COMPRESSION_LEVEL = 3
+    
+    def __init__(self, root: str, workers: int = None):
+        self.root = os.path.abspath(root)
+        self.chunks_dir = os.path.join(self.root, "chunks")
+        self.snapshots_dir = os.path.join(self.root, "snapshots")
+        self.workers = workers or min(8, (os.cpu_count() or 2))
+        self._lock = threading.Lock()
+        self._claimed: set = set()
+    
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+    
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    
+    def _store_chunk(self, data: bytes) -> tuple:
+        """Хешування у потоці пулу (hashlib і zlib відпускають GIL); пишемо лише нові шматки"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        with self._lock:
+            if digest in self._claimed:
+                return digest, 0
+            self._claimed.add(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zlib.compress(data, self.COMPRESSION_LEVEL)
+        self._write_atomic(path, packed)
+        return digest, len(packed)
+    
+    def read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"пошкоджений шматок {digest[:12]}")
+        return data
+    
+    def list_snapshots(self) -> List[str]:
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+    
+    def load(self, snapshot_id: str = None) -> Dict[str, Any]:
+        """Маніфест знімка (за замовчуванням - останнього)"""
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError("у сховищі немає знімків")
+        snapshot_id = snapshot_id or snapshots[-1]
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _previous_files(self, source: str, chunking: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        for snapshot_id in reversed(self.list_snapshots()):
+            try:
+                manifest = self.load(snapshot_id)
+            except (OSError, ValueError):
+                continue
+            if manifest["source"] == source and manifest.get("chunking") == chunking:
+                return {entry["path"]: entry for entry in manifest["files"]}
+        return {}
+    
+    def _walk(self, source: str):
+        """(тип, відносний шлях, повний шлях) для файлів, папок і символьних посилань"""
+        if os.path.isfile(source):
+            yield "file", os.path.basename(source), source
+            return
+        stack = [source]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        rel = os.path.relpath(entry.path, source).replace(os.sep, "/")
+                        if entry.is_symlink():
+                            yield "link", rel, entry.path
+                        elif entry.is_dir():
+                            yield "dir", rel, entry.path
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            yield "file", rel, entry.path
+            except OSError as e:
+                logging.warning(f"Бекап: пропущено {current}: {e}")
+    
+    def snapshot(self, source: str) -> Dict[str, Any]:
+        """Новий знімок: незмінені файли (розмір+mtime) беруться з попереднього маніфесту без читання"""
+        started = time.perf_counter()
+        source = os.path.abspath(source)
+        chunker = ContentChunker()
+        previous = self._previous_files(source, chunker.params)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        
+        files, dirs, links, hashing = [], [], [], []
+        stats = {"files": 0, "reused": 0, "changed": 0, "bytes_total": 0, "bytes_read": 0,
+                 "chunks": 0, "new_chunks": 0, "bytes_stored": 0, "skipped": []}
+        # Обмежуємо кількість шматків у черзі пулу, щоб не тримати весь файл у пам'яті
+        slots = threading.BoundedSemaphore(self.workers * 2)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for kind, rel, path in self._walk(source):
+                if kind == "dir":
+                    dirs.append(rel)
+                    continue
+                if kind == "link":
+                    try:
+                        links.append({"path": rel, "target": os.readlink(path)})
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    st = os.stat(path)
+                    entry = {"path": rel, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                             "mode": st.st_mode & 0o7777}
+                    old = previous.get(rel)
+                    if old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                        entry["chunks"] = old["chunks"]
+                        stats["reused"] += 1
+                    else:
+                        pending = []
+                        with open(path, "rb") as f:
+                            for chunk in chunker.split(f):
+                                slots.acquire()
+                                future = pool.submit(self._store_chunk, chunk)
+                                future.add_done_callback(lambda _: slots.release())
+                                pending.append(future)
+                        hashing.append((entry, pending))
+                        stats["changed"] += 1
+                        stats["bytes_read"] += st.st_size
+                except OSError as e:
+                    stats["skipped"].append(f"{rel}: {e}")
+                    continue
+                stats["files"] += 1
+                stats["bytes_total"] += st.st_size
+                files.append(entry)
+            
+            for entry, pending in hashing:
+                entry["chunks"] = []
+                for future in pending:
+                    digest, stored = future.result()
+                    entry["chunks"].append(digest)
+                    if stored:
+                        stats["new_chunks"] += 1
+                        stats["bytes_stored"] += stored
+        self._claimed.clear()
+        stats["chunks"] = sum(len(entry["chunks"]) for entry in files)
+        
+        snapshot_id = datetime.now().strftime("backup_%Y%m%d_%H%M%S")
+        manifest_path = os.path.join(self.snapshots_dir, f"{snapshot_id}.json")
+        suffix = 1
+        while os.path.exists(manifest_path):
+            suffix += 1
+            manifest_path = os.path.join(self.snapshots_dir, f"{snapshot_id}_{suffix}.json")
+        if suffix > 1:
+            snapshot_id = f"{snapshot_id}_{suffix}"
+        
+        manifest = {
+            "id": snapshot_id,
+            "source": source,
+            "single_file": os.path.isfile(source),
+            "created": datetime.now().isoformat(),
+            "chunking": chunker.params,
+            "dirs": dirs,
+            "links": links,
+            "files": files
+        }
+        # Маніфест пишеться останнім: недописаний знімок не видно
+        self._write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        stats["elapsed"] = round(time.perf_counter() - started, 2)
+        stats["snapshot"] = snapshot_id
+        stats["manifest"] = manifest_path
+        stats["chunking"] = chunker.mode
+        return stats
+    
+    def _restore_file(self, entry: Dict[str, Any], target: str):
+        path = os.path.join(target, *entry["path"].split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.restore.tmp"
+        with open(tmp, "wb") as f:
+            for digest in entry["chunks"]:
+                f.write(self.read_chunk(digest))
+        os.replace(tmp, path)
+        os.chmod(path, entry["mode"])
+        os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    
+    def restore(self, target: str, snapshot_id: str = None) -> Dict[str, Any]:
+        """Відновлення знімка в target; кожен шматок перевіряється за хешем"""
+        started = time.perf_counter()
+        manifest = self.load(snapshot_id)
+        target = os.path.abspath(target)
+        os.makedirs(target, exist_ok=True)
+        for rel in manifest["dirs"]:
+            os.makedirs(os.path.join(target, *rel.split("/")), exist_ok=True)
+        
+        # Рахуємо лише те, що справді записано: помилки посилань не мають зменшувати число файлів
+        files = restored_bytes = links = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._restore_file, entry, target): entry for entry in manifest["files"]}
+            for future, entry in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"{entry['path']}: {e}")
+                else:
+                    files += 1
+                    restored_bytes += entry["size"]
+        for link in manifest["links"]:
+            try:
+                os.symlink(link["target"], os.path.join(target, *link["path"].split("/")))
+                links += 1
+            except OSError as e:
+                errors.append(f"{link['path']}: {e}")
+        
+        return {
+            "snapshot": manifest["id"],
+            "target": target,
+            "files": files,
+            "links": links,
+            "bytes": restored_bytes,
+            "errors": errors,
+            "elapsed": round(time.perf_counter() - started, 2)
+        }
+    
+    def _check_chunk(self, digest: str, full: bool) -> str:
+        if not os.path.exists(self._chunk_path(digest)):
+            return "missing"
+        if full:
+            try:
+                self.read_chunk(digest)
+            except (OSError, ValueError, zlib.error):
+                return "corrupt"
+        return "ok"
+    
+    def verify(self, snapshot_id: str = None, full: bool = False) -> Dict[str, Any]:
+        """Перевірка знімка: наявність шматків, а з full - ще й розпакування та хеш"""
+        started = time.perf_counter()
+        manifest = self.load(snapshot_id)
+        digests = {digest for entry in manifest["files"] for digest in entry["chunks"]}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(zip(digests, pool.map(lambda d: self._check_chunk(d, full), digests)))
+        missing = {d for d, state in results.items() if state == "missing"}
+        corrupt = {d for d, state in results.items() if state == "corrupt"}
+        damaged = [entry["path"] for entry in manifest["files"]
+                   if any(d in missing or d in corrupt for d in entry["chunks"])]
+        return {
+            "snapshot": manifest["id"],
+            "chunks": len(digests),
+            "missing": len(missing),
+            "corrupt": len(corrupt),
+            "damaged_files": damaged,
+            "full": full,
+            "elapsed": round(time.perf_counter() - started, 2)
+        }
+
+
+class CronExpression:
+    """Cron-вираз з 5 полів: хвилина, година, день місяця, місяць, день тижня"""
+    
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    MONTHS = {name: i + 1 for i, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"))}
+    WEEKDAYS = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+    
+    def __init__(self, text: str):
+        parts = text.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron-вираз має містити 5 полів: '{text}'")
+        names = ({}, {}, {}, self.MONTHS, self.WEEKDAYS)
+        fields = [self._field(part, low, high, aliases)
+                  for part, (low, high), aliases in zip(parts, self.FIELDS, names)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {day % 7 for day in weekdays}
+        # Як у cron: якщо задані і день місяця, і день тижня - достатньо збігу одного з них
+        self.day_or = parts[2] != "*" and parts[4] != "*"
+        self.text = text
+    
+    @staticmethod
+    def _field(text: str, low: int, high: int, aliases: Dict[str, int]) -> set:
+        """Множина значень поля: '*', '5', '1-5', '*/15', '1,15', 'mon-fri'"""
+        def value(token):
+            token = token.lower()
+            if token in aliases:
+                return aliases[token]
+            if not token.isdigit():
+                raise ValueError(f"некоректне значення cron: '{token}'")
+            return int(token)
+        
+        result = set()
+        for item in text.split(","):
+            base, _, step = item.partition("/")
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                first, last = base.split("-", 1)
+                start, end = value(first), value(last)
+            else:
+                start = value(base)
+                end = high if step else start
+            step = int(step) if step.isdigit() else (1 if not step else 0)
+            if step <= 0 or not low <= start <= end <= high:
+                raise ValueError(f"поле cron поза межами {low}-{high}: '{item}'")
+            result.update(range(start, end + 1, step))
+        return result
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        return (in_month or in_week) if self.day_or else (in_month and in_week)
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """Перший збіг строго після moment (пропускає цілі місяці/дні/години)"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        horizon = candidate.year + 5
+        while candidate.year <= horizon:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron-вираз ніколи не спрацьовує: '{self.text}'")
+
+
+class TaskSchedule:
+    """Розклад завдання: once, interval, daily, weekly або cron"""
+    
+    TYPES = ("once", "interval", "daily", "weekly", "cron")
+    WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+    
+    def __init__(self, schedule_type: str, schedule_time: str, created: datetime = None):
+        self.type = (schedule_type or "once").lower()
+        self.created = created or datetime.now()
+        text = (schedule_time or "").strip()
+        self.at = None
+        self.interval = None
+        self.cron = None
+        
+        if self.type == "once":
+            self.at = self._moment(text)
+        elif self.type == "interval":
+            self.interval = parse_duration(text)
+            if not self.interval:
+                raise ValueError(f"некоректний інтервал: '{text}' (приклад: 15m, 2h, 1d)")
+        elif self.type == "daily":
+            hour, minute = self._clock(text)
+            self.cron = CronExpression(f"{minute} {hour} * * *")
+        elif self.type == "weekly":
+            # 'mon 14:00' або просто '14:00' - тоді в день тижня створення завдання
+            parts = text.split()
+            weekday = parts[0][:3].lower() if len(parts) == 2 else self.WEEKDAYS[self.created.weekday()]
+            if weekday not in self.WEEKDAYS:
+                raise ValueError(f"невідомий день тижня: '{parts[0]}'")
+            hour, minute = self._clock(parts[-1] if parts else "")
+            self.cron = CronExpression(f"{minute} {hour} * * {(self.WEEKDAYS.index(weekday) + 1) % 7}")
+        elif self.type == "cron":
+            self.cron = CronExpression(text)
+        else:
+            raise ValueError(f"невідомий тип розкладу '{schedule_type}' (можливі: {', '.join(self.TYPES)})")
+    
+    @staticmethod
+    def _clock(text: str):
+        match = re.fullmatch(r'(\d{1,2}):(\d{2})', text)
+        if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+            raise ValueError(f"некоректний час: '{text}' (очікується HH:MM)")
+        return int(match.group(1)), int(match.group(2))
+    
+    def _moment(self, text: str) -> datetime:
+        """'2025-01-31 14:00' або 'HH:MM' - найближчий такий час після створення"""
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            hour, minute = self._clock(text)
+        moment = self.created.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return moment if moment >= self.created else moment + timedelta(days=1)
+    
+    def next_after(self, moment: datetime):
+        """Наступний строк після moment (None - завдання більше не повторюється)"""
+        if self.type == "once":
+            return None
+        if self.interval:
+            return moment + timedelta(seconds=self.interval)
+        return self.cron.next_after(moment)
+    
+    def first(self, last_run: datetime = None):
+        """Перший строк після (пере)завантаження: від останнього запуску або від створення"""
+        if self.type == "once":
+            return None if last_run else self.at
+        return self.next_after(last_run or self.created)
+
+
+def _parse_db_time(value) -> Optional[datetime]:
+    """DATETIME із SQLite -> datetime (None, якщо порожньо)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _format_db_time(moment: datetime) -> str:
+    return moment.isoformat(sep=" ", timespec="seconds")
+
+
+class TaskScheduler:
+    """Виконання scheduled_tasks: купа найближчих строків + пул робітників"""
+    
+    TOPIC = "scheduler.run"
+    
+    def __init__(self, db, executor: Callable[[str], Any], workers: int = None,
+                 misfire_policy: str = None, grace: float = None):
+        self.db = db
+        self.executor = executor
+        self.workers = workers or Config.SCHEDULER_WORKERS
+        self.misfire_policy = misfire_policy or Config.SCHEDULER_MISFIRE_POLICY
+        self.grace = Config.SCHEDULER_MISFIRE_GRACE if grace is None else grace
+        self._heap: List[tuple] = []  # (timestamp, seq, task_id); застарілі записи відкидаються при знятті
+        self._tasks: Dict[int, Dict[str, Any]] = {}
+        self._running: set = set()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._pool = None
+        self._thread = None
+        self._stopping = False
+    
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.active:
+            return
+        self._stopping = False
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="task")
+        self.sync()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, wait: bool = True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+    
+    def sync(self):
+        """Звірка з БД: нові завдання - в купу, вимкнені/видалені - геть"""
+        rows = {task["id"]: task for task in self.db.get_scheduled_tasks()}
+        with self._cond:
+            for task_id in set(self._tasks) - set(rows):
+                del self._tasks[task_id]
+            for task_id, task in rows.items():
+                if task_id not in self._tasks:
+                    self._register(task)
+            self._cond.notify_all()
+    
+    def add(self, task_id: int):
+        """Підхопити щойно створене завдання, не чекаючи звірки"""
+        for task in self.db.get_scheduled_tasks():
+            if task["id"] == task_id:
+                with self._cond:
+                    self._register(task)
+                    self._cond.notify_all()
+                return
+    
+    def cancel(self, task_id: int):
+        with self._cond:
+            self._tasks.pop(task_id, None)
+    
+    def _register(self, task: Dict[str, Any]):
+        try:
+            schedule = TaskSchedule(task["schedule_type"], task["schedule_time"],
+                                    _parse_db_time(task["created_date"]))
+            due = schedule.first(_parse_db_time(task["last_run"]))
+        except ValueError as e:
+            logging.warning(f"Scheduled task {task['id']} has invalid schedule: {e}")
+            return
+        if due is None:
+            return
+        self._tasks[task["id"]] = {"task": task, "schedule": schedule}
+        self._push(task["id"], due)
+    
+    def _push(self, task_id: int, due: datetime):
+        self._seq += 1
+        entry = self._tasks[task_id]
+        entry["due"] = due
+        entry["seq"] = self._seq
+        heapq.heappush(self._heap, (due.timestamp(), self._seq, task_id))
+    
+    def _loop(self):
+        next_sync = time.monotonic() + Config.SCHEDULE_CHECK_INTERVAL
+        with self._cond:
+            while not self._stopping:
+                if time.monotonic() >= next_sync:
+                    self.sync()
+                    next_sync = time.monotonic() + Config.SCHEDULE_CHECK_INTERVAL
+                
+                while self._heap and self._heap[0][0] <= time.time():
+                    _, seq, task_id = heapq.heappop(self._heap)
+                    entry = self._tasks.get(task_id)
+                    if entry is not None and entry["seq"] == seq:
+                        self._dispatch(task_id, entry)
+                
+                # Сон до найближчого строку; періодична звірка ловить зміни з інших процесів і стрибки годинника
+                timeout = next_sync - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - time.time())
+                self._cond.wait(max(timeout, 0.01))
+    
+    def _dispatch(self, task_id: int, entry: Dict[str, Any]):
+        task, due = entry["task"], entry["due"]
+        now = datetime.now()
+        misfired = (now - due).total_seconds() > self.grace
+        if task_id in self._running:
+            status = "skipped"
+        elif misfired and self.misfire_policy == "skip":
+            status = "missed"
+        else:
+            status = None
+        
+        # Після пропуску наступний строк рахується від "зараз": накопичені строки зливаються в один
+        following = entry["schedule"].next_after(now if misfired else due)
+        if following is not None:
+            self._push(task_id, following)
+        else:
+            del self._tasks[task_id]
+        
+        if status is None:
+            self._running.add(task_id)
+            self._pool.submit(self._run, task, due, following is None)
+        else:
+            self._finish(task, due, now, now, 0.0, status, "", following is None)
+    
+    def _run(self, task: Dict[str, Any], due: datetime, last: bool):
+        started = datetime.now()
+        start = time.perf_counter()
+        try:
+            result = self.executor(task["command"])
+            if result is None:
+                result = f"❌ Невідома команда: {task['command']}"
+            status = "failed" if is_error_result(result) else "success"
+        except Exception as e:
+            result, status = f"❌ {e}", "failed"
+        try:
+            self._finish(task, due, started, datetime.now(), time.perf_counter() - start,
+                         status, str(result), last)
+        finally:
+            with self._cond:
+                self._running.discard(task["id"])
+    
+    def _finish(self, task: Dict[str, Any], due: datetime, started: datetime, finished: datetime,
+                duration: float, status: str, result: str, last: bool):
+        self.db.log_task_run(task["id"], _format_db_time(due), _format_db_time(started), _format_db_time(finished),
+                             round(duration, 3), status, result[:500], disable=last)
+        event_bus.publish(self.TOPIC, {
+            "task_id": task["id"],
+            "task_name": task["task_name"],
+            "command": task["command"],
+            "status": status,
+            "scheduled_for": _format_db_time(due),
+            "duration": round(duration, 3),
+            "result": result[:500]
+        })
+    
+    def status(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [
+                {
+                    "id": task_id,
+                    "task_name": entry["task"]["task_name"],
+                    "next_run": _format_db_time(entry["due"]),
+                    "running": task_id in self._running
+                }
+                for task_id, entry in sorted(self._tasks.items(), key=lambda item: item[1]["due"])
+            ]
+
+
 class AutomationManager:
     """Менеджер автоматизації та планування"""
     
     def __init__(self, db=None):
         self.db = db
+        self.watchers: Dict[str, DirectoryWatcher] = {}
+        self._indexed_watches: set = set()
+        self.scheduler = None
+        if db is not None:
+            event_bus.subscribe(DirectoryWatcher.TOPIC, self._sync_file_index)
     
     def backup_files(self, source: str, destination: str) -> Dict[str, Any]:
-        """Резервне копіювання файлів"""
+        """Інкрементальний бекап у сховище destination: пишуться лише нові шматки"""
         try:
             if not os.path.exists(source):
                 return {"success": False, "error": "❌ Джерело не існує"}
             
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"backup_{timestamp}"
-            backup_path = os.path.join(destination, backup_name)
-            
-            import shutil
-            if os.path.isfile(source):
-                os.makedirs(destination, exist_ok=True)
-                shutil.copy2(source, os.path.join(backup_path, os.path.basename(source)))
-                backed_up = 1
-            else:
-                shutil.copytree(source, backup_path)
-                backed_up = sum(1 for _ in Path(backup_path).rglob('*') if _.is_file())
-            
-            backup_size = sum(f.stat().st_size for f in Path(backup_path).rglob('*') if f.is_file())
+            stats = BackupRepository(destination).snapshot(source)
+            dedup = 1 - stats["bytes_stored"] / stats["bytes_total"] if stats["bytes_total"] else 1.0
             
             return {
                 "success": True,
-                "backup_path": backup_path,
-                "files_backed_up": backed_up,
-                "backup_size_mb": f"{backup_size / 1024 / 1024:.2f} MB"
+                "snapshot": stats["snapshot"],
+                "backup_path": stats["manifest"],
+                "files_backed_up": stats["files"],
+                "files_changed": stats["changed"],
+                "files_unchanged": stats["reused"],
+                "backup_size_mb": f"{stats['bytes_total'] / 1024 / 1024:.2f} MB",
+                "read_mb": f"{stats['bytes_read'] / 1024 / 1024:.2f} MB",
+                "stored_mb": f"{stats['bytes_stored'] / 1024 / 1024:.2f} MB",
+                "new_chunks": stats["new_chunks"],
+                "total_chunks": stats["chunks"],
+                "space_saved": f"{dedup * 100:.1f}%",
+                "chunking": stats["chunking"],
+                "skipped": stats["skipped"],
+                "elapsed_seconds": stats["elapsed"]
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def list_backups(self, destination: str) -> Dict[str, Any]:
+        """Знімки у сховищі"""
+        try:
+            repository = BackupRepository(destination)
+            snapshots = []
+            for snapshot_id in repository.list_snapshots():
+                manifest = repository.load(snapshot_id)
+                snapshots.append({
+                    "snapshot": snapshot_id,
+                    "source": manifest["source"],
+                    "created": manifest["created"],
+                    "files": len(manifest["files"]),
+                    "size_mb": f"{sum(e['size'] for e in manifest['files']) / 1024 / 1024:.2f} MB"
+                })
+            return {"success": True, "snapshots": snapshots}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def restore_backup(self, destination: str, target: str, snapshot: str = None) -> Dict[str, Any]:
+        """Відновлення знімка (за замовчуванням останнього) у папку target"""
+        try:
+            res = BackupRepository(destination).restore(target, snapshot)
+            result = {"success": not res["errors"], **res}
+            if res["errors"]:
+                result["error"] = f"❌ Помилок під час відновлення: {len(res['errors'])}"
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def verify_backup(self, destination: str, snapshot: str = None, full: bool = False) -> Dict[str, Any]:
+        """Перевірка цілісності знімка"""
+        try:
+            res = BackupRepository(destination).verify(snapshot, full)
+            result = {"success": not res["damaged_files"], **res}
+            if res["damaged_files"]:
+                result["error"] = f"❌ Пошкоджено файлів: {len(res['damaged_files'])}"
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def schedule_task(self, task_name: str, command: str, schedule_time: str, schedule_type: str = "once") -> Dict[str, Any]:
-        """Запланувати завдання"""
+        """Запланувати завдання (once, interval, daily, weekly, cron)"""
         try:
-            if self.db:
-                self.db.add_scheduled_task(task_name, command, schedule_time, schedule_type)
-                return {
-                    "success": True,
-                    "message": f"✅ Завдання '{task_name}' заплановано на {schedule_time}"
-                }
-            else:
+            if not self.db:
                 return {"success": False, "error": "❌ База даних недоступна"}
+            try:
+                next_run = TaskSchedule(schedule_type, schedule_time).first()
+            except ValueError as e:
+                return {"success": False, "error": f"❌ {e}"}
+            # Одноразове завдання з минулим часом спрацювало б одразу - це помилка введення, а не пропуск
+            if next_run is not None and next_run < datetime.now() and (schedule_type or "once").lower() == "once":
+                return {"success": False, "error": f"❌ Час уже минув: {schedule_time}"}
+            
+            task_id = self.db.add_scheduled_task(task_name, command, schedule_time, schedule_type)
+            if self.scheduler is not None and self.scheduler.active:
+                self.scheduler.add(task_id)
+            return {
+                "success": True,
+                "task_id": task_id,
+                "next_run": _format_db_time(next_run) if next_run else None,
+                "scheduler_running": self.scheduler is not None and self.scheduler.active,
+                "message": f"✅ Завдання '{task_name}' заплановано на {schedule_time}"
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def watch_directory(self, directory: str, duration: int = 60) -> Dict[str, Any]:
-        """Моніторинг змін у папці"""
+    def start_scheduler(self, executor: Callable[[str], Any], workers: int = None) -> Dict[str, Any]:
+        """Запустити виконання запланованих завдань через executor(команда) -> результат"""
+        if not self.db:
+            return {"success": False, "error": "❌ База даних недоступна"}
+        if self.scheduler is None or not self.scheduler.active:
+            self.scheduler = TaskScheduler(self.db, executor, workers)
+            self.scheduler.start()
+        return {"success": True, "workers": self.scheduler.workers, "tasks": len(self.scheduler.status())}
+    
+    def stop_scheduler(self) -> Dict[str, Any]:
+        """Зупинити планувальник (поточні запуски дозавершуються)"""
+        if self.scheduler is None or not self.scheduler.active:
+            return {"success": False, "error": "❌ Планувальник не запущено"}
+        self.scheduler.stop()
+        return {"success": True}
+    
+    def list_tasks(self) -> Dict[str, Any]:
+        """Заплановані завдання з наступним строком запуску"""
+        if not self.db:
+            return {"success": False, "error": "❌ База даних недоступна"}
+        running = self.scheduler is not None and self.scheduler.active
+        upcoming = {task["id"]: task for task in self.scheduler.status()} if running else {}
+        tasks = self.db.get_scheduled_tasks(enabled_only=False)
+        for task in tasks:
+            state = upcoming.get(task["id"], {})
+            task["next_run"] = state.get("next_run")
+            task["running"] = state.get("running", False)
+        return {"success": True, "tasks": tasks, "scheduler_running": running}
+    
+    def cancel_task(self, task_id: int) -> Dict[str, Any]:
+        """Вимкнути завдання (історія запусків зберігається)"""
+        if not self.db:
+            return {"success": False, "error": "❌ База даних недоступна"}
+        if not self.db.set_task_enabled(task_id, False):
+            return {"success": False, "error": f"❌ Завдання {task_id} не знайдено"}
+        if self.scheduler is not None:
+            self.scheduler.cancel(task_id)
+        return {"success": True, "task_id": task_id}
+    
+    def task_runs(self, task_id: int = None, limit: int = 20) -> Dict[str, Any]:
+        """Історія запусків запланованих завдань"""
+        if not self.db:
+            return {"success": False, "error": "❌ База даних недоступна"}
+        return {"success": True, "runs": self.db.get_task_runs(task_id, limit)}
+    
+    def watch_directory(self, directory: str, duration: float = 60, recursive: bool = True,
+                        debounce: float = 0.5, index: bool = True) -> Dict[str, Any]:
+        """Запустити фонове спостереження за папкою (duration=0/None - до watch_stop)"""
         try:
             if not os.path.isdir(directory):
                 return {"success": False, "error": "❌ Директорія не існує"}
             
-            initial_state = {}
-            for item in Path(directory).rglob('*'):
-                if item.is_file():
-                    initial_state[str(item)] = {
-                        "size": item.stat().st_size,
-                        "mtime": item.stat().st_mtime
-                    }
-            
-            print(f"🔍 Моніторинг {directory} протягом {duration} секунд...")
-            time.sleep(duration)
-            
-            changes = {
-                "added": [],
-                "modified": [],
-                "deleted": []
-            }
-            
-            current_state = {}
-            for item in Path(directory).rglob('*'):
-                if item.is_file():
-                    current_state[str(item)] = {
-                        "size": item.stat().st_size,
-                        "mtime": item.stat().st_mtime
-                    }
-            
-            # Перевірка змін
-            for path, info in current_state.items():
-                if path not in initial_state:
-                    changes["added"].append(path)
-                elif info["mtime"] != initial_state[path]["mtime"]:
-                    changes["modified"].append(path)
-            
-            for path in initial_state:
-                if path not in current_state:
-                    changes["deleted"].append(path)
-            
-            total_changes = len(changes["added"]) + len(changes["modified"]) + len(changes["deleted"])
+            watcher = DirectoryWatcher(directory, duration or None, recursive, debounce)
+            # Реєструємо до старту, щоб перша пачка подій уже потрапила в індекс
+            self.watchers[watcher.id] = watcher
+            if index:
+                self._indexed_watches.add(watcher.id)
+            try:
+                watcher.start()
+            except Exception:
+                self.watchers.pop(watcher.id, None)
+                self._indexed_watches.discard(watcher.id)
+                raise
             
             return {
                 "success": True,
-                "directory": directory,
-                "duration_seconds": duration,
-                "total_changes": total_changes,
-                "changes": changes
+                "watch_id": watcher.id,
+                "directory": watcher.directory,
+                "backend": watcher.backend.name,
+                "duration_seconds": duration or None,
+                "debounce": debounce
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    def stop_watch(self, watch_id: str = None) -> Dict[str, Any]:
+        """Зупинити одне (або всі) спостереження і повернути підсумки"""
+        if watch_id is not None and watch_id not in self.watchers:
+            return {"success": False, "error": f"❌ Спостереження {watch_id} не знайдено"}
+        targets = [watch_id] if watch_id is not None else list(self.watchers)
+        summaries = []
+        for key in targets:
+            watcher = self.watchers.pop(key)
+            watcher.stop()
+            self._indexed_watches.discard(key)
+            summaries.append(watcher.summary())
+        return {"success": True, "stopped": len(summaries), "watches": summaries}
+    
+    def watch_status(self) -> Dict[str, Any]:
+        """Стан усіх спостережень; завершені прибираються після показу"""
+        watches = [watcher.summary() for watcher in self.watchers.values()]
+        for key in [key for key, watcher in self.watchers.items() if not watcher.active]:
+            del self.watchers[key]
+            self._indexed_watches.discard(key)
+        return {"success": True, "watches": watches}
+    
+    def _sync_file_index(self, topic: str, payload: Dict[str, Any]):
+        """Підписник fs.changes: інкрементальне оновлення file_index без повного переіндексування"""
+        if payload["watch_id"] not in self._indexed_watches:
+            return
+        upserts, removed = {}, []
+        for event in payload["events"]:
+            if event["type"] in ("deleted", "moved"):
+                removed.append(event.get("src", event["path"]))
+            if event["type"] == "deleted":
+                continue
+            paths = [event["path"]]
+            if event["is_dir"]:
+                # Переміщена папка: inotify повідомляє лише про неї саму, вміст індексуємо тут
+                if event["type"] != "moved":
+                    continue
+                paths = [str(p) for p in Path(event["path"]).rglob('*')]
+            for path in paths:
+                try:
+                    st = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    continue
+                if os.path.isfile(path):
+                    upserts[path] = _file_index_metadata(path, st)
+        if upserts or removed:
+            try:
+                self.db.update_file_index(upserts, removed)
+            except Exception as e:
+                logging.error(f"Не вдалося оновити індекс файлів: {e}")
 
 # ============================================================================
 # СТАТИСТИКА
@@ -600,56 +2349,449 @@ class StatisticsManager:
     def __init__(self, db=None):
         self.db = db
     
-    def usage_statistics(self) -> Dict[str, Any]:
-        """Статистика використання агента"""
+    def usage_statistics(self, days: int = None) -> Dict[str, Any]:
+        """Статистика використання агента (з денних зведень, за весь час або за days днів)"""
         try:
             if not self.db:
                 return {"success": False, "error": "❌ База даних недоступна"}
             
-            history = self.db.get_command_history(limit=1000)
-            
-            total_commands = len(history)
-            successful = sum(1 for h in history if h['success'])
-            failed = total_commands - successful
-            
-            # Найпопулярніші команди
-            command_counts = {}
-            for h in history:
-                cmd = h['command'].split()[0] if h['command'] else "unknown"
-                command_counts[cmd] = command_counts.get(cmd, 0) + 1
-            
-            top_commands = sorted(command_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+            stats = self.db.get_command_stats(days)
+            commands = stats["commands"]
+            total_commands = sum(c["count"] for c in commands)
+            failed = sum(c["failures"] for c in commands)
+            successful = total_commands - failed
+            total_time = sum(c["total_time"] for c in commands)
             
             return {
                 "success": True,
+                "period_days": days,
+                "first_day": stats["first_day"],
+                "last_day": stats["last_day"],
+                "active_days": stats["active_days"],
                 "total_commands": total_commands,
                 "successful": successful,
                 "failed": failed,
                 "success_rate": f"{(successful / total_commands * 100):.1f}%" if total_commands > 0 else "0%",
-                "top_commands": [{"command": cmd, "count": count} for cmd, count in top_commands]
+                "avg_execution_time": round(total_time / total_commands, 3) if total_commands else 0,
+                "top_commands": [
+                    {
+                        "command": c["command"] or "unknown",
+                        "count": c["count"],
+                        "failures": c["failures"],
+                        "avg_time": round(c["total_time"] / c["count"], 3),
+                        "max_time": round(c["max_time"], 3)
+                    }
+                    for c in commands[:10]
+                ],
+                "daily": self.db.get_daily_command_stats(days or 30)
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def error_report(self) -> Dict[str, Any]:
-        """Звіт про помилки"""
+    def error_report(self, limit: int = 20) -> Dict[str, Any]:
+        """Звіт про помилки: частота по командах і класах повідомлень"""
         try:
             if not self.db:
                 return {"success": False, "error": "❌ База даних недоступна"}
             
-            history = self.db.get_command_history(limit=500)
-            errors = [h for h in history if not h['success']]
-            
-            # Групування помилок
-            error_types = {}
-            for error in errors:
-                error_types[error['command']] = error_types.get(error['command'], 0) + 1
+            commands = self.db.get_command_stats()["commands"]
             
             return {
                 "success": True,
-                "total_errors": len(errors),
-                "error_types": error_types,
-                "recent_errors": errors[:10]
+                "total_errors": sum(c["failures"] for c in commands),
+                "error_types": {c["command"]: c["failures"] for c in commands if c["failures"]},
+                "error_classes": self.db.get_error_stats(limit),
+                "recent_errors": self.db.get_recent_errors(10)
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# ПЛАГІНИ КОМАНД
+# ============================================================================
+
+def format_performance_summary(res: dict) -> str:
+    """Короткий текстовий підсумок сеансу моніторингу"""
+    metrics = res.get("metrics", {})
+    lines = [f"⏱️ {res['duration_seconds']} сек, {res['samples']} вимірів (кожні {res['interval']} сек)"]
+    for name, label in (("cpu", "CPU"), ("memory", "RAM"), ("disk", "Диск")):
+        m = metrics.get(name)
+        if m:
+            lines.append(f"📊 {label}: сер. {m['avg']}%, p95 {m['p95']}%, макс. {m['max']}%")
+    cores = res.get("per_core") or []
+    if cores:
+        lines.append("🧮 Ядра (сер./макс.): " + ", ".join(f"{c['avg']}/{c['max']}" for c in cores))
+    for proc in res.get("top_processes") or []:
+        lines.append(f"   • {proc['name']} (PID {proc['pid']}): CPU сер. {proc['cpu_avg']}%, "
+                     f"макс. {proc['cpu_max']}%, RAM {proc['memory_max_mb']} MB")
+    if res.get("alerts"):
+        lines.append("\n".join(res["alerts"]))
+    return "\n".join(lines)
+
+
+def format_fs_changes(payload: dict, limit: int = 5) -> str:
+    """Пачка змін у папці для виводу в консоль"""
+    icons = {"added": "➕", "modified": "✏️", "deleted": "🗑️", "moved": "🔀"}
+    events = payload["events"]
+    lines = [f"📁 Зміни в {payload['directory']} ({len(events)}):"]
+    for event in events[:limit]:
+        target = f"{event['src']} → {event['path']}" if event["type"] == "moved" else event["path"]
+        lines.append(f"   {icons.get(event['type'], '•')} {target}")
+    if len(events) > limit:
+        lines.append(f"   ... та ще {len(events) - limit}")
+    return "\n".join(lines)
+
+
+def format_task_run(run: dict) -> str:
+    """Рядок про запуск запланованого завдання"""
+    icons = {"success": "✅", "failed": "❌", "skipped": "⏭️", "missed": "⏰"}
+    line = f"{icons.get(run['status'], '•')} Завдання {run['task_id']} '{run['task_name']}': {run['status']}"
+    if run.get("duration"):
+        line += f" за {run['duration']} сек"
+    if run["status"] == "failed" and run.get("result"):
+        line += "\n   " + run["result"].splitlines()[0]
+    return line
+
+
+@plugin_registry.register
+class MultimediaPlugin(CommandPlugin):
+    name = "multimedia"
+    title = "🎨 Мультимедіа"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.multimedia = MultimediaManager(Config.SCREENSHOTS_DIR)
+    
+    @command("take_screenshot", "[ім'я]", "Скріншот", ("filename",))
+    def take_screenshot(self, args):
+        res = self.multimedia.take_screenshot(args[0] if args else None)
+        if not res.get("success"):
+            return res.get("error", "❌ Помилка")
+        return f"📸 Скріншот: {res['filepath']} ({res['size_kb']}, {res['resolution']})"
+
+
+@plugin_registry.register
+class SystemUtilitiesPlugin(CommandPlugin):
+    name = "system_utils"
+    title = "🧰 Системні утиліти"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.system_utils = SystemUtilities()
+    
+    @command("clipboard_get", "", "Вміст буфера обміну")
+    def clipboard_get(self, args):
+        res = self.system_utils.clipboard_get()
+        if not res.get("success"):
+            return res.get("error")
+        content = res.get("content", "")
+        preview = content[:200] + "..." if len(content) > 200 else content
+        return f"📋 Буфер ({res['length']} символів):\n{preview}"
+    
+    @command("clipboard_set", "<текст>", "Записати текст у буфер обміну", ("text",))
+    def clipboard_set(self, args):
+        if not args:
+            return "❌ Використання: clipboard_set <текст>"
+        res = self.system_utils.clipboard_set(" ".join(args))
+        return res.get("message") if res.get("success") else res.get("error")
+    
+    @command("send_notification", "<заголовок> <текст>", "Сповіщення", ("title", "message"))
+    def send_notification(self, args):
+        if len(args) < 2:
+            return "❌ Використання: send_notification <заголовок> <текст>"
+        res = self.system_utils.send_notification(args[0], " ".join(args[1:]))
+        return res.get("message") if res.get("success") else res.get("error")
+    
+    @command("auto_cleanup", "[год] [dry]", "Очищення тимчасових файлів (dry - лише план)", ("min_age_hours",))
+    def auto_cleanup(self, args):
+        dry_run = any(a.lower() in ("dry", "--dry-run") for a in args)
+        numbers = [a for a in args if a.replace(".", "", 1).isdigit()]
+        min_age = float(numbers[0]) if numbers else 24
+        res = self.system_utils.auto_cleanup(dry_run=dry_run, min_age_hours=min_age)
+        if not res.get("success"):
+            return res.get("error")
+        lines = [f"{'🔎 План (нічого не видалено)' if dry_run else '🧹 Видалено'}: "
+                 f"{res['cleaned_files']} файлів, {res['freed_space_mb']} (старші за {min_age:g} год)"]
+        lines += [f"   📁 {path}: {info['files']} файлів, {info['size_mb']}"
+                  for path, info in res["directories"].items()]
+        if dry_run:
+            lines += [f"   • {item['path']} ({item['size_mb']})" for item in res["largest"]]
+        return "\n".join(lines)
+
+
+@plugin_registry.register
+class MonitoringPlugin(CommandPlugin):
+    name = "monitoring"
+    title = "📈 Моніторинг"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.monitoring = MonitoringManager(agent.db)
+        # Події фонового моніторингу показуються одразу, не чекаючи наступної команди
+        self.subscribe("monitor.alert", lambda event: f"🔔 {event['message']}")
+        self.subscribe("monitor.finished",
+                       lambda summary: "📊 Моніторинг завершено:\n" + format_performance_summary(summary))
+    
+    def close(self):
+        super().close()
+        if self.monitoring.monitoring_active:
+            self.monitoring.stop_monitoring()
+    
+    @command("monitor_performance", "[сек] [інт]", "Фоновий моніторинг", ("duration", "interval"))
+    def monitor_performance(self, args):
+        try:
+            duration = int(args[0]) if args else 60
+            interval = float(args[1]) if len(args) > 1 else 1.0
+        except ValueError:
+            return "❌ Використання: monitor_performance [сек] [інтервал_сек]"
+        res = self.monitoring.monitor_performance(duration, interval)
+        if not res.get("success"):
+            return res.get("error")
+        return (f"⏳ Моніторинг запущено у фоні: {duration} сек, кожні {interval} сек\n"
+                f"💡 monitor_status - проміжні дані, monitor_stop - зупинити")
+    
+    @command("monitor_status", "", "Стан моніторингу")
+    def monitor_status(self, args):
+        res = self.monitoring.monitoring_status()
+        if not res.get("success"):
+            return res.get("error")
+        state = "🟢 Триває" if res['running'] else "⏹️ Завершено"
+        return f"{state}\n" + format_performance_summary(res)
+    
+    @command("monitor_stop", "", "Зупинити моніторинг")
+    def monitor_stop(self, args):
+        res = self.monitoring.stop_monitoring()
+        if not res.get("success"):
+            return res.get("error")
+        return "⏹️ Моніторинг зупинено\n" + format_performance_summary(res)
+    
+    @command("log_analyzer", "[шлях] [reset]", "Аналіз логів (лише нові рядки)", ("path",))
+    def log_analyzer(self, args):
+        reset = "reset" in [a.lower() for a in args]
+        paths = [a for a in args if a.lower() != "reset"]
+        res = self.monitoring.log_analyzer(paths[0] if paths else None, reset=reset)
+        if not res.get("success"):
+            return res.get("error")
+        lines = [f"📝 Логи: {res['files_analyzed']} файлів, прочитано нових "
+                 f"{res['new_bytes'] / 1024:.1f} КБ за {res['elapsed_seconds']} с",
+                 f"   ❌ Помилок: {res['errors']}, ⚠️ попереджень: {res['warnings']}, "
+                 f"ℹ️ інфо: {res['info_messages']}"]
+        for cluster in res["error_templates"][:5]:
+            lines.append(f"   {cluster['count']:>6} × [{cluster['level']}] {cluster['template'][:120]}")
+        return "\n".join(lines)
+    
+    @command("system_report", "", "Системний звіт")
+    def system_report(self, args):
+        res = self.monitoring.system_report()
+        if not res.get("success"):
+            return res.get("error")
+        return "💻 Системний звіт:\n" + self.agent._json(res['report'])
+
+
+@plugin_registry.register
+class NetworkPlugin(CommandPlugin):
+    name = "network"
+    title = "🌐 Мережеві утиліти"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.network_utils = NetworkUtilities()
+    
+    @command("speedtest", "", "Тест швидкості")
+    def speedtest(self, args):
+        print("⏳ Тестування швидкості...")
+        res = self.network_utils.speedtest()
+        if not res.get("success"):
+            return res.get("error")
+        return f"🌐 Download: {res['download_speed_mbps']}, Ping: {res['ping_ms']}"
+    
+    @command("check_website_status", "<url>", "Статус сайту", ("url",))
+    def check_website_status(self, args):
+        if not args:
+            return "❌ Використання: check_website_status <url>"
+        res = self.network_utils.check_website_status(args[0])
+        return f"🌍 {res.get('url')}: {res.get('status')}"
+
+
+@plugin_registry.register
+class AutomationPlugin(CommandPlugin):
+    name = "automation"
+    title = "⚙️ Автоматизація"
+    autoload = True  # планувальник має працювати з моменту запуску
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.automation = AutomationManager(agent.db)
+        self.subscribe("fs.changes", format_fs_changes)
+        self.subscribe("scheduler.run", format_task_run)
+        # Заплановані завдання виконуються тими ж командами, що й з консолі
+        self.automation.start_scheduler(agent.handle_direct_command)
+    
+    def close(self):
+        super().close()
+        self.automation.stop_scheduler()
+        if self.automation.watchers:
+            self.automation.stop_watch()
+    
+    @command("backup_files", "<src> <сховище>", "Інкрементальний бекап (лише нові дані)", ("source", "destination"))
+    def backup_files(self, args):
+        if len(args) < 2:
+            return "❌ Використання: backup_files <джерело> <призначення>"
+        res = self.automation.backup_files(args[0], args[1])
+        if not res.get("success"):
+            return res.get("error")
+        return (f"💾 Знімок {res['snapshot']}: {res['files_backed_up']} файлів, {res['backup_size_mb']}\n"
+                f"   змінено {res['files_changed']}, без змін {res['files_unchanged']}; "
+                f"нових шматків {res['new_chunks']}/{res['total_chunks']}, записано {res['stored_mb']} "
+                f"(економія {res['space_saved']}) за {res['elapsed_seconds']} с")
+    
+    @command("backup_list", "<сховище>", "Знімки у сховищі", ("repository",))
+    def backup_list(self, args):
+        if not args:
+            return "❌ Використання: backup_list <сховище>"
+        res = self.automation.list_backups(args[0])
+        if not res.get("success"):
+            return res.get("error")
+        if not res["snapshots"]:
+            return "📭 Знімків немає"
+        return "\n".join(f"💾 {s['snapshot']}: {s['files']} файлів, {s['size_mb']} ← {s['source']}"
+                         for s in res["snapshots"])
+    
+    @command("backup_restore", "<сховище> <куди> [знімок]", "Відновлення", ("repository", "target", "snapshot"))
+    def backup_restore(self, args):
+        if len(args) < 2:
+            return "❌ Використання: backup_restore <сховище> <куди> [знімок]"
+        res = self.automation.restore_backup(args[0], args[1], args[2] if len(args) > 2 else None)
+        if "files" not in res:
+            return res.get("error")
+        links = f", {res['links']} посилань" if res["links"] else ""
+        text = f"♻️ {res['snapshot']} → {res['target']}: {res['files']} файлів{links} за {res['elapsed']} с"
+        return text if res["success"] else text + "\n" + res["error"] + "\n" + "\n".join(res["errors"][:10])
+    
+    @command("backup_verify", "<сховище> [знімок] [full]", "Перевірка цілісності", ("repository", "snapshot"))
+    def backup_verify(self, args):
+        if not args:
+            return "❌ Використання: backup_verify <сховище> [знімок] [full]"
+        full = "full" in [a.lower() for a in args[1:]]
+        snapshot = next((a for a in args[1:] if a.lower() != "full"), None)
+        res = self.automation.verify_backup(args[0], snapshot, full)
+        if "chunks" not in res:
+            return res.get("error")
+        text = (f"🔎 {res['snapshot']}: шматків {res['chunks']}, відсутніх {res['missing']}, "
+                f"пошкоджених {res['corrupt']}{' (повна перевірка)' if full else ''}")
+        return text if res["success"] else text + "\n" + res["error"] + "\n" + "\n".join(res["damaged_files"][:10])
+    
+    @command("watch_directory", "<шлях> [сек]", "Стежити за змінами у фоні", ("path", "duration"))
+    def watch_directory(self, args):
+        if not args:
+            return "❌ Використання: watch_directory <шлях> [сек, 0 - до watch_stop]"
+        try:
+            duration = float(args[1]) if len(args) > 1 else 60
+        except ValueError:
+            return "❌ Тривалість має бути числом"
+        res = self.automation.watch_directory(args[0], duration)
+        if not res.get("success"):
+            return res.get("error")
+        until = f"{duration:g} сек" if duration else "до watch_stop"
+        return f"👁️ Спостереження {res['watch_id']} ({res['backend']}): {res['directory']}, {until}"
+    
+    @command("watch_status", "", "Стан спостереження")
+    def watch_status(self, args):
+        res = self.automation.watch_status()
+        if not res["watches"]:
+            return "👁️ Активних спостережень немає"
+        return "\n".join(
+            f"{'🟢' if w['running'] else '⏹️'} {w['watch_id']} {w['directory']} ({w['backend']}): "
+            f"{w['total_changes']} змін {w['counts']}"
+            for w in res["watches"]
+        )
+    
+    @command("watch_stop", "[id]", "Зупинка спостереження", ("watch_id",))
+    def watch_stop(self, args):
+        res = self.automation.stop_watch(args[0] if args else None)
+        if not res.get("success"):
+            return res.get("error")
+        return f"⏹️ Зупинено спостережень: {res['stopped']}"
+    
+    @command("schedule_task", "<назва> <команда> <час> [тип]", "Планування (once/interval/daily/weekly/cron)",
+             ("name", "command", "time", "type"))
+    def schedule_task(self, args):
+        if len(args) < 3:
+            return ("❌ Використання: schedule_task <назва> <команда> <час> [тип]\n"
+                    "   типи: once (HH:MM або дата), interval (15m), daily (HH:MM), "
+                    "weekly ([mon] HH:MM), cron (\"*/5 * * * *\")")
+        name, task_command, when = (a[1:-1] if len(a) > 1 and a[0] == a[-1] == '"' else a for a in args[:3])
+        res = self.automation.schedule_task(name, task_command, when, args[3].strip('"') if len(args) > 3 else "once")
+        if not res.get("success"):
+            return res.get("error")
+        text = f"{res['message']} (id {res['task_id']}, наступний запуск: {res['next_run'] or '-'})"
+        return text if res["scheduler_running"] else text + "\n⚠️ Планувальник не запущено"
+    
+    @command("list_tasks", "", "Заплановані завдання")
+    def list_tasks(self, args):
+        res = self.automation.list_tasks()
+        if not res.get("success"):
+            return res.get("error")
+        if not res["tasks"]:
+            return "🗓️ Запланованих завдань немає"
+        return "\n".join(
+            f"{'🟢' if t['enabled'] else '⏹️'} {t['id']}. {t['task_name']} [{t['schedule_type']} {t['schedule_time']}]: "
+            f"{t['command']} | наступний: {t['next_run'] or '-'}, останній: {t['last_run'] or '-'}"
+            + (" (виконується)" if t["running"] else "")
+            for t in res["tasks"]
+        )
+    
+    @command("task_runs", "[id]", "Історія запусків", ("task_id",))
+    def task_runs(self, args):
+        try:
+            task_id = int(args[0]) if args else None
+        except ValueError:
+            return "❌ id завдання має бути числом"
+        runs = self.automation.task_runs(task_id)["runs"]
+        if not runs:
+            return "🗓️ Запусків ще не було"
+        return "\n".join(
+            f"{r['started_at']} {r['task_name'] or r['task_id']}: {r['status']}"
+            + (f" ({r['duration']} сек)" if r["duration"] else "")
+            for r in runs
+        )
+    
+    @command("cancel_task", "<id>", "Скасувати завдання", ("task_id",))
+    def cancel_task(self, args):
+        if not args or not args[0].isdigit():
+            return "❌ Використання: cancel_task <id>"
+        res = self.automation.cancel_task(int(args[0]))
+        return f"⏹️ Завдання {res['task_id']} скасовано" if res.get("success") else res.get("error")
+
+
+@plugin_registry.register
+class StatisticsPlugin(CommandPlugin):
+    name = "statistics"
+    title = "📊 Статистика"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.statistics = StatisticsManager(agent.db)
+    
+    @command("usage_statistics", "[днів]", "Статистика (за весь час або за N днів)", ("days",))
+    def usage_statistics(self, args):
+        if args and not args[0].isdigit():
+            return "❌ Використання: usage_statistics [днів]"
+        res = self.statistics.usage_statistics(int(args[0]) if args else None)
+        if not res.get("success"):
+            return res.get("error")
+        lines = [f"📊 Команд: {res['total_commands']}, Успішність: {res['success_rate']}, "
+                 f"сер. час {res['avg_execution_time']} сек ({res['active_days']} активних днів)"]
+        lines += [f"   • {c['command']}: {c['count']} (помилок {c['failures']}, сер. {c['avg_time']} сек)"
+                  for c in res["top_commands"]]
+        return "\n".join(lines)
+    
+    @command("error_report", "", "Звіт про помилки")
+    def error_report(self, args):
+        res = self.statistics.error_report()
+        if not res.get("success"):
+            return res.get("error")
+        lines = [f"❌ Помилок: {res['total_errors']}"]
+        lines += [f"   • {e['count']}× {e['command']}: {e['signature']}" for e in res["error_classes"][:10]]
+        return "\n".join(lines)
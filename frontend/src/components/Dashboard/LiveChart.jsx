@@ -1,27 +1,60 @@
 import React, { useEffect, useState } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Legend } from 'recharts';
 import { Card, CardHeader, CardTitle, CardContent } from '../ui/card';
+import { systemAPI } from '../../services/api';
+
+const RANGES = ['live', '1h', '24h', '7d', '1y'];
+const LIVE_POINTS = 60;
+
+function toPoint({ timestamp, cpu, memory, disk }, range) {
+    const date = new Date(timestamp);
+    const time = range === '7d' || range === '1y'
+        ? date.toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' })
+        : date.toLocaleTimeString();
+    return { time, cpu, memory, disk };
+}
 
 export function LiveChart({ data }) {
     const [chartData, setChartData] = useState([]);
+    const [range, setRange] = useState('live');
 
+    // History is pre-aggregated on the server: live view is prefilled from the raw tier
     useEffect(() => {
-        if (data?.data) {
-            const { cpu, memory, disk, timestamp } = data.data;
-            const time = new Date(timestamp).toLocaleTimeString();
+        let cancelled = false;
+        systemAPI.getHistory(range === 'live' ? '1m' : range)
+            .then(({ data: history }) => {
+                if (cancelled || !history?.points) return;
+                const points = history.points.map(p => toPoint(p, range));
+                setChartData(range === 'live' ? points.slice(-LIVE_POINTS) : points);
+            })
+            .catch(err => console.error('Error loading history:', err));
+        return () => { cancelled = true; };
+    }, [range]);
 
+    useEffect(() => {
+        if (range === 'live' && data?.data) {
             setChartData(prev => {
-                const newData = [...prev, { time, cpu, memory, disk }];
-                // Keep only last 20 points
-                return newData.slice(-20);
+                const newData = [...prev, toPoint(data.data, range)];
+                return newData.slice(-LIVE_POINTS);
             });
         }
-    }, [data]);
+    }, [data, range]);
 
     return (
         <Card>
-            <CardHeader>
-                <CardTitle>Real-time Performance</CardTitle>
+            <CardHeader className="flex flex-row items-center justify-between">
+                <CardTitle>{range === 'live' ? 'Real-time Performance' : `Performance (${range})`}</CardTitle>
+                <div className="flex gap-1">
+                    {RANGES.map(r => (
+                        <button
+                            key={r}
+                            onClick={() => setRange(r)}
+                            className={`px-2 py-1 text-xs rounded ${r === range ? 'bg-primary text-primary-foreground' : 'text-muted-foreground hover:bg-muted'}`}
+                        >
+                            {r}
+                        </button>
+                    ))}
+                </div>
             </CardHeader>
             <CardContent>
                 <ResponsiveContainer width="100%" height={300}>
@@ -11,6 +11,7 @@ export const systemAPI = {
     getInfo: () => api.get('/api/system/info'),
     getStats: () => api.get('/api/system/stats'),
     getProcesses: (limit = 20) => api.get(`/api/system/processes?limit=${limit}`),
+    getHistory: (range = '15m') => api.get(`/api/system/history?range=${encodeURIComponent(range)}`),
 };
 
 export const commandAPI = {
@@ -0,0 +1,93 @@
+"""
+Спільні фікстури тестів: локальні сервери-замінники замість зовнішньої мережі
+"""
+import os
+import re
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Статичні файли без підтримки Range (як простий сервер без Accept-Ranges)"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeHandler(QuietHandler):
+    """Статичні файли з підтримкою 'Range: bytes=a-b' (відповідь 206 + Content-Range)"""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        requested = self.headers.get("Range")
+        self.server.ranges.append(requested)
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", requested or "")
+        if match:
+            start = int(match[1])
+            end = min(int(match[2]), size - 1) if match[2] else size - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        f = open(path, "rb")
+        f.seek(start)
+        self._remaining = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        while self._remaining > 0:
+            block = source.read(min(self._remaining, 64 * 1024))
+            if not block:
+                break
+            outputfile.write(block)
+            self._remaining -= len(block)
+
+
+def _serve(directory: Path, handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=str(directory)))
+    server.ranges = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def http_root(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def range_server(http_root):
+    """HTTP-сервер на localhost з підтримкою Range; server.ranges - отримані заголовки Range"""
+    server = _serve(http_root, RangeHandler)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def plain_server(http_root):
+    """HTTP-сервер на localhost без підтримки Range"""
+    server = _serve(http_root, QuietHandler)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
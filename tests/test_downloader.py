@@ -0,0 +1,126 @@
+"""
+RangeDownloader проти локального http.server: сегменти, докачування, контрольні суми
+"""
+import hashlib
+import json
+import os
+
+import pytest
+
+from ai_agent import RangeDownloader
+
+
+@pytest.fixture
+def payload(http_root):
+    data = os.urandom(1024 * 1024 + 123)
+    (http_root / "blob.bin").write_bytes(data)
+    return data
+
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    # Кілька сегментів уже для 1 МБ, щоб тест лишався швидким
+    monkeypatch.setattr(RangeDownloader, "MIN_SEGMENT", 128 * 1024)
+
+
+def test_ranged_download_uses_parallel_segments(range_server, payload, small_segments, tmp_path):
+    target = tmp_path / "blob.bin"
+    res = RangeDownloader(connections=4).download(f"{range_server.url}/blob.bin", str(target))
+
+    assert res["segments"] == 4
+    assert res["resumed_bytes"] == 0
+    assert target.read_bytes() == payload
+    assert not (tmp_path / "blob.bin.part").exists()
+    assert not (tmp_path / "blob.bin.part.json").exists()
+    assert sum(1 for r in range_server.ranges if r and r != "bytes=0-0") == 4
+
+
+def test_download_without_range_support_uses_one_stream(plain_server, payload, small_segments, tmp_path):
+    downloader = RangeDownloader(connections=4)
+    url = f"{plain_server.url}/blob.bin"
+    assert downloader.probe(url)["ranges"] is False
+
+    res = downloader.download(url, str(tmp_path))
+
+    assert res["segments"] == 1
+    assert (tmp_path / "blob.bin").read_bytes() == payload
+
+
+def test_resume_from_state_file(range_server, payload, small_segments, tmp_path):
+    url = f"{range_server.url}/blob.bin"
+    target = tmp_path / "blob.bin"
+    downloader = RangeDownloader(connections=4)
+    info = downloader.probe(url)
+
+    # Стан перерваного запуску: кожен сегмент завантажено наполовину
+    segments = downloader._plan(info)
+    with open(tmp_path / "blob.bin.part", "wb") as f:
+        f.truncate(info["size"])
+        for seg in segments:
+            seg["pos"] = seg["start"] + (seg["end"] - seg["start"]) // 2
+            f.seek(seg["start"])
+            f.write(payload[seg["start"]:seg["pos"]])
+    (tmp_path / "blob.bin.part.json").write_text(json.dumps(dict(info, segments=segments)), encoding="utf-8")
+    done = sum(seg["pos"] - seg["start"] for seg in segments)
+    range_server.ranges.clear()
+
+    checksum = "sha256:" + hashlib.sha256(payload).hexdigest()
+    res = downloader.download(url, str(target), checksum)
+
+    assert res["resumed_bytes"] == done
+    assert res["checksum"] == checksum
+    assert target.read_bytes() == payload
+    # Докачуються лише хвости сегментів
+    resumed_from = sorted(int(r[len("bytes="):].split("-")[0]) for r in range_server.ranges if r and r != "bytes=0-0")
+    assert resumed_from == sorted(seg["pos"] for seg in segments)
+
+
+def test_changed_file_discards_stale_state(range_server, payload, small_segments, tmp_path):
+    url = f"{range_server.url}/blob.bin"
+    downloader = RangeDownloader(connections=4)
+    info = dict(downloader.probe(url), size=1)
+    (tmp_path / "blob.bin.part").write_bytes(b"x")
+    (tmp_path / "blob.bin.part.json").write_text(
+        json.dumps(dict(info, segments=[{"start": 0, "end": 1, "pos": 1}])), encoding="utf-8")
+
+    res = downloader.download(url, str(tmp_path / "blob.bin"))
+
+    assert res["resumed_bytes"] == 0
+    assert (tmp_path / "blob.bin").read_bytes() == payload
+
+
+@pytest.mark.parametrize("algorithm", ["md5", "sha1", "sha256"])
+def test_checksum_match(range_server, payload, small_segments, tmp_path, algorithm):
+    digest = hashlib.new(algorithm, payload).hexdigest()
+    # Без префікса алгоритм визначається за довжиною
+    res = RangeDownloader().download(f"{range_server.url}/blob.bin", str(tmp_path / "blob.bin"), digest)
+
+    assert res["checksum"] == f"{algorithm}:{digest}"
+
+
+def test_checksum_mismatch_removes_partial_files(range_server, payload, small_segments, tmp_path):
+    target = tmp_path / "blob.bin"
+    with pytest.raises(ValueError, match="sha256"):
+        RangeDownloader().download(f"{range_server.url}/blob.bin", str(target), "sha256:" + "0" * 64)
+
+    assert not target.exists()
+    assert not (tmp_path / "blob.bin.part").exists()
+    assert not (tmp_path / "blob.bin.part.json").exists()
+
+
+def test_progress_is_published_as_events(range_server, payload, small_segments, tmp_path, monkeypatch):
+    from ai_agent import event_bus
+
+    monkeypatch.setattr(RangeDownloader, "PROGRESS_INTERVAL", 0)
+    events = []
+    unsubscribe = [event_bus.subscribe(topic, lambda topic, data: events.append(topic))
+                   for topic in ("download.started", "download.progress", "download.finished")]
+    try:
+        RangeDownloader().download(f"{range_server.url}/blob.bin", str(tmp_path / "blob.bin"))
+    finally:
+        for cancel in unsubscribe:
+            cancel()
+
+    assert events[0] == "download.started"
+    assert "download.progress" in events
+    assert events[-1] == "download.finished"